@@ -1,30 +1,60 @@
-from flask import Flask, jsonify, render_template, request, session
+from flask import (Flask, Response, appcontext_pushed, g, jsonify, render_template, request, send_file, session,
+                   stream_with_context)
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date, timedelta
 import os
 from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+import importlib.util
+import io
+import json
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Helper modules import models with `from app import ...` - point that at this module
+# instead of a second copy when the server is started with `python app.py`
+sys.modules.setdefault('app', sys.modules[__name__])
+
+# Lazy initialisation (the default on Vercel): the database engine and schema checks are set
+# up when the first request (or app context) needs them instead of at import, and .env is only
+# read if there is one, so cold starts only pay for importing Flask and declaring the models
+LAZY_INIT = os.environ.get('LAZY_INIT', '1' if os.environ.get('VERCEL') else '0').lower() in ('1', 'true', 'yes')
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    print("⚠️  python-dotenv not installed. Install with: pip install python-dotenv")
-except Exception as e:
-    print(f"⚠️  Could not load .env file: {e}")
-
-# Optional Supabase imports - app works without it
-try:
-    from supabase_config import get_supabase_client, get_supabase_admin_client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
+if not LAZY_INIT or os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        print("⚠️  python-dotenv not installed. Install with: pip install python-dotenv")
+    except Exception as e:
+        print(f"⚠️  Could not load .env file: {e}")
+
+# Optional Supabase - app works without it. Only check it is installed here: the SDK and its
+# HTTP stack are imported on the first auth call
+SUPABASE_AVAILABLE = importlib.util.find_spec('supabase') is not None
+if not SUPABASE_AVAILABLE:
     print("⚠️  Supabase not installed. Install with: pip install supabase")
-    def get_supabase_client():
+
+def get_supabase_client():
+    if not SUPABASE_AVAILABLE:
         raise ImportError("Supabase not installed")
-    def get_supabase_admin_client():
+    from supabase_config import get_supabase_client as create_client
+    return create_client()
+
+def get_supabase_admin_client():
+    if not SUPABASE_AVAILABLE:
         raise ImportError("Supabase not installed")
+    from supabase_config import get_supabase_admin_client as create_admin_client
+    return create_admin_client()
 
 app = Flask(__name__)
 
@@ -59,11 +89,42 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 CORS(app, supports_credentials=True)
 
-db = SQLAlchemy(app)
+# ShardedSession routes queries to per-user SQLite files when SQLITE_SHARD_DIR is set (see sharding.py)
+from sharding import DEFAULT_SHARD_CACHE_SIZE, ShardedSession, shard_router
+# Bound to the app by init_database() below - at import, or on first use with LAZY_INIT
+db = SQLAlchemy(session_options={'class_': ShardedSession})
+
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores foreign keys (and their ON DELETE actions) unless enabled per connection"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+# Prometheus metrics at /metrics: request latency, SQL statements per request, pool usage (see metrics.py)
+import metrics
+
+def metrics_engines():
+    engines = []
+    if database_ready:
+        engines.append(('default', db.engine))
+    engines.extend(('shards', engine) for engine in list(shard_router.engines.values()))
+    return engines
+
+metrics.install(app, metrics_engines)
+
+# Statements slower than SLOW_QUERY_MS are logged with their route and EXPLAIN plan (see slow_queries.py)
+import slow_queries
 
 # Helper function to get current user from Supabase token
 def get_current_user():
-    """Extract user ID from Supabase JWT token in request headers"""
+    """Extract user ID from Supabase JWT token in request headers (verified once per request)"""
+    if 'current_user_id' not in g:
+        g.current_user_id = fetch_current_user()
+    return g.current_user_id
+
+def fetch_current_user():
     if not SUPABASE_AVAILABLE:
         return None
     
@@ -72,11 +133,14 @@ def get_current_user():
         return None
     
     token = auth_header.replace('Bearer ', '')
+    started = time.perf_counter()
     try:
         supabase = get_supabase_client()
         user = supabase.auth.get_user(token)
+        metrics.observe_auth_call('get_user', started, 'ok' if user and user.user else 'invalid')
         return user.user.id if user and user.user else None
     except Exception as e:
+        metrics.observe_auth_call('get_user', started, 'error')
         print(f"Error getting user from token: {e}")
         return None
 
@@ -93,7 +157,7 @@ def require_auth(f):
 # Database Models
 class AppIdea(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.String(255), nullable=True)  # Supabase user UUID
+    user_id = db.Column(db.String(255), nullable=True, index=True)  # Supabase user UUID
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     mrr_range = db.Column(db.String(50))  # e.g., "$10k-30k"
@@ -135,15 +199,38 @@ class AppIdea(db.Model):
     technical_requirements = db.Column(db.Text)  # Technical needs
     third_party_integrations = db.Column(db.Text)  # APIs, services needed
     
+    score = db.Column(db.Float, nullable=False, default=0, server_default='0')  # Set by scoring.py on every write
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, index=True)  # Sync sequence number of the last change
+
+    # ?sort=score walks this index backwards
+    __table_args__ = (db.Index('ix_app_idea_user_id_score', 'user_id', 'score', 'id'),)
+
+class IdeaScoringModel(db.Model):
+    """A user's weights for scoring.py - no row means the defaults"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(255), nullable=True, unique=True)
+    weights = db.Column(db.Text, nullable=False)  # JSON {field: weight}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class IdeaSignature(db.Model):
+    """MinHash signature of an idea's text (see duplicates.py)"""
+    idea_id = db.Column(db.Integer, db.ForeignKey('app_idea.id', ondelete='CASCADE'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # uint32[NUM_HASHES]
+
+class IdeaLshBucket(db.Model):
+    """One row per LSH band of an idea's signature - ideas sharing a bucket are duplicate candidates"""
+    idea_id = db.Column(db.Integer, db.ForeignKey('app_idea.id', ondelete='CASCADE'), primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True, index=True)
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.String(255), nullable=True)  # Supabase user UUID
-    app_idea_id = db.Column(db.Integer, db.ForeignKey('app_idea.id'), nullable=False)
+    user_id = db.Column(db.String(255), nullable=True, index=True)  # Supabase user UUID
+    app_idea_id = db.Column(db.Integer, db.ForeignKey('app_idea.id', ondelete='CASCADE'), nullable=False, index=True)
     name = db.Column(db.String(200), nullable=False)
-    current_stage = db.Column(db.String(50), default='discovery')  # discovery, planning, building, testing, launching, live
+    current_stage = db.Column(db.String(50), default='discovery', index=True)  # discovery, planning, building, testing, launching, live
     progress = db.Column(db.Integer, default=0)  # 0-100
     target_launch_date = db.Column(db.Date)
     actual_launch_date = db.Column(db.Date)
@@ -151,12 +238,13 @@ class Project(db.Model):
     target_mrr = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, index=True)  # Sync sequence number of the last change
     
-    app_idea = db.relationship('AppIdea', backref=db.backref('projects', lazy=True))
+    app_idea = db.relationship('AppIdea', backref=db.backref('projects', lazy=True, cascade='all, delete', passive_deletes=True))
 
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     stage = db.Column(db.String(50))  # discovery, planning, building, testing, launching
@@ -165,12 +253,13 @@ class Task(db.Model):
     due_date = db.Column(db.Date)
     completed_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, index=True)  # Sync sequence number of the last change
     
-    project = db.relationship('Project', backref=db.backref('tasks', lazy=True))
+    project = db.relationship('Project', backref=db.backref('tasks', lazy=True, cascade='all, delete', passive_deletes=True))
 
 class GamePlanStep(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False, index=True)
     step_number = db.Column(db.Integer, nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -179,13 +268,15 @@ class GamePlanStep(db.Model):
     status = db.Column(db.String(50), default='pending')  # pending, in_progress, completed
     completed_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, index=True)  # Sync sequence number of the last change
     
-    project = db.relationship('Project', backref=db.backref('game_plan_steps', lazy=True, order_by='GamePlanStep.step_number'))
+    project = db.relationship('Project', backref=db.backref('game_plan_steps', lazy=True, order_by='GamePlanStep.step_number',
+                                                             cascade='all, delete', passive_deletes=True))
 
 class GamePlanStepData(db.Model):
     """Stores detailed form data for each game plan step"""
     id = db.Column(db.Integer, primary_key=True)
-    step_id = db.Column(db.Integer, db.ForeignKey('game_plan_step.id'), nullable=False, unique=True)
+    step_id = db.Column(db.Integer, db.ForeignKey('game_plan_step.id', ondelete='CASCADE'), nullable=False, unique=True)
     
     # Deep Competitive Recon fields (Step 1)
     competitors_looked_at = db.Column(db.Text)  # Comma-separated list
@@ -211,70 +302,578 @@ class GamePlanStepData(db.Model):
     launch_note = db.Column(db.Text)  # Optional one-line note
     
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, index=True)  # Sync sequence number of the last change
     
-    step = db.relationship('GamePlanStep', backref=db.backref('step_data', uselist=False))
+    step = db.relationship('GamePlanStep', backref=db.backref('step_data', uselist=False, cascade='all, delete', passive_deletes=True))
 
 class UserActivity(db.Model):
     """Tracks user actions for metrics like consistency score and streaks"""
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(255), nullable=True, index=True)  # Supabase user UUID (owner of the project/idea)
     action_type = db.Column(db.String(100), nullable=False)  # e.g., 'outreach', 'smoke_test', 'idea_created', 'project_created', 'step_completed'
-    action_date = db.Column(db.Date, nullable=False, default=date.today)
+    action_date = db.Column(db.Date, nullable=False, default=date.today, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Additional context
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=True)
-    idea_id = db.Column(db.Integer, db.ForeignKey('app_idea.id'), nullable=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='SET NULL'), nullable=True, index=True)
+    idea_id = db.Column(db.Integer, db.ForeignKey('app_idea.id', ondelete='SET NULL'), nullable=True, index=True)
     notes = db.Column(db.Text)  # Optional notes about the action
+    version = db.Column(db.Integer, index=True)  # Sync sequence number of the last change
     
-    project = db.relationship('Project', backref=db.backref('activities', lazy=True))
-    idea = db.relationship('AppIdea', backref=db.backref('activities', lazy=True))
+    project = db.relationship('Project', backref=db.backref('activities', lazy=True, passive_deletes=True))
+    idea = db.relationship('AppIdea', backref=db.backref('activities', lazy=True, passive_deletes=True))
     
     # Unique constraint: one action per type per day
     __table_args__ = (db.UniqueConstraint('action_type', 'action_date', name='unique_action_per_day'),)
 
+class SyncSequence(db.Model):
+    """Monotonic change counter - each flush that touches synced rows takes the next id as its version"""
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # PostgreSQL only: the first unassigned transaction id when this version was taken (see sync_token)
+    snapshot_xmax = db.Column(db.BigInteger)
+
+class SyncTombstone(db.Model):
+    """Records deleted rows so sync clients can drop them from their local replica"""
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(50), nullable=False)  # ideas, projects, tasks, steps, step_data, activities
+    entity_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.String(255), nullable=True, index=True)  # Owner at the time of deletion
+    version = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BackgroundJob(db.Model):
+    """Slow work queued for the jobs.py worker - always in the shared database, never in a shard"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # Handler name registered in jobs.py
+    user_id = db.Column(db.String(255), nullable=True, index=True)  # Who queued it (None: anonymous or system)
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not before (retry backoff)
+    locked_by = db.Column(db.String(100))  # Worker running it
+    locked_at = db.Column(db.DateTime)  # Last heartbeat from that worker
+    progress = db.Column(db.Text)  # JSON, latest progress report
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)  # Last failure
+    dedupe_key = db.Column(db.String(255), unique=True)  # Scheduler slots - one job per slot across processes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_background_job_status_run_at', 'status', 'run_at'),)
+
+# Cold storage for killed and long-inactive projects (see archive.py). Each archive table
+# has the same columns as its hot table plus archived_at, but no foreign keys or unique
+# constraints, so archived rows never slow down or block writes to the hot tables.
+ARCHIVE_INDEXED_COLUMNS = {'user_id', 'app_idea_id', 'project_id', 'step_id'}
+
+def make_archive_table(model):
+    columns = [
+        db.Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False,
+                  index=column.name in ARCHIVE_INDEXED_COLUMNS)
+        for column in model.__table__.columns
+    ]
+    return db.Table(f'archive_{model.__tablename__}', *columns,
+                    db.Column('archived_at', db.DateTime, default=datetime.utcnow, index=True))
+
+# Parents first - the order rows are restored in
+ARCHIVE_TABLES = {model: make_archive_table(model) for model in (Project, GamePlanStep, GamePlanStepData, Task)}
+
+# Optional per-user SQLite shards - every model and archive table above is created in each shard
+shard_dir = os.environ.get('SQLITE_SHARD_DIR')
+if shard_dir and app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    def init_shard_schema(engine):
+        from migrations import run_migrations
+        run_migrations(engine, db.metadata, verbose=False)
+    
+    shard_router.configure(
+        shard_dir, init_shard_schema, get_current_user,
+        int(os.environ.get('SQLITE_SHARD_CACHE_SIZE', DEFAULT_SHARD_CACHE_SIZE))
+    )
+
+# Models exposed through /api/sync, keyed by the collection name clients see
+SYNC_ENTITIES = {
+    AppIdea: 'ideas',
+    Project: 'projects',
+    Task: 'tasks',
+    GamePlanStep: 'steps',
+    GamePlanStepData: 'step_data',
+    UserActivity: 'activities',
+}
+
+# pg_snapshot_* return xid8, which has no direct cast to bigint
+SNAPSHOT_XMAX = 'pg_snapshot_xmax(pg_current_snapshot())::text::bigint'
+SNAPSHOT_XMIN = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+
+def next_sync_version(connection=None):
+    """Allocate the next sync version (use when writing rows outside the ORM unit of work)"""
+    connection = connection or db.session.connection()
+    postgresql = connection.dialect.name == 'postgresql'
+    if postgresql:
+        # Order matters (see sync_token): our xid exists before the version, the snapshot is read after it
+        connection.execute(db.text('SELECT pg_current_xact_id()'))
+    result = connection.execute(SyncSequence.__table__.insert().values(created_at=datetime.utcnow()))
+    version = result.inserted_primary_key[0]
+    if postgresql:
+        connection.execute(SyncSequence.__table__.update().where(SyncSequence.id == version)
+                           .values(snapshot_xmax=db.literal_column(SNAPSHOT_XMAX)))
+    return version
+
+def sync_token(session=None):
+    """Highest version below which every version has been committed or rolled back
+
+    SQLite has one writer at a time, so versions commit in the order they are
+    taken and the newest one is safe. PostgreSQL commits them in any order: if
+    the transaction holding version 5 commits after version 6, a client that
+    was handed 6 would never see 5.
+
+    next_sync_version records, after taking a version, the first xid not yet
+    assigned (snapshot_xmax), and every writer has its xid before it takes a
+    version. So when snapshot_xmax <= the oldest running xid (our snapshot's
+    xmin), every transaction still running got its xid - and took its
+    version - after that version was taken. The newest such version is the
+    token: nothing below it is still in flight. A long-running write
+    transaction holds the token back until it finishes.
+    """
+    session = session or db.session
+    query = session.query(db.func.max(SyncSequence.id))
+    if session.get_bind().dialect.name == 'postgresql':
+        query = query.filter(db.or_(
+            SyncSequence.snapshot_xmax.is_(None),
+            SyncSequence.snapshot_xmax <= db.literal_column(SNAPSHOT_XMIN)
+        ))
+    return query.scalar() or 0
+
+def get_sync_owner(obj):
+    """Return the user_id that owns a synced row (children inherit it from their project)"""
+    if isinstance(obj, (AppIdea, Project, UserActivity)):
+        return obj.user_id
+    if isinstance(obj, (Task, GamePlanStep)):
+        return obj.project.user_id if obj.project else None
+    if isinstance(obj, GamePlanStepData):
+        return obj.step.project.user_id if obj.step and obj.step.project else None
+    return None
+
+def record_bulk_tombstones(model, criteria, user_id, version=None, connection=None):
+    """Tombstone the rows a bulk delete (or a database cascade) is about to remove, in one INSERT ... SELECT
+
+    user_id is either the owner's id or a column (e.g. Project.user_id, joined in criteria).
+    """
+    connection = connection or db.session.connection()
+    version = version or next_sync_version(connection)
+    owner = user_id if hasattr(user_id, '__clause_element__') else db.literal(user_id, db.String)
+    select_deleted = db.select(
+        db.literal(SYNC_ENTITIES[model]),
+        model.id,
+        owner,
+        db.literal(version),
+        db.literal(datetime.utcnow(), db.DateTime)
+    ).where(*criteria)
+    connection.execute(SyncTombstone.__table__.insert().from_select(
+        ['entity', 'entity_id', 'user_id', 'version', 'deleted_at'], select_deleted
+    ))
+
+def record_cascade_tombstones(connection, obj, version):
+    """Tombstone the children ON DELETE CASCADE removes along with obj, and bump activities it nulls out
+
+    The database deletes these rows without the ORM ever loading them, so they
+    never reach before_flush on their own.
+    """
+    user_id = get_sync_owner(obj)
+    if isinstance(obj, AppIdea):
+        project_ids = db.select(Project.id).where(Project.app_idea_id == obj.id).scalar_subquery()
+        record_bulk_tombstones(Project, [Project.app_idea_id == obj.id], user_id, version, connection)
+        activity_criteria = db.or_(UserActivity.idea_id == obj.id, UserActivity.project_id.in_(project_ids))
+    elif isinstance(obj, Project):
+        project_ids = [obj.id]
+        activity_criteria = UserActivity.project_id == obj.id
+    elif isinstance(obj, GamePlanStep):
+        record_bulk_tombstones(GamePlanStepData, [GamePlanStepData.step_id == obj.id], user_id, version, connection)
+        return
+    else:
+        return
+
+    step_ids = db.select(GamePlanStep.id).where(GamePlanStep.project_id.in_(project_ids)).scalar_subquery()
+    record_bulk_tombstones(Task, [Task.project_id.in_(project_ids)], user_id, version, connection)
+    record_bulk_tombstones(GamePlanStep, [GamePlanStep.project_id.in_(project_ids)], user_id, version, connection)
+    record_bulk_tombstones(GamePlanStepData, [GamePlanStepData.step_id.in_(step_ids)], user_id, version, connection)
+    # ON DELETE SET NULL rewrites these activities - make sure clients pick the change up
+    connection.execute(db.update(UserActivity).where(activity_criteria).values(version=version))
+
+# Fields that feed AppIdea.score (scoring.FIELDS)
+SCORED_FIELDS = ('estimated_mrr', 'competitor_mrr', 'revenue_confidence', 'problem_severity',
+                 'competition_level', 'difficulty', 'user_id')
+
+@event.listens_for(db.session, 'before_flush')
+def score_changed_ideas(session, flush_context, instances):
+    """Keep AppIdea.score current for ideas created or edited through the ORM"""
+    ideas = [obj for obj in session.new if isinstance(obj, AppIdea)]
+    ideas += [
+        obj for obj in session.dirty if isinstance(obj, AppIdea)
+        and any(db.inspect(obj).attrs[field].history.has_changes() for field in SCORED_FIELDS)
+    ]
+    if ideas:
+        from scoring import score_ideas
+        score_ideas(session, ideas)
+
+# Text the duplicate index is built from (duplicates.TEXT_FIELDS)
+INDEXED_TEXT_FIELDS = ('name', 'description', 'problem_to_solve')
+
+@event.listens_for(db.session, 'after_flush')
+def index_changed_ideas(session, flush_context):
+    """Keep the near-duplicate index current for ideas created or edited through the ORM"""
+    ideas = [obj for obj in session.new if isinstance(obj, AppIdea)]
+    ideas += [
+        obj for obj in session.dirty if isinstance(obj, AppIdea) and obj not in session.deleted
+        and any(db.inspect(obj).attrs[field].history.has_changes() for field in INDEXED_TEXT_FIELDS)
+    ]
+    if ideas:
+        from duplicates import index_ideas
+        index_ideas(session.connection(), ideas)
+
+@event.listens_for(db.session, 'after_flush')
+def track_suggest_changes(session, flush_context):
+    """Queue typeahead index updates for ideas and projects written through the ORM (suggest.py)"""
+    from suggest import record_changes
+    record_changes(session)
+
+@event.listens_for(db.session, 'after_commit')
+def apply_suggest_changes(session):
+    from suggest import apply_changes
+    apply_changes(session)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def discard_suggest_changes(session, previous_transaction):
+    from suggest import discard_changes
+    discard_changes(session, previous_transaction)
+
+@event.listens_for(db.session, 'before_flush')
+def assign_sync_versions(session, flush_context, instances):
+    """Stamp new/changed synced rows with a fresh version and tombstone deleted ones"""
+    changed = [obj for obj in session.new if type(obj) in SYNC_ENTITIES]
+    changed += [obj for obj in session.dirty if type(obj) in SYNC_ENTITIES and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if type(obj) in SYNC_ENTITIES]
+    if not changed and not deleted:
+        return
+
+    connection = session.connection()
+    version = next_sync_version(connection)
+    for obj in changed:
+        obj.version = version
+    for obj in deleted:
+        session.add(SyncTombstone(
+            entity=SYNC_ENTITIES[type(obj)],
+            entity_id=obj.id,
+            user_id=get_sync_owner(obj),
+            version=version
+        ))
+        record_cascade_tombstones(connection, obj, version)
+
 # Helper function to track user activity
-def track_activity(action_type, project_id=None, idea_id=None, notes=None):
-    """Track a user action for metrics calculation"""
+def track_activity(action_type, project_id=None, idea_id=None, notes=None, user_id=None, session=None):
+    """Track a user action for metrics calculation (in db.session unless another session is given)"""
+    if session is None:
+        session = db.session
     try:
         today = date.today()
+        # Activities belong to whoever owns the project/idea they are about
+        if not user_id:
+            owner = session.get(Project, project_id) if project_id else None
+            owner = owner or (session.get(AppIdea, idea_id) if idea_id else None)
+            user_id = owner.user_id if owner else None
         # Check if this action already exists for today
-        existing = UserActivity.query.filter_by(
+        existing = session.query(UserActivity).filter_by(
             action_type=action_type,
             action_date=today
         ).first()
         
         if not existing:
             activity = UserActivity(
+                user_id=user_id,
                 action_type=action_type,
                 action_date=today,
                 project_id=project_id,
                 idea_id=idea_id,
                 notes=notes
             )
-            db.session.add(activity)
-            db.session.commit()
+            session.add(activity)
+            session.commit()
     except Exception as e:
         # Silently fail if tracking fails (don't break main functionality)
         print(f"Error tracking activity: {e}")
-        db.session.rollback()
+        session.rollback()
 
 # Initialize database (only if not already initialized)
 # This is safe to call multiple times in serverless environment
 def init_db():
+    """Apply pending schema migrations (a single query when there are none - see migrations.py)"""
+    from migrations import run_migrations, MigrationLockTimeout
     with app.app_context():
         try:
-            db.create_all()
+            run_migrations(db.engine, db.metadata)
+        except MigrationLockTimeout as e:
+            # Another instance is migrating - serve with the schema as it is rather than block startup
+            print(f"Database migration skipped: {e}")
         except Exception as e:
-            # Log error but don't fail - database might already exist
+            # Log error but don't fail - the next start (or /migrate) retries
             print(f"Database initialization note: {e}")
 
-# Initialize on import (safe for serverless)
-# Skip on Vercel - tables will be created via /migrate endpoint
-if not os.environ.get('VERCEL'):
-    try:
+database_ready = False
+database_lock = threading.RLock()
+
+def init_database():
+    """Bind db to the app (builds the engine) and check the schema - runs once"""
+    global database_ready
+    with database_lock:
+        if database_ready:
+            return
+        database_ready = True
+        db.init_app(app)
+        # Concurrent cold starts are safe: one instance migrates under a lock, the rest wait or skip
         init_db()
-    except Exception as e:
-        print(f"Database initialization skipped: {e}")
+
+if LAZY_INIT:
+    # Every request and script pushes an app context before touching db, so initialise then
+    appcontext_pushed.connect(lambda sender, **extra: init_database(), app, weak=False)
+else:
+    # Initialize on import (safe for serverless)
+    init_database()
+
+def include_archived():
+    """Listing routes add archived projects (see archive.py) when called with ?include_archived=1"""
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+def wants_async():
+    """Slow routes queue a background job (see jobs.py) with ?async=1 or Prefer: respond-async"""
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
+def accepted(kind, payload=None):
+    """Queue a job for the current user and answer 202 with where to poll it"""
+    from jobs import enqueue
+    job_id = enqueue(kind, payload, get_current_user())
+    response = jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/api/jobs/{job_id}'})
+    response.headers['Location'] = f'/api/jobs/{job_id}'
+    return response, 202
+
+# JSON serializers shared by the listing routes and /api/sync
+def serialize_idea(idea):
+    return {
+        'id': idea.id,
+        'name': idea.name,
+        'description': idea.description,
+        'mrr_range': idea.mrr_range,
+        'source_url': idea.source_url,
+        'difficulty': idea.difficulty,
+        'tech_stack': idea.tech_stack,
+        'market_size': idea.market_size,
+        'competition_level': idea.competition_level,
+        'notes': idea.notes,
+        'status': idea.status,
+        'estimated_mrr': idea.estimated_mrr,
+        'revenue_verification_source': idea.revenue_verification_source,
+        'revenue_proof_url': idea.revenue_proof_url,
+        'revenue_confidence': idea.revenue_confidence,
+        'pricing_model': idea.pricing_model,
+        'problem_statement': idea.problem_statement,
+        'target_audience': idea.target_audience,
+        'problem_severity': idea.problem_severity,
+        'value_proposition': idea.value_proposition,
+        'key_benefits': idea.key_benefits,
+        'unique_selling_point': idea.unique_selling_point,
+        'core_features': idea.core_features,
+        'nice_to_have_features': idea.nice_to_have_features,
+        'technical_requirements': idea.technical_requirements,
+        'third_party_integrations': idea.third_party_integrations,
+        'problem_to_solve': idea.problem_to_solve,
+        'competitor_url': idea.competitor_url,
+        'competitor_mrr': idea.competitor_mrr,
+        'validation_notes': idea.validation_notes,
+        'my_angle': idea.my_angle,
+        'score': idea.score,
+        'created_at': idea.created_at.isoformat() if idea.created_at else None
+    }
+
+def serialize_project(project):
+    return {
+        'id': project.id,
+        'app_idea_id': project.app_idea_id,
+        'name': project.name,
+        'current_stage': project.current_stage,
+        'progress': project.progress,
+        'target_launch_date': project.target_launch_date.isoformat() if project.target_launch_date else None,
+        'actual_launch_date': project.actual_launch_date.isoformat() if project.actual_launch_date else None,
+        'current_mrr': project.current_mrr,
+        'target_mrr': project.target_mrr,
+        'created_at': project.created_at.isoformat() if project.created_at else None
+    }
+
+def serialize_task(task):
+    return {
+        'id': task.id,
+        'project_id': task.project_id,
+        'title': task.title,
+        'description': task.description,
+        'stage': task.stage,
+        'status': task.status,
+        'priority': task.priority,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'completed_at': task.completed_at.isoformat() if task.completed_at else None,
+        'created_at': task.created_at.isoformat() if task.created_at else None
+    }
+
+def serialize_step(step):
+    return {
+        'id': step.id,
+        'project_id': step.project_id,
+        'step_number': step.step_number,
+        'title': step.title,
+        'description': step.description,
+        'category': step.category,
+        'estimated_hours': step.estimated_hours,
+        'status': step.status,
+        'completed_at': step.completed_at.isoformat() if step.completed_at else None,
+        'created_at': step.created_at.isoformat() if step.created_at else None
+    }
+
+def serialize_step_data(step_data):
+    return {
+        # Deep Competitive Recon fields
+        'competitors_looked_at': step_data.competitors_looked_at,
+        'where_got_reviews': step_data.where_got_reviews,
+        'pain_point_1': step_data.pain_point_1,
+        'pain_point_2': step_data.pain_point_2,
+        'pain_point_3': step_data.pain_point_3,
+        'my_wedge': step_data.my_wedge,
+        'how_solve_10x_better': step_data.how_solve_10x_better,
+        'confidence_check': step_data.confidence_check,
+        'go_no_go': step_data.go_no_go,
+        # Build Facade Landing Page fields
+        'final_headline_chosen': step_data.final_headline_chosen,
+        'headline_variations': step_data.headline_variations,
+        'subheadline': step_data.subheadline,
+        'wedge_statement': step_data.wedge_statement,
+        'cta_button_text': step_data.cta_button_text,
+        'price_shown': step_data.price_shown,
+        'landing_page_url': step_data.landing_page_url,
+        'visual_proof_url': step_data.visual_proof_url,
+        'launched_status': step_data.launched_status,
+        'launch_note': step_data.launch_note,
+        'updated_at': step_data.updated_at.isoformat() if step_data.updated_at else None
+    }
+
+def serialize_activity(activity):
+    return {
+        'id': activity.id,
+        'action_type': activity.action_type,
+        'action_date': activity.action_date.isoformat() if activity.action_date else None,
+        'project_id': activity.project_id,
+        'idea_id': activity.idea_id,
+        'notes': activity.notes,
+        'created_at': activity.created_at.isoformat() if activity.created_at else None
+    }
+
+# Row builders and updaters shared by the single-row routes and /api/batch
+def parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date {value!r} (expected YYYY-MM-DD)")
+
+# Set by the server: score by scoring.py from the idea's fields, version by the sync sequence
+IDEA_READ_ONLY_FIELDS = {'id', 'user_id', 'score', 'version', 'created_at', 'updated_at'}
+
+# Fields the update handlers write - ids, owners, parents, versions and timestamps are never taken from a request
+PROJECT_FIELDS = {'name', 'current_stage', 'progress', 'target_launch_date', 'actual_launch_date', 'current_mrr',
+                  'target_mrr'}
+TASK_FIELDS = {'title', 'description', 'stage', 'status', 'priority', 'due_date'}
+GAME_PLAN_STEP_FIELDS = {'step_number', 'title', 'description', 'category', 'estimated_hours', 'status'}
+
+def build_project(data, user_id):
+    return Project(
+        user_id=user_id,
+        app_idea_id=data.get('app_idea_id'),
+        name=data.get('name'),
+        current_stage=data.get('current_stage', 'discovery'),
+        target_launch_date=parse_date(data.get('target_launch_date')),
+        target_mrr=data.get('target_mrr')
+    )
+
+def apply_project_changes(project, data):
+    for key, value in data.items():
+        if key in PROJECT_FIELDS:
+            if key in ['target_launch_date', 'actual_launch_date'] and value:
+                setattr(project, key, parse_date(value))
+            else:
+                setattr(project, key, value)
+    project.updated_at = datetime.utcnow()
+
+def build_task(project_id, data):
+    return Task(
+        project_id=project_id,
+        title=data.get('title'),
+        description=data.get('description'),
+        stage=data.get('stage'),
+        status=data.get('status', 'todo'),
+        priority=data.get('priority', 'medium'),
+        due_date=parse_date(data.get('due_date'))
+    )
+
+def apply_status_change(row, status):
+    """Set status and keep completed_at in step with it"""
+    row.status = status
+    if status == 'completed':
+        if not row.completed_at:
+            row.completed_at = datetime.utcnow()
+    else:
+        row.completed_at = None
+
+def apply_task_changes(task, data):
+    for key, value in data.items():
+        if key in TASK_FIELDS:
+            if key == 'due_date' and value:
+                setattr(task, key, parse_date(value))
+            elif key == 'status':
+                apply_status_change(task, value)
+            else:
+                setattr(task, key, value)
+
+def build_game_plan_step(project_id, data):
+    return GamePlanStep(
+        project_id=project_id,
+        step_number=data.get('step_number'),
+        title=data.get('title'),
+        description=data.get('description'),
+        category=data.get('category'),
+        estimated_hours=data.get('estimated_hours'),
+        status=data.get('status', 'pending')
+    )
+
+def apply_game_plan_step_changes(step, data):
+    for key, value in data.items():
+        if key in GAME_PLAN_STEP_FIELDS:
+            if key == 'status':
+                apply_status_change(step, value)
+            else:
+                setattr(step, key, value)
+
+def remove_project(project):
+    """Delete a project and free its idea to be promoted again
+
+    Tasks, steps and step data go with it through ON DELETE CASCADE, so this is a
+    single DELETE however many children the project has.
+    """
+    # Update linked idea status back to Researching
+    if project.app_idea_id:
+        idea = db.session.get(AppIdea, project.app_idea_id)
+        if idea:
+            idea.status = 'Researching'
+    
+    db.session.delete(project)
 
 # Routes
 @app.route('/')
@@ -327,6 +926,14 @@ def get_database_status():
         'using_supabase': is_supabase
     })
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint - set METRICS_TOKEN to require `Authorization: Bearer <token>`"""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Authentication required'}), 401
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 # Supabase Authentication Endpoints
 @app.route('/api/auth/user', methods=['GET'])
 def get_current_user_info():
@@ -344,7 +951,9 @@ def get_current_user_info():
         token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else ''
         
         if token:
+            started = time.perf_counter()
             user = supabase.auth.get_user(token)
+            metrics.observe_auth_call('get_user', started, 'ok' if user and user.user else 'invalid')
             if user and user.user:
                 return jsonify({
                     'authenticated': True,
@@ -387,46 +996,22 @@ def migrate_data_to_current_user():
     user_id = get_current_user()
     if not user_id:
         return jsonify({'error': 'Authentication required. Please sign in first.'}), 401
+    if wants_async():
+        return accepted('claim_data')
     
     try:
-        with app.app_context():
-            migrated = {
-                'ideas': 0,
-                'projects': 0,
-                'tasks': 0,
-                'steps': 0,
-                'step_data': 0
-            }
-            
-            # Migrate App Ideas
-            ideas = AppIdea.query.filter(AppIdea.user_id.is_(None)).all()
-            for idea in ideas:
-                idea.user_id = user_id
-            migrated['ideas'] = len(ideas)
-            
-            # Migrate Projects
-            projects = Project.query.filter(Project.user_id.is_(None)).all()
-            for project in projects:
-                project.user_id = user_id
-            migrated['projects'] = len(projects)
-            
-            # Count related data
-            if projects:
-                project_ids = [p.id for p in projects]
-                migrated['tasks'] = Task.query.filter(Task.project_id.in_(project_ids)).count()
-                migrated['steps'] = GamePlanStep.query.filter(GamePlanStep.project_id.in_(project_ids)).count()
-                step_ids = [s.id for s in GamePlanStep.query.filter(GamePlanStep.project_id.in_(project_ids)).all()]
-                if step_ids:
-                    migrated['step_data'] = GamePlanStepData.query.filter(GamePlanStepData.step_id.in_(step_ids)).count()
-            
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Data migrated successfully',
-                'migrated': migrated,
-                'user_id': user_id
-            }), 200
+        from claim_data import claim_legacy_data
+        
+        def log_progress(entity, claimed):
+            print(f"Claimed {claimed} legacy {entity} for user {user_id}")
+        
+        migrated = claim_legacy_data(user_id, progress=log_progress)
+        return jsonify({
+            'success': True,
+            'message': 'Data migrated successfully',
+            'migrated': migrated,
+            'user_id': user_id
+        }), 200
     except Exception as e:
         db.session.rollback()
         import traceback
@@ -434,18 +1019,20 @@ def migrate_data_to_current_user():
         print(f"Error migrating data: {error_details}")
         return jsonify({'error': str(e), 'details': error_details}), 500
 
-# Temporary migration endpoint for Vercel deployment
-# Remove this after initial database setup
+# Migration endpoint for Vercel deployment - startup already migrates, this reports
+# the state and retries anything a previous start skipped
 @app.route('/migrate', methods=['POST', 'GET'])
 def migrate():
-    """Initialize database tables - run once after deployment"""
+    """Apply pending schema migrations and list the applied ones"""
+    from migrations import run_migrations, applied_migrations
     try:
         with app.app_context():
-            db.create_all()
+            applied_now = run_migrations(db.engine, db.metadata)
             return jsonify({
                 'status': 'success',
-                'message': 'Database tables created successfully',
-                'tables': ['app_idea', 'project', 'task', 'game_plan_step', 'game_plan_step_data', 'user_activity']
+                'message': f'Applied {len(applied_now)} migrations' if applied_now else 'Database is up to date',
+                'applied_now': applied_now,
+                'applied': sorted(applied_migrations(db.engine))
             })
     except Exception as e:
         return jsonify({
@@ -454,71 +1041,123 @@ def migrate():
         }), 500
 
 # App Ideas API
+IDEA_SORTS = ('created_at', 'score')
+# Columns GET /api/app-ideas?facets= can count ideas by
+IDEA_FACETS = ('status', 'mrr_range', 'difficulty', 'competition_level')
+FACET_CACHE_SIZE = 512
+
+def idea_filters(user_id, search='', status='', mrr_range=''):
+    """WHERE criteria for the ideas board filters"""
+    # Authenticated users see their ideas, anonymous users the legacy ones without a user_id
+    criteria = [owned_by(AppIdea.user_id, user_id)]
+    if search:
+        criteria.append(db.or_(
+            AppIdea.name.contains(search),
+            AppIdea.description.contains(search)
+        ))
+    if status:
+        criteria.append(AppIdea.status == status)
+    if mrr_range:
+        criteria.append(AppIdea.mrr_range == mrr_range)
+    return criteria
+
+def list_app_ideas(session, user_id, search='', status='', mrr_range='', sort='created_at'):
+    """Ideas visible to user_id, newest or highest scoring first (shared with the async handler in asgi.py)"""
+    query = session.query(AppIdea).filter(*idea_filters(user_id, search, status, mrr_range))
+    if sort == 'score':
+        return query.order_by(AppIdea.score.desc(), AppIdea.id.desc()).all()
+    return query.order_by(AppIdea.created_at.desc()).all()
+
+def parse_facets(value):
+    """Facet names from a comma-separated ?facets= value"""
+    facets = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = [name for name in facets if name not in IDEA_FACETS]
+    if unknown:
+        raise ValueError(f"Unknown facets: {', '.join(unknown)} (use {', '.join(IDEA_FACETS)})")
+    return list(dict.fromkeys(facets))
+
+_facet_cache = OrderedDict()
+_facet_cache_lock = threading.Lock()
+
+def count_idea_facets(session, user_id, facets, search='', status='', mrr_range=''):
+    """{facet: [{value, count}, ...]} for the ideas matching the board filters, in one grouped query
+
+    PostgreSQL groups by GROUPING SETS; SQLite has no grouping sets, so it
+    runs the same counts as one UNION ALL. Results are cached per user,
+    filters and facets until the sync token moves (every write takes a
+    version, in any process), so a repeat only costs the token lookup.
+    """
+    token = sync_token(session)
+    key = (user_id, tuple(facets), search, status, mrr_range)
+    with _facet_cache_lock:
+        cached = _facet_cache.get(key)
+        if cached and cached[0] == token:
+            _facet_cache.move_to_end(key)
+            return cached[1]
+
+    criteria = idea_filters(user_id, search, status, mrr_range)
+    columns = [getattr(AppIdea, name) for name in facets]
+    counts = {name: [] for name in facets}
+    if session.get_bind().dialect.name == 'postgresql':
+        # GROUPING(column) is 0 in the rows grouped by that column
+        rows = session.execute(
+            db.select(*columns, *[db.func.grouping(column) for column in columns], db.func.count())
+            .where(*criteria).group_by(db.func.grouping_sets(*columns))
+        )
+        for row in rows:
+            values, grouped, count = row[:len(facets)], row[len(facets):-1], row[-1]
+            name_index = list(grouped).index(0)
+            counts[facets[name_index]].append({'value': values[name_index], 'count': count})
+    else:
+        rows = session.execute(db.union_all(*[
+            db.select(db.literal(name).label('facet'), db.cast(column, db.String).label('value'), db.func.count())
+            .where(*criteria).group_by(column)
+            for name, column in zip(facets, columns)
+        ]))
+        for name, value, count in rows:
+            counts[name].append({'value': value, 'count': count})
+    for values in counts.values():
+        values.sort(key=lambda entry: (-entry['count'], entry['value'] is None, entry['value'] or ''))
+
+    with _facet_cache_lock:
+        _facet_cache[key] = (token, counts)
+        _facet_cache.move_to_end(key)
+        while len(_facet_cache) > FACET_CACHE_SIZE:
+            _facet_cache.popitem(last=False)
+    return counts
+
 @app.route('/api/app-ideas', methods=['GET'])
 def get_app_ideas():
-    search = request.args.get('search', '')
-    status = request.args.get('status', '')
-    mrr_range = request.args.get('mrr_range', '')
-    
     # Get current user (optional - for backward compatibility)
     user_id = get_current_user()
+    sort = request.args.get('sort') or 'created_at'
+    if sort not in IDEA_SORTS:
+        return jsonify({'error': f"sort must be one of: {', '.join(IDEA_SORTS)}"}), 400
     
-    query = AppIdea.query
-    
-    # Filter by user if authenticated
-    if user_id:
-        query = query.filter(AppIdea.user_id == user_id)
-    else:
-        # If not authenticated, only show items without user_id (legacy data)
-        query = query.filter(AppIdea.user_id.is_(None))
-    
-    if search:
-        query = query.filter(
-            db.or_(
-                AppIdea.name.contains(search),
-                AppIdea.description.contains(search)
-            )
-        )
-    if status:
-        query = query.filter(AppIdea.status == status)
-    if mrr_range:
-        query = query.filter(AppIdea.mrr_range == mrr_range)
-    
-    ideas = query.order_by(AppIdea.created_at.desc()).all()
-    return jsonify([{
-        'id': idea.id,
-        'name': idea.name,
-        'description': idea.description,
-        'mrr_range': idea.mrr_range,
-        'source_url': idea.source_url,
-        'difficulty': idea.difficulty,
-        'tech_stack': idea.tech_stack,
-        'market_size': idea.market_size,
-        'competition_level': idea.competition_level,
-        'notes': idea.notes,
-        'status': idea.status,
-        'estimated_mrr': idea.estimated_mrr,
-        'revenue_verification_source': idea.revenue_verification_source,
-        'revenue_proof_url': idea.revenue_proof_url,
-        'revenue_confidence': idea.revenue_confidence,
-        'pricing_model': idea.pricing_model,
-        'problem_statement': idea.problem_statement,
-        'target_audience': idea.target_audience,
-        'problem_severity': idea.problem_severity,
-        'value_proposition': idea.value_proposition,
-        'key_benefits': idea.key_benefits,
-        'unique_selling_point': idea.unique_selling_point,
-        'core_features': idea.core_features,
-        'nice_to_have_features': idea.nice_to_have_features,
-        'technical_requirements': idea.technical_requirements,
-        'third_party_integrations': idea.third_party_integrations,
-        'problem_to_solve': idea.problem_to_solve,
-        'competitor_url': idea.competitor_url,
-        'competitor_mrr': idea.competitor_mrr,
-        'validation_notes': idea.validation_notes,
-        'my_angle': idea.my_angle,
-        'created_at': idea.created_at.isoformat() if idea.created_at else None
-    } for idea in ideas])
+    try:
+        facets = parse_facets(request.args.get('facets'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filters = {name: request.args.get(name, '') for name in ('search', 'status', 'mrr_range')}
+    ideas = [serialize_idea(idea) for idea in list_app_ideas(db.session, user_id, sort=sort, **filters)]
+    if not facets:
+        return jsonify(ideas)
+    # With ?facets= the list comes wrapped, next to the counts
+    return jsonify({'ideas': ideas, 'facets': count_idea_facets(db.session, user_id, facets, **filters)})
+
+@app.route('/api/suggest', methods=['GET'])
+def get_suggestions():
+    """Typeahead matches for idea names, project names and competitor URLs - ids and labels only (see suggest.py)"""
+    from suggest import DEFAULT_LIMIT, MAX_LIMIT, suggest
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {MAX_LIMIT}'}), 400
+    query = request.args.get('q', '')
+    return jsonify({'query': query, 'suggestions': suggest(db.session, get_current_user(), query, limit)})
 
 @app.route('/api/app-ideas', methods=['POST'])
 def create_app_idea():
@@ -571,13 +1210,22 @@ def create_app_idea():
             my_angle=clean_value(data.get('my_angle')),
             status=data.get('status', 'Researching')
         )
+        from duplicates import find_similar
+        possible_duplicates = find_similar(db.session, user_id, idea)
+        if possible_duplicates and request.args.get('reject_duplicates', '').lower() in ('1', 'true', 'yes'):
+            return jsonify({'error': 'Possible duplicate idea', 'possible_duplicates': possible_duplicates}), 409
+
         db.session.add(idea)
         db.session.commit()
         
         # Track activity
         track_activity('idea_created', idea_id=idea.id)
         
-        return jsonify({'id': idea.id, 'message': 'App idea created successfully'}), 201
+        return jsonify({
+            'id': idea.id,
+            'message': 'App idea created successfully',
+            'possible_duplicates': possible_duplicates
+        }), 201
     except Exception as e:
         db.session.rollback()
         import traceback
@@ -601,7 +1249,7 @@ def update_app_idea(id):
     data = request.json
     
     for key, value in data.items():
-        if hasattr(idea, key):
+        if key in AppIdea.__table__.columns and key not in IDEA_READ_ONLY_FIELDS:
             setattr(idea, key, value)
     
     idea.updated_at = datetime.utcnow()
@@ -611,17 +1259,141 @@ def update_app_idea(id):
 @app.route('/api/app-ideas/<int:id>', methods=['DELETE'])
 def delete_app_idea(id):
     idea = AppIdea.query.get_or_404(id)
+    from archive import discard_archived_for_idea
+    discard_archived_for_idea(id)
     db.session.delete(idea)
     db.session.commit()
     return jsonify({'message': 'App idea deleted successfully'})
 
-# Projects API
-@app.route('/api/projects', methods=['GET'])
-def get_projects():
-    # Get current user (optional - for backward compatibility)
+@app.route('/api/app-ideas/duplicates', methods=['GET'])
+def get_duplicate_ideas():
+    """Clusters of near-duplicate ideas (see duplicates.py)"""
+    from duplicates import DEFAULT_THRESHOLD, cluster_report
+    try:
+        threshold = float(request.args.get('threshold', DEFAULT_THRESHOLD))
+    except ValueError:
+        return jsonify({'error': 'threshold must be a number'}), 400
+    if not 0 < threshold <= 1:
+        return jsonify({'error': 'threshold must be between 0 and 1'}), 400
+    if wants_async():
+        return accepted('duplicate_report', {'threshold': threshold})
+    return jsonify(cluster_report(db.session, get_current_user(), threshold))
+
+@app.route('/api/app-ideas/scoring-model', methods=['GET'])
+def get_scoring_model():
+    from scoring import DEFAULT_WEIGHTS, get_weights
+    return jsonify({'weights': get_weights(db.session, get_current_user()), 'defaults': DEFAULT_WEIGHTS})
+
+@app.route('/api/app-ideas/scoring-model', methods=['PUT'])
+def update_scoring_model():
+    """Save new weights and rescore the user's ideas (see scoring.py) - in the background with ?async=1"""
+    from scoring import parse_weights, rescore_user
     user_id = get_current_user()
+    try:
+        weights = parse_weights((request.get_json(silent=True) or {}).get('weights', {}))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    model = IdeaScoringModel.query.filter(owned_by(IdeaScoringModel.user_id, user_id)).first()
+    if model is None:
+        model = IdeaScoringModel(user_id=user_id)
+        db.session.add(model)
+    model.weights = json.dumps(weights)
+    db.session.commit()
+    if wants_async():
+        return accepted('rescore_ideas')
+    return jsonify({'weights': weights, 'changed': rescore_user(user_id)})
+
+@app.route('/api/app-ideas/<int:id>/regions', methods=['GET'])
+def rank_idea_regions(id):
+    """Metros or counties ranked by population size, growth and momentum (see regions.py)"""
+    idea = AppIdea.query.get_or_404(id)
+    from market_data import MarketDataError
+    from regions import DEFAULT_LEVEL, DEFAULT_TOP, DEFAULT_WEIGHTS, rank_regions
+    try:
+        result = rank_regions(
+            level=request.args.get('level', DEFAULT_LEVEL),
+            weights={name: request.args.get(name) for name in DEFAULT_WEIGHTS},
+            top=request.args.get('top', DEFAULT_TOP),
+            state=request.args.get('state'),
+            min_population=request.args.get('min_population', 0),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except MarketDataError as e:
+        return jsonify({'error': 'Market data unavailable', 'message': str(e)}), 503
+    return jsonify({'idea_id': idea.id, 'idea_name': idea.name, **result})
+
+@app.route('/api/app-ideas/<int:id>/market-trends', methods=['GET', 'POST'])
+def idea_market_trends(id):
+    """GDP/income growth for a region (see trends.py); POST also appends the summary to the idea's validation notes"""
+    idea = AppIdea.query.get_or_404(id)
+    from market_data import MarketDataError
+    from trends import DEFAULT_MEASURE, evidence
+    params = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
+    try:
+        result = evidence(
+            region=params.get('region', 'US'),
+            measure=params.get('measure', DEFAULT_MEASURE),
+            start=params.get('start'),
+            end=params.get('end'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except MarketDataError as e:
+        return jsonify({'error': 'Market data unavailable', 'message': str(e)}), 503
+
+    if request.method == 'POST':
+        line = f"Market trend: {result['summary']}"
+        if line not in (idea.validation_notes or ''):
+            idea.validation_notes = f"{idea.validation_notes}\n{line}" if idea.validation_notes else line
+            idea.updated_at = datetime.utcnow()
+            db.session.commit()
+    return jsonify({'idea_id': idea.id, 'idea_name': idea.name, **result})
+
+@app.route('/api/app-ideas/import', methods=['POST'])
+def import_app_ideas():
+    """Stream ideas from an uploaded CSV or NDJSON file (multipart 'file' field or raw request body)
+    
+    Query params: format=csv|ndjson, chunk_size=<rows per INSERT>, dedupe=name|source_url
+    """
+    from import_ideas import import_ideas, detect_format, DEFAULT_CHUNK_SIZE
+    
+    upload = request.files.get('file')
+    fmt = request.args.get('format')
+    if not fmt:
+        if upload and upload.filename:
+            fmt = detect_format(upload.filename)
+        else:
+            fmt = 'ndjson' if 'ndjson' in (request.content_type or '') else 'csv'
+    chunk_size = max(1, min(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int), 5000))
+    
+    if wants_async():
+        # The worker reads the upload from disk after this request has finished
+        from jobs import job_file_path
+        path = job_file_path(f'import-{uuid.uuid4().hex}.{fmt}')
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(upload.stream if upload else request.stream, f)
+        return accepted('import_ideas', {'path': path, 'format': fmt, 'chunk_size': chunk_size,
+                                         'dedupe': request.args.get('dedupe') or None})
+    
+    # Wrap the raw byte stream so rows are parsed as they arrive instead of buffering the upload
+    stream = io.TextIOWrapper(upload.stream if upload else request.stream, encoding='utf-8-sig', newline='')
+    try:
+        report = import_ideas(stream, fmt, get_current_user(), chunk_size, request.args.get('dedupe') or None)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing ideas: {e}")
+        return jsonify({'error': 'Import failed', 'message': str(e)}), 500
     
-    query = Project.query
+    return jsonify(report), 200 if report['inserted'] or not report['failed'] else 400
+
+# Projects API
+def list_projects(session, user_id):
+    """Active projects visible to user_id, newest first (shared with the async handler in asgi.py)"""
+    query = session.query(Project)
     
     # Filter by user if authenticated
     if user_id:
@@ -630,19 +1402,19 @@ def get_projects():
         # If not authenticated, only show items without user_id (legacy data)
         query = query.filter(Project.user_id.is_(None))
     
-    projects = query.order_by(Project.created_at.desc()).all()
-    return jsonify([{
-        'id': project.id,
-        'app_idea_id': project.app_idea_id,
-        'name': project.name,
-        'current_stage': project.current_stage,
-        'progress': project.progress,
-        'target_launch_date': project.target_launch_date.isoformat() if project.target_launch_date else None,
-        'actual_launch_date': project.actual_launch_date.isoformat() if project.actual_launch_date else None,
-        'current_mrr': project.current_mrr,
-        'target_mrr': project.target_mrr,
-        'created_at': project.created_at.isoformat() if project.created_at else None
-    } for project in projects])
+    return query.order_by(Project.created_at.desc()).all()
+
+@app.route('/api/projects', methods=['GET'])
+def get_projects():
+    # Get current user (optional - for backward compatibility)
+    user_id = get_current_user()
+    
+    result = [serialize_project(project) for project in list_projects(db.session, user_id)]
+    if include_archived():
+        # Slower path - archived projects are listed after the active ones
+        from archive import archived_projects
+        result += [dict(serialize_project(row), archived=True) for row in archived_projects(user_id)]
+    return jsonify(result)
 
 @app.route('/api/projects', methods=['POST'])
 def create_project():
@@ -650,47 +1422,29 @@ def create_project():
     # Get current user ID
     user_id = get_current_user()
     
-    project = Project(
-        user_id=user_id,
-        app_idea_id=data.get('app_idea_id'),
-        name=data.get('name'),
-        current_stage=data.get('current_stage', 'discovery'),
-        target_launch_date=datetime.strptime(data['target_launch_date'], '%Y-%m-%d').date() if data.get('target_launch_date') else None,
-        target_mrr=data.get('target_mrr')
-    )
+    project = build_project(data, user_id)
     db.session.add(project)
     db.session.commit()
     return jsonify({'id': project.id, 'message': 'Project created successfully'}), 201
 
 @app.route('/api/projects/<int:id>', methods=['GET'])
 def get_project(id):
-    project = Project.query.get_or_404(id)
-    return jsonify({
-        'id': project.id,
-        'app_idea_id': project.app_idea_id,
-        'name': project.name,
-        'current_stage': project.current_stage,
-        'progress': project.progress,
-        'target_launch_date': project.target_launch_date.isoformat() if project.target_launch_date else None,
-        'actual_launch_date': project.actual_launch_date.isoformat() if project.actual_launch_date else None,
-        'current_mrr': project.current_mrr,
-        'target_mrr': project.target_mrr,
-        'created_at': project.created_at.isoformat() if project.created_at else None
-    })
+    project = db.session.get(Project, id)
+    if project is None and include_archived():
+        from archive import archived_project
+        row = archived_project(id)
+        if row:
+            return jsonify(dict(serialize_project(row), archived=True))
+    if project is None:
+        return jsonify({'error': 'Project not found'}), 404
+    return jsonify(serialize_project(project))
 
 @app.route('/api/projects/<int:id>', methods=['PUT'])
 def update_project(id):
     project = Project.query.get_or_404(id)
     data = request.json
     
-    for key, value in data.items():
-        if hasattr(project, key) and key != 'id':
-            if key in ['target_launch_date', 'actual_launch_date'] and value:
-                setattr(project, key, datetime.strptime(value, '%Y-%m-%d').date())
-            else:
-                setattr(project, key, value)
-    
-    project.updated_at = datetime.utcnow()
+    apply_project_changes(project, data)
     db.session.commit()
     return jsonify({'message': 'Project updated successfully'})
 
@@ -698,31 +1452,15 @@ def update_project(id):
 @app.route('/api/projects/<int:project_id>/tasks', methods=['GET'])
 def get_tasks(project_id):
     tasks = Task.query.filter_by(project_id=project_id).order_by(Task.created_at.desc()).all()
-    return jsonify([{
-        'id': task.id,
-        'project_id': task.project_id,
-        'title': task.title,
-        'description': task.description,
-        'stage': task.stage,
-        'status': task.status,
-        'priority': task.priority,
-        'due_date': task.due_date.isoformat() if task.due_date else None,
-        'completed_at': task.completed_at.isoformat() if task.completed_at else None,
-        'created_at': task.created_at.isoformat() if task.created_at else None
-    } for task in tasks])
+    if not tasks and include_archived():
+        from archive import archived_children
+        tasks = archived_children(Task, project_id)
+    return jsonify([serialize_task(task) for task in tasks])
 
 @app.route('/api/projects/<int:project_id>/tasks', methods=['POST'])
 def create_task(project_id):
     data = request.json
-    task = Task(
-        project_id=project_id,
-        title=data.get('title'),
-        description=data.get('description'),
-        stage=data.get('stage'),
-        status=data.get('status', 'todo'),
-        priority=data.get('priority', 'medium'),
-        due_date=datetime.strptime(data['due_date'], '%Y-%m-%d').date() if data.get('due_date') else None
-    )
+    task = build_task(project_id, data)
     db.session.add(task)
     db.session.commit()
     return jsonify({'id': task.id, 'message': 'Task created successfully'}), 201
@@ -732,17 +1470,7 @@ def update_task(id):
     task = Task.query.get_or_404(id)
     data = request.json
     
-    for key, value in data.items():
-        if hasattr(task, key) and key != 'id':
-            if key == 'due_date' and value:
-                setattr(task, key, datetime.strptime(value, '%Y-%m-%d').date())
-            elif key == 'status' and value == 'completed' and not task.completed_at:
-                setattr(task, 'completed_at', datetime.utcnow())
-            elif key == 'status' and value != 'completed':
-                setattr(task, 'completed_at', None)
-            else:
-                setattr(task, key, value)
-    
+    apply_task_changes(task, data)
     db.session.commit()
     return jsonify({'message': 'Task updated successfully'})
 
@@ -757,31 +1485,15 @@ def delete_task(id):
 @app.route('/api/projects/<int:project_id>/game-plan', methods=['GET'])
 def get_game_plan(project_id):
     steps = GamePlanStep.query.filter_by(project_id=project_id).order_by(GamePlanStep.step_number).all()
-    return jsonify([{
-        'id': step.id,
-        'project_id': step.project_id,
-        'step_number': step.step_number,
-        'title': step.title,
-        'description': step.description,
-        'category': step.category,
-        'estimated_hours': step.estimated_hours,
-        'status': step.status,
-        'completed_at': step.completed_at.isoformat() if step.completed_at else None,
-        'created_at': step.created_at.isoformat() if step.created_at else None
-    } for step in steps])
+    if not steps and include_archived():
+        from archive import archived_children
+        steps = archived_children(GamePlanStep, project_id)
+    return jsonify([serialize_step(step) for step in steps])
 
 @app.route('/api/projects/<int:project_id>/game-plan', methods=['POST'])
 def create_game_plan_step(project_id):
     data = request.json
-    step = GamePlanStep(
-        project_id=project_id,
-        step_number=data.get('step_number'),
-        title=data.get('title'),
-        description=data.get('description'),
-        category=data.get('category'),
-        estimated_hours=data.get('estimated_hours'),
-        status=data.get('status', 'pending')
-    )
+    step = build_game_plan_step(project_id, data)
     db.session.add(step)
     db.session.commit()
     return jsonify({'id': step.id, 'message': 'Game plan step created successfully'}), 201
@@ -791,15 +1503,7 @@ def update_game_plan_step(id):
     step = GamePlanStep.query.get_or_404(id)
     data = request.json
     
-    for key, value in data.items():
-        if hasattr(step, key) and key != 'id':
-            if key == 'status' and value == 'completed' and not step.completed_at:
-                setattr(step, 'completed_at', datetime.utcnow())
-            elif key == 'status' and value != 'completed':
-                setattr(step, 'completed_at', None)
-            else:
-                setattr(step, key, value)
-    
+    apply_game_plan_step_changes(step, data)
     db.session.commit()
     return jsonify({'message': 'Game plan step updated successfully'})
 
@@ -817,36 +1521,14 @@ def get_step_data(step_id):
     step_data = GamePlanStepData.query.filter_by(step_id=step_id).first()
     
     if step_data:
-        return jsonify({
-            # Deep Competitive Recon fields
-            'competitors_looked_at': step_data.competitors_looked_at,
-            'where_got_reviews': step_data.where_got_reviews,
-            'pain_point_1': step_data.pain_point_1,
-            'pain_point_2': step_data.pain_point_2,
-            'pain_point_3': step_data.pain_point_3,
-            'my_wedge': step_data.my_wedge,
-            'how_solve_10x_better': step_data.how_solve_10x_better,
-            'confidence_check': step_data.confidence_check,
-            'go_no_go': step_data.go_no_go,
-            # Build Facade Landing Page fields
-            'final_headline_chosen': step_data.final_headline_chosen,
-            'headline_variations': step_data.headline_variations,
-            'subheadline': step_data.subheadline,
-            'wedge_statement': step_data.wedge_statement,
-            'cta_button_text': step_data.cta_button_text,
-            'price_shown': step_data.price_shown,
-            'landing_page_url': step_data.landing_page_url,
-            'visual_proof_url': step_data.visual_proof_url,
-            'launched_status': step_data.launched_status,
-            'launch_note': step_data.launch_note,
-            'updated_at': step_data.updated_at.isoformat() if step_data.updated_at else None
-        })
+        return jsonify(serialize_step_data(step_data))
     else:
         return jsonify({})  # Return empty object if no data exists
 
-def calculate_project_progress(project_id):
+def calculate_project_progress(project_id, session=None):
     """Calculate project progress based on completed game plan steps"""
-    all_steps = GamePlanStep.query.filter_by(project_id=project_id).order_by(GamePlanStep.step_number).all()
+    session = db.session if session is None else session
+    all_steps = session.query(GamePlanStep).filter_by(project_id=project_id).order_by(GamePlanStep.step_number).all()
     if not all_steps:
         return 0
     
@@ -885,114 +1567,122 @@ def calculate_project_progress(project_id):
     
     return min(int(total_progress), 100)  # Cap at 100%
 
+def apply_step_data(session, step, data):
+    """Save a step's form data, update its status and the project's progress, and track the activity
+    
+    Shared by the Flask route below and the async handler in asgi.py; returns the project (or None).
+    The caller commits.
+    """
+    # Get or create step data
+    step_data = session.query(GamePlanStepData).filter_by(step_id=step.id).first()
+    if not step_data:
+        step_data = GamePlanStepData(step_id=step.id)
+        session.add(step_data)
+    
+    # Update all fields (both step types)
+    step_data.competitors_looked_at = data.get('competitors_looked_at', '') or None
+    step_data.where_got_reviews = data.get('where_got_reviews', '') or None
+    step_data.pain_point_1 = data.get('pain_point_1', '') or None
+    step_data.pain_point_2 = data.get('pain_point_2', '') or None
+    step_data.pain_point_3 = data.get('pain_point_3', '') or None
+    step_data.my_wedge = data.get('my_wedge', '') or None
+    step_data.how_solve_10x_better = data.get('how_solve_10x_better', '') or None
+    step_data.confidence_check = data.get('confidence_check')
+    step_data.go_no_go = data.get('go_no_go', '') or None
+    
+    # Landing page fields
+    step_data.final_headline_chosen = data.get('final_headline_chosen', '') or None
+    step_data.headline_variations = data.get('headline_variations', '') or None
+    step_data.subheadline = data.get('subheadline', '') or None
+    step_data.wedge_statement = data.get('wedge_statement', '') or None
+    step_data.cta_button_text = data.get('cta_button_text', '') or None
+    step_data.price_shown = data.get('price_shown')
+    step_data.landing_page_url = data.get('landing_page_url', '') or None
+    step_data.visual_proof_url = data.get('visual_proof_url', '') or None
+    step_data.launched_status = data.get('launched_status', '') or None
+    step_data.launch_note = data.get('launch_note', '') or None
+    
+    # Auto-update step status based on completion
+    # Determine which fields to check based on step title
+    if 'Deep Competitive Recon' in step.title:
+        # Deep Competitive Recon fields (9 total)
+        filled_fields = sum([
+            bool(step_data.competitors_looked_at),
+            bool(step_data.where_got_reviews),
+            bool(step_data.pain_point_1),
+            bool(step_data.pain_point_2),
+            bool(step_data.pain_point_3),
+            bool(step_data.my_wedge),
+            bool(step_data.how_solve_10x_better),
+            bool(step_data.confidence_check is not None),
+            bool(step_data.go_no_go)
+        ])
+        total_fields = 9
+    elif 'Facade Landing Page' in step.title or 'Build Facade' in step.title:
+        # Landing page fields (8 required, launch_note is optional)
+        filled_fields = sum([
+            bool(step_data.final_headline_chosen),
+            bool(step_data.headline_variations),
+            bool(step_data.subheadline),
+            bool(step_data.wedge_statement),
+            bool(step_data.cta_button_text),
+            bool(step_data.landing_page_url),
+            bool(step_data.visual_proof_url),
+            bool(step_data.launched_status)
+            # launch_note is optional, not counted
+        ])
+        total_fields = 8
+    else:
+        # Default: check all fields
+        filled_fields = sum([
+            bool(step_data.competitors_looked_at),
+            bool(step_data.where_got_reviews),
+            bool(step_data.pain_point_1),
+            bool(step_data.pain_point_2),
+            bool(step_data.pain_point_3),
+            bool(step_data.my_wedge),
+            bool(step_data.how_solve_10x_better),
+            bool(step_data.confidence_check is not None),
+            bool(step_data.go_no_go),
+            bool(step_data.final_headline_chosen),
+            bool(step_data.headline_variations),
+            bool(step_data.subheadline),
+            bool(step_data.wedge_statement),
+            bool(step_data.cta_button_text),
+            bool(step_data.landing_page_url),
+            bool(step_data.visual_proof_url),
+            bool(step_data.launched_status)
+        ])
+        total_fields = 17
+    
+    if filled_fields == 0:
+        step.status = 'pending'
+    elif filled_fields < total_fields:
+        step.status = 'in_progress'
+    else:
+        step.status = 'completed'
+        if not step.completed_at:
+            step.completed_at = datetime.utcnow()
+    
+    # Update project progress
+    project = session.get(Project, step.project_id)
+    if project:
+        project.progress = calculate_project_progress(project.id, session)
+    
+    # Track activity for smoke test / outreach actions
+    if 'Deep Competitive Recon' in step.title:
+        track_activity('outreach', project_id=project.id if project else None, notes='Deep Competitive Recon step',
+                       session=session)
+    elif 'Facade Landing Page' in step.title or 'Build Facade' in step.title:
+        track_activity('smoke_test', project_id=project.id if project else None, notes='Landing page step',
+                       session=session)
+    return project
+
 @app.route('/api/game-plan/<int:step_id>/data', methods=['POST', 'PUT'])
 def save_step_data(step_id):
     try:
         step = GamePlanStep.query.get_or_404(step_id)
-        data = request.json
-        
-        # Get or create step data
-        step_data = GamePlanStepData.query.filter_by(step_id=step_id).first()
-        if not step_data:
-            step_data = GamePlanStepData(step_id=step_id)
-            db.session.add(step_data)
-        
-        # Update all fields (both step types)
-        step_data.competitors_looked_at = data.get('competitors_looked_at', '') or None
-        step_data.where_got_reviews = data.get('where_got_reviews', '') or None
-        step_data.pain_point_1 = data.get('pain_point_1', '') or None
-        step_data.pain_point_2 = data.get('pain_point_2', '') or None
-        step_data.pain_point_3 = data.get('pain_point_3', '') or None
-        step_data.my_wedge = data.get('my_wedge', '') or None
-        step_data.how_solve_10x_better = data.get('how_solve_10x_better', '') or None
-        step_data.confidence_check = data.get('confidence_check')
-        step_data.go_no_go = data.get('go_no_go', '') or None
-        
-        # Landing page fields
-        step_data.final_headline_chosen = data.get('final_headline_chosen', '') or None
-        step_data.headline_variations = data.get('headline_variations', '') or None
-        step_data.subheadline = data.get('subheadline', '') or None
-        step_data.wedge_statement = data.get('wedge_statement', '') or None
-        step_data.cta_button_text = data.get('cta_button_text', '') or None
-        step_data.price_shown = data.get('price_shown')
-        step_data.landing_page_url = data.get('landing_page_url', '') or None
-        step_data.visual_proof_url = data.get('visual_proof_url', '') or None
-        step_data.launched_status = data.get('launched_status', '') or None
-        step_data.launch_note = data.get('launch_note', '') or None
-        
-        # Auto-update step status based on completion
-        # Determine which fields to check based on step title
-        if 'Deep Competitive Recon' in step.title:
-            # Deep Competitive Recon fields (9 total)
-            filled_fields = sum([
-                bool(step_data.competitors_looked_at),
-                bool(step_data.where_got_reviews),
-                bool(step_data.pain_point_1),
-                bool(step_data.pain_point_2),
-                bool(step_data.pain_point_3),
-                bool(step_data.my_wedge),
-                bool(step_data.how_solve_10x_better),
-                bool(step_data.confidence_check is not None),
-                bool(step_data.go_no_go)
-            ])
-            total_fields = 9
-        elif 'Facade Landing Page' in step.title or 'Build Facade' in step.title:
-            # Landing page fields (8 required, launch_note is optional)
-            filled_fields = sum([
-                bool(step_data.final_headline_chosen),
-                bool(step_data.headline_variations),
-                bool(step_data.subheadline),
-                bool(step_data.wedge_statement),
-                bool(step_data.cta_button_text),
-                bool(step_data.landing_page_url),
-                bool(step_data.visual_proof_url),
-                bool(step_data.launched_status)
-                # launch_note is optional, not counted
-            ])
-            total_fields = 8
-        else:
-            # Default: check all fields
-            filled_fields = sum([
-                bool(step_data.competitors_looked_at),
-                bool(step_data.where_got_reviews),
-                bool(step_data.pain_point_1),
-                bool(step_data.pain_point_2),
-                bool(step_data.pain_point_3),
-                bool(step_data.my_wedge),
-                bool(step_data.how_solve_10x_better),
-                bool(step_data.confidence_check is not None),
-                bool(step_data.go_no_go),
-                bool(step_data.final_headline_chosen),
-                bool(step_data.headline_variations),
-                bool(step_data.subheadline),
-                bool(step_data.wedge_statement),
-                bool(step_data.cta_button_text),
-                bool(step_data.landing_page_url),
-                bool(step_data.visual_proof_url),
-                bool(step_data.launched_status)
-            ])
-            total_fields = 17
-        
-        if filled_fields == 0:
-            step.status = 'pending'
-        elif filled_fields < total_fields:
-            step.status = 'in_progress'
-        else:
-            step.status = 'completed'
-            if not step.completed_at:
-                step.completed_at = datetime.utcnow()
-        
-        # Update project progress
-        project = Project.query.get(step.project_id)
-        if project:
-            project.progress = calculate_project_progress(project.id)
-        
-        # Track activity for smoke test / outreach actions
-        if 'Deep Competitive Recon' in step.title:
-            track_activity('outreach', project_id=project.id if project else None, notes='Deep Competitive Recon step')
-        elif 'Facade Landing Page' in step.title or 'Build Facade' in step.title:
-            track_activity('smoke_test', project_id=project.id if project else None, notes='Landing page step')
-        
+        project = apply_step_data(db.session, step, request.json)
         db.session.commit()
         return jsonify({
             'message': 'Step data saved successfully', 
@@ -1005,11 +1695,25 @@ def save_step_data(step_id):
 
 @app.route('/api/projects/<int:project_id>/generate-game-plan', methods=['POST'])
 def generate_game_plan(project_id):
-    """Generate Lean AI-Solo Blueprint game plan"""
+    """Generate Lean AI-Solo Blueprint game plan (queued as a job with ?async=1)"""
     project = Project.query.get_or_404(project_id)
-    app_idea = AppIdea.query.get_or_404(project.app_idea_id)
+    AppIdea.query.get_or_404(project.app_idea_id)
+    
+    if wants_async():
+        return accepted('generate_game_plan', {'project_id': project_id})
+    build_game_plan(project)
+    return jsonify({'message': 'Lean AI-Solo Blueprint game plan generated successfully'}), 201
+
+def build_game_plan(project):
+    """Replace a project's game plan with the default steps and commit; returns the step count"""
+    project_id = project.id
     
     # Delete existing game plan steps
+    # Step data goes with the steps through ON DELETE CASCADE
+    version = next_sync_version()
+    step_ids = db.select(GamePlanStep.id).where(GamePlanStep.project_id == project_id).scalar_subquery()
+    record_bulk_tombstones(GamePlanStepData, [GamePlanStepData.step_id.in_(step_ids)], project.user_id, version)
+    record_bulk_tombstones(GamePlanStep, [GamePlanStep.project_id == project_id], project.user_id, version)
     GamePlanStep.query.filter_by(project_id=project_id).delete()
     
     # Lean AI-Solo Blueprint Steps
@@ -1092,7 +1796,7 @@ def generate_game_plan(project_id):
         db.session.add(step)
     
     db.session.commit()
-    return jsonify({'message': 'Lean AI-Solo Blueprint game plan generated successfully'}), 201
+    return len(default_steps)
 
 # Promote Idea to Project
 @app.route('/api/app-ideas/<int:id>/promote', methods=['POST'])
@@ -1147,7 +1851,17 @@ def kill_project(id):
 # Revive Project (bring back from killed)
 @app.route('/api/projects/<int:id>/revive', methods=['POST'])
 def revive_project(id):
-    project = Project.query.get_or_404(id)
+    project = db.session.get(Project, id)
+    if project is None:
+        # Killed projects may have been moved to cold storage - bring them back first
+        from archive import restore_project, ArchiveError
+        try:
+            if not restore_project(id):
+                return jsonify({'error': 'Project not found'}), 404
+        except ArchiveError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 409
+        project = db.session.get(Project, id)
     project.current_stage = 'smoketest'  # Start over from validation
     
     # Update linked idea status
@@ -1162,35 +1876,42 @@ def revive_project(id):
 # Delete Project
 @app.route('/api/projects/<int:id>', methods=['DELETE'])
 def delete_project(id):
-    project = Project.query.get_or_404(id)
-    
-    # Delete associated game plan steps
-    GamePlanStep.query.filter_by(project_id=id).delete()
-    
-    # Delete associated tasks
-    Task.query.filter_by(project_id=id).delete()
-    
-    # Update linked idea status back to Researching
-    if project.app_idea_id:
-        idea = AppIdea.query.get(project.app_idea_id)
+    project = db.session.get(Project, id)
+    if project is None:
+        from archive import archived_project, discard_archived_project
+        row = archived_project(id)
+        if row is None:
+            return jsonify({'error': 'Project not found'}), 404
+        idea = db.session.get(AppIdea, row.app_idea_id)
         if idea:
             idea.status = 'Researching'
-    
-    db.session.delete(project)
+        discard_archived_project(id)
+        db.session.commit()
+        return jsonify({'message': 'Project deleted successfully. Idea can be promoted again.'})
+    remove_project(project)
     db.session.commit()
     return jsonify({'message': 'Project deleted successfully. Idea can be promoted again.'})
 
 # Dashboard Stats
-@app.route('/api/dashboard/stats')
-def get_dashboard_stats():
-    total_ideas = AppIdea.query.count()
+def dashboard_stats(session):
+    """Dashboard numbers as a dict (shared with the async handler in asgi.py)"""
+    total_ideas = session.query(AppIdea).count()
     # Exclude killed projects from active count
-    active_projects = Project.query.filter(
+    active_projects = session.query(Project).filter(
         Project.current_stage.notin_(['live', 'killed'])
     ).count()
-    live_projects = Project.query.filter_by(current_stage='live').count()
-    killed_projects = Project.query.filter_by(current_stage='killed').count()
-    total_mrr = db.session.query(db.func.sum(Project.current_mrr)).scalar() or 0
+    live_projects = session.query(Project).filter_by(current_stage='live').count()
+    killed_projects = session.query(Project).filter_by(current_stage='killed').count()
+    total_mrr = session.query(db.func.sum(Project.current_mrr)).scalar() or 0
+    
+    # Archived projects still count towards the killed total and MRR
+    archived = ARCHIVE_TABLES[Project]
+    archived_killed, archived_mrr = session.execute(db.select(
+        db.func.count().filter(archived.c.current_stage == 'killed'),
+        db.func.sum(archived.c.current_mrr)
+    )).one()
+    killed_projects += archived_killed
+    total_mrr += archived_mrr or 0
     
     # Calculate new metrics
     today = date.today()
@@ -1200,7 +1921,7 @@ def get_dashboard_stats():
     days_elapsed = (today - year_start).days + 1 if today >= year_start else 0
     
     # Consistency Score: Days Active / Days in Year (2026)
-    unique_active_days = db.session.query(
+    unique_active_days = session.query(
         db.func.distinct(UserActivity.action_date)
     ).filter(
         UserActivity.action_date >= year_start,
@@ -1213,7 +1934,7 @@ def get_dashboard_stats():
     current_streak = 0
     check_date = today
     while True:
-        day_has_action = UserActivity.query.filter_by(action_date=check_date).first() is not None
+        day_has_action = session.query(UserActivity).filter_by(action_date=check_date).first() is not None
         if day_has_action:
             current_streak += 1
             check_date -= timedelta(days=1)
@@ -1221,7 +1942,7 @@ def get_dashboard_stats():
             break
     
     # Stage Velocity: Average days an idea stays in "Smoke Test" stage
-    smoketest_projects = Project.query.filter_by(current_stage='smoketest').all()
+    smoketest_projects = session.query(Project).filter_by(current_stage='smoketest').all()
     stage_velocity = 0
     if smoketest_projects:
         total_days_in_smoketest = 0
@@ -1234,13 +1955,13 @@ def get_dashboard_stats():
     
     # Validation Activity: Number of "Outreach" or "Smoke Test" actions this week
     week_start = today - timedelta(days=today.weekday())
-    validation_actions = UserActivity.query.filter(
+    validation_actions = session.query(UserActivity).filter(
         UserActivity.action_type.in_(['outreach', 'smoke_test']),
         UserActivity.action_date >= week_start,
         UserActivity.action_date <= today
     ).count()
     
-    return jsonify({
+    return {
         'total_ideas': total_ideas,
         'active_projects': active_projects,
         'live_projects': live_projects,
@@ -1252,6 +1973,369 @@ def get_dashboard_stats():
         'current_streak': current_streak,
         'stage_velocity': stage_velocity,
         'validation_activity': validation_actions
+    }
+
+@app.route('/api/dashboard/stats')
+def get_dashboard_stats():
+    if wants_async():
+        return accepted('dashboard_stats')
+    return jsonify(dashboard_stats(db.session))
+
+# Batch API
+MAX_BATCH_OPERATIONS = 1000
+
+BATCH_ENTITIES = {
+    'task': Task,
+    'step': GamePlanStep,
+    'project': Project,
+}
+
+BATCH_UPDATE_FIELDS = {
+    'task': TASK_FIELDS,
+    'step': GAME_PLAN_STEP_FIELDS,
+    'project': PROJECT_FIELDS,
+}
+
+class BatchOperationError(Exception):
+    """Raised when a single batch operation is invalid"""
+
+# Shown instead of the database's message (which carries SQL and parameters)
+BATCH_INTEGRITY_ERROR = 'A referenced row does not exist or the change conflicts with existing data'
+
+def reference_id(value):
+    """A parent id from a batch operation as an int, or None if it isn't one"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def apply_batch_operation(op, rows, user_id, parents):
+    """Stage one create/update/delete in the session and return the affected row
+
+    rows holds the caller's rows to update or delete by entity, parents the ids of
+    the caller's ideas ('app_idea') and projects ('project') that creates may reference.
+    """
+    action = op.get('op')
+    entity = op.get('entity')
+    if entity not in BATCH_ENTITIES:
+        raise BatchOperationError(f"Unknown entity '{entity}' (expected task, step or project)")
+    data = op.get('data') or {}
+    if not isinstance(data, dict):
+        raise BatchOperationError('data must be an object')
+    if any(isinstance(value, (dict, list)) for value in data.values()):
+        raise BatchOperationError('data values must be strings, numbers, booleans or null')
+    
+    if action == 'create':
+        if entity == 'project':
+            if not data.get('name') or not data.get('app_idea_id'):
+                raise BatchOperationError('Project name and app_idea_id are required')
+            if reference_id(data.get('app_idea_id')) not in parents['app_idea']:
+                raise BatchOperationError(f"app idea {data.get('app_idea_id')} not found")
+            row = build_project(data, user_id)
+        else:
+            project_id = op.get('project_id') or data.get('project_id')
+            if not project_id:
+                raise BatchOperationError('project_id is required')
+            project = rows['project'].get(reference_id(project_id))
+            if reference_id(project_id) not in parents['project'] or (project is not None and project in db.session.deleted):
+                raise BatchOperationError(f"project {project_id} not found")
+            if entity == 'task':
+                if not data.get('title'):
+                    raise BatchOperationError('Task title is required')
+                row = build_task(project_id, data)
+            else:
+                if not data.get('title') or data.get('step_number') is None:
+                    raise BatchOperationError('Step title and step_number are required')
+                row = build_game_plan_step(project_id, data)
+        db.session.add(row)
+        return row
+    
+    if action not in ('update', 'delete'):
+        raise BatchOperationError(f"Unknown op '{action}' (expected create, update or delete)")
+    
+    row_id = op.get('id')
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise BatchOperationError('id must be an integer')
+    row = rows[entity].get(row_id)
+    if row is None or row in db.session.deleted or db.inspect(row).was_deleted:
+        raise BatchOperationError(f"{entity} {op.get('id')} not found")
+    
+    if action == 'update':
+        # Owners and parents stay as they are - moving a row would need the new parent checked too
+        fixed = sorted(set(data) - BATCH_UPDATE_FIELDS[entity])
+        if fixed:
+            raise BatchOperationError(f"{entity} fields cannot be updated: {', '.join(fixed)}")
+        if entity == 'task':
+            apply_task_changes(row, data)
+        elif entity == 'step':
+            apply_game_plan_step_changes(row, data)
+        else:
+            apply_project_changes(row, data)
+    elif entity == 'project':
+        remove_project(row)
+    else:
+        db.session.delete(row)
+    return row
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """Apply an ordered list of task, step and project mutations in one transaction
+    
+    Body: {"mode": "atomic" | "best_effort", "operations": [
+        {"op": "create", "entity": "task", "project_id": 1, "data": {...}},
+        {"op": "update", "entity": "step", "id": 7, "data": {"status": "completed"}},
+        {"op": "delete", "entity": "task", "id": 9}
+    ]}
+    
+    atomic (default) commits everything or nothing; best_effort runs each
+    operation in a savepoint and commits the ones that succeed.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object with an operations list'}), 400
+    operations = data.get('operations')
+    mode = data.get('mode', 'atomic')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'A batch can contain at most {MAX_BATCH_OPERATIONS} operations'}), 400
+    if mode not in ('atomic', 'best_effort'):
+        return jsonify({'error': "mode must be 'atomic' or 'best_effort'"}), 400
+    
+    user_id = get_current_user()
+    
+    # Load every row the batch updates or deletes with one IN query per entity - only the
+    # caller's own, so anyone else's ids come back as "not found"
+    rows = {}
+    for entity, model in BATCH_ENTITIES.items():
+        ids = {op.get('id') for op in operations
+               if isinstance(op, dict) and op.get('entity') == entity and op.get('op') in ('update', 'delete')
+               and isinstance(op.get('id'), int) and not isinstance(op.get('id'), bool)}
+        rows[entity] = {row.id: row for row in owned_rows_query(model, user_id).filter(model.id.in_(ids))} if ids else {}
+    
+    # Check the ideas and projects that creates point at the same way, before anything is flushed
+    referenced = {'app_idea': set(), 'project': set()}
+    for op in operations:
+        if not isinstance(op, dict) or op.get('op') != 'create':
+            continue
+        data = op.get('data') if isinstance(op.get('data'), dict) else {}
+        if op.get('entity') == 'project':
+            referenced['app_idea'].add(reference_id(data.get('app_idea_id')))
+        elif op.get('entity') in ('task', 'step'):
+            referenced['project'].add(reference_id(op.get('project_id') or data.get('project_id')))
+    parents = {}
+    for name, model in (('app_idea', AppIdea), ('project', Project)):
+        ids = referenced[name] - {None}
+        parents[name] = {row_id for (row_id,) in owned_rows_query(model, user_id).filter(model.id.in_(ids)).with_entities(model.id)} if ids else set()
+    
+    def result(index, op, status, row=None, error=None):
+        entry = {'index': index, 'op': op.get('op'), 'entity': op.get('entity'), 'status': status}
+        if row is not None:
+            entry['id'] = row.id
+        if error:
+            entry['error'] = error
+        return entry
+    
+    if mode == 'atomic':
+        staged = []
+        try:
+            # Stage everything first so the flush can batch INSERT/UPDATE/DELETE statements
+            with db.session.no_autoflush:
+                for index, op in enumerate(operations):
+                    if not isinstance(op, dict):
+                        raise BatchOperationError('Each operation must be an object')
+                    staged.append((index, op, apply_batch_operation(op, rows, user_id, parents)))
+            db.session.flush()
+            results = [result(index, op, 'ok', row) for index, op, row in staged]
+            db.session.commit()
+        except (BatchOperationError, ValueError, IntegrityError) as e:
+            db.session.rollback()
+            error = BATCH_INTEGRITY_ERROR if isinstance(e, IntegrityError) else str(e)
+            failed = len(staged)
+            results = [result(index, op, 'rolled_back') for index, op, _ in staged]
+            if failed == len(operations):
+                # Every operation was staged - the flush failed, and it can't say which one caused it
+                return jsonify({'mode': mode, 'committed': False, 'error': error, 'results': results}), 400
+            results.append(result(failed, operations[failed] if isinstance(operations[failed], dict) else {}, 'error', error=error))
+            results += [result(index, op if isinstance(op, dict) else {}, 'skipped')
+                        for index, op in enumerate(operations) if index > failed]
+            return jsonify({'mode': mode, 'committed': False, 'results': results}), 400
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error running batch: {e}")
+            return jsonify({'mode': mode, 'committed': False, 'error': str(e)}), 500
+        return jsonify({'mode': mode, 'committed': True, 'results': results})
+    
+    results = []
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            results.append(result(index, {}, 'error', error='Each operation must be an object'))
+            continue
+        try:
+            with db.session.begin_nested():
+                row = apply_batch_operation(op, rows, user_id, parents)
+            results.append(result(index, op, 'ok', row))
+        except IntegrityError:
+            results.append(result(index, op, 'error', error=BATCH_INTEGRITY_ERROR))
+        except Exception as e:
+            results.append(result(index, op, 'error', error=str(e)))
+    db.session.commit()
+    failed = sum(1 for entry in results if entry['status'] == 'error')
+    return jsonify({
+        'mode': mode,
+        'committed': True,
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'results': results
+    })
+
+# Export API
+@app.route('/api/export', methods=['GET'])
+def export_user_data():
+    """Stream all of the current user's data as NDJSON (default) or CSV"""
+    from export_data import generate_export, EXPORT_FORMATS
+    
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+    
+    if wants_async():
+        # Written to a file by the worker; fetch it from /api/jobs/<id>/download
+        return accepted('export', {'format': fmt})
+    
+    user_id = get_current_user()
+    filename = f"workflow-export-{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    # No Content-Length, so the WSGI server sends it chunked as the generator yields
+    return Response(
+        stream_with_context(generate_export(user_id, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+# Background Jobs API
+def visible_job(job_id):
+    """The job if the current user queued it (system jobs are never visible), else None"""
+    from jobs import get_job, is_user_job
+    job = get_job(job_id)
+    if job is None or not is_user_job(job['kind']) or job['user_id'] != get_current_user():
+        return None
+    return job
+
+@app.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    """The current user's recent jobs, newest first (?status=queued|running|succeeded|failed)"""
+    from jobs import list_jobs, serialize_job
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    jobs = list_jobs(get_current_user(), request.args.get('status') or None, limit)
+    return jsonify([serialize_job(job) for job in jobs])
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Status, progress and (once finished) result or error of a queued job"""
+    from jobs import serialize_job
+    job = visible_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(serialize_job(job))
+
+@app.route('/api/jobs/<int:job_id>/download', methods=['GET'])
+def download_job_file(job_id):
+    """The file a finished export job wrote"""
+    from jobs import job_file_path
+    from export_data import EXPORT_FORMATS
+    job = visible_job(job_id)
+    if job is None or job['kind'] != 'export':
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'succeeded':
+        return jsonify({'error': 'Export is not ready', 'status': job['status']}), 409
+    result = json.loads(job['result'])
+    path = job_file_path(result['file'])
+    if not os.path.exists(path):
+        return jsonify({'error': 'Export file has been purged'}), 410
+    filename = f"workflow-export-{job['finished_at'].strftime('%Y%m%d_%H%M%S')}.{result['format']}"
+    return send_file(path, mimetype=EXPORT_FORMATS[result['format']], as_attachment=True, download_name=filename)
+
+# Incremental Sync API
+def owned_by(column, user_id):
+    """Filter rows by owner - authenticated users see their rows, anonymous users see legacy data"""
+    return column == user_id if user_id else column.is_(None)
+
+def owned_rows_query(model, user_id):
+    """Query rows of a synced model that belong to user_id, joining children through their project"""
+    if model in (AppIdea, Project, UserActivity):
+        return model.query.filter(owned_by(model.user_id, user_id))
+    if model in (Task, GamePlanStep):
+        return model.query.join(Project).filter(owned_by(Project.user_id, user_id))
+    if model is GamePlanStepData:
+        return model.query.join(GamePlanStep).join(Project).filter(owned_by(Project.user_id, user_id))
+    raise ValueError(f"{model.__name__} is not a synced model")
+
+@app.route('/api/sync', methods=['GET'])
+def get_sync_changes():
+    """Return rows changed since the client's token plus tombstones for deleted rows
+    
+    Tombstones are {id, version}. SQLite can give a deleted row's id to a new row
+    (and restoring an archived project brings ids back), so a tombstone older than
+    a row returned in the same delta is dropped - the row is the current state.
+    
+    Pass the returned token back as ?since=<token> on the next call. Omitting it
+    (or since=0) returns a full snapshot to seed a fresh local replica.
+    """
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({'error': 'Invalid sync token'}), 400
+    since = int(since)
+    
+    user_id = get_current_user()
+    
+    # Read the high-water mark first so rows committed while we query land in the next delta,
+    # capped below any version still in flight (see sync_token)
+    token = sync_token()
+    
+    def changed(query, model):
+        if since:
+            return query.filter(model.version > since, model.version <= token)
+        # Full snapshot - include rows written before versioning existed
+        return query.filter(db.or_(model.version.is_(None), model.version <= token))
+    
+    ideas = changed(owned_rows_query(AppIdea, user_id), AppIdea)
+    projects = changed(owned_rows_query(Project, user_id), Project)
+    tasks = changed(owned_rows_query(Task, user_id), Task)
+    steps = changed(owned_rows_query(GamePlanStep, user_id), GamePlanStep)
+    step_data = changed(owned_rows_query(GamePlanStepData, user_id), GamePlanStepData)
+    activities = changed(owned_rows_query(UserActivity, user_id), UserActivity)
+    
+    def with_keys(row, serialized, **keys):
+        return dict(serialized, version=row.version, **keys)
+    
+    changes = {
+        'ideas': [with_keys(i, serialize_idea(i), updated_at=i.updated_at.isoformat() if i.updated_at else None) for i in ideas],
+        'projects': [with_keys(p, serialize_project(p), updated_at=p.updated_at.isoformat() if p.updated_at else None) for p in projects],
+        'tasks': [with_keys(t, serialize_task(t)) for t in tasks],
+        'steps': [with_keys(s, serialize_step(s)) for s in steps],
+        'step_data': [with_keys(d, serialize_step_data(d), id=d.id, step_id=d.step_id) for d in step_data],
+        'activities': [with_keys(a, serialize_activity(a)) for a in activities]
+    }
+    
+    # A fresh replica has nothing to delete, so tombstones only matter for deltas
+    deleted = {name: [] for name in SYNC_ENTITIES.values()}
+    live = {(name, row['id']): row['version'] or 0 for name, rows in changes.items() for row in rows}
+    if since:
+        tombstones = SyncTombstone.query.filter(
+            owned_by(SyncTombstone.user_id, user_id),
+            SyncTombstone.version > since,
+            SyncTombstone.version <= token
+        ).order_by(SyncTombstone.version)
+        for tombstone in tombstones:
+            if live.get((tombstone.entity, tombstone.entity_id), 0) > tombstone.version:
+                continue
+            deleted[tombstone.entity].append({'id': tombstone.entity_id, 'version': tombstone.version})
+    
+    return jsonify({
+        'token': str(token),
+        'full': not since,
+        'changes': changes,
+        'deleted': deleted
     })
 
 if __name__ == '__main__':
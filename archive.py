@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Project Archive
+
+Moves killed and long-inactive projects - with their game plan steps, step
+data and tasks - out of the hot tables into the archive_* tables, so list and
+stats queries stop scanning them. Each batch of projects is copied with
+INSERT ... SELECT and removed with one cascading DELETE in the same
+transaction, so a project is always either fully live or fully archived.
+
+Activities are never archived (they feed the streak and consistency metrics);
+they keep their date and type but lose the link to an archived project.
+
+Reviving an archived project (POST /api/projects/<id>/revive) moves it back.
+Listing endpoints include archived rows with ?include_archived=1.
+
+Usage:
+    python archive.py                        # killed projects untouched for 30 days
+    python archive.py --killed-days 0        # every killed project
+    python archive.py --inactive-days 180    # also projects with no changes in 180 days
+    python archive.py --dry-run
+    python archive.py restore 42             # bring project 42 back
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+DEFAULT_KILLED_DAYS = 30
+DEFAULT_BATCH_SIZE = 200  # Projects moved per transaction
+
+class ArchiveError(Exception):
+    """Raised when an archived project cannot be restored"""
+
+def archivable_projects_query(killed_days=DEFAULT_KILLED_DAYS, inactive_days=None):
+    """Select the ids of projects due for the archive, oldest first"""
+    from app import db, Project, Task, GamePlanStep, GamePlanStepData
+
+    now = datetime.utcnow()
+    last_change = db.func.coalesce(Project.updated_at, Project.created_at)
+    conditions = [db.and_(Project.current_stage == 'killed', last_change <= now - timedelta(days=killed_days))]
+
+    if inactive_days is not None:
+        cutoff = now - timedelta(days=inactive_days)
+        recent_task = db.select(Task.id).where(
+            Task.project_id == Project.id,
+            db.func.coalesce(Task.completed_at, Task.created_at) > cutoff
+        ).exists()
+        recent_step = db.select(GamePlanStep.id).where(
+            GamePlanStep.project_id == Project.id,
+            db.func.coalesce(GamePlanStep.completed_at, GamePlanStep.created_at) > cutoff
+        ).exists()
+        recent_step_data = db.select(GamePlanStepData.id).join(GamePlanStep).where(
+            GamePlanStep.project_id == Project.id,
+            GamePlanStepData.updated_at > cutoff
+        ).exists()
+        conditions.append(db.and_(
+            Project.current_stage != 'live',
+            last_change <= cutoff,
+            ~recent_task, ~recent_step, ~recent_step_data
+        ))
+
+    return db.select(Project.id).where(db.or_(*conditions)).order_by(Project.id)
+
+def hot_criteria(project_ids):
+    """Row filters for each hot table, selecting everything under project_ids"""
+    from app import db, Project, Task, GamePlanStep, GamePlanStepData
+
+    step_ids = (
+        db.select(GamePlanStep.id).where(GamePlanStep.project_id.in_(project_ids)).correlate(None).scalar_subquery()
+    )
+    return {
+        Project: [Project.id.in_(project_ids)],
+        GamePlanStep: [GamePlanStep.project_id.in_(project_ids)],
+        GamePlanStepData: [GamePlanStepData.step_id.in_(step_ids)],
+        Task: [Task.project_id.in_(project_ids)],
+    }
+
+def archive_criteria(project_id):
+    """Row filters for each archive table, selecting one archived project and its children"""
+    from app import db, ARCHIVE_TABLES, Project, Task, GamePlanStep, GamePlanStepData
+
+    projects, steps = ARCHIVE_TABLES[Project], ARCHIVE_TABLES[GamePlanStep]
+    step_ids = db.select(steps.c.id).where(steps.c.project_id == project_id).scalar_subquery()
+    return {
+        Project: [projects.c.id == project_id],
+        GamePlanStep: [steps.c.project_id == project_id],
+        GamePlanStepData: [ARCHIVE_TABLES[GamePlanStepData].c.step_id.in_(step_ids)],
+        Task: [ARCHIVE_TABLES[Task].c.project_id == project_id],
+    }
+
+def archive_batch(project_ids):
+    """Move projects and all their children into the archive tables; returns rows moved per table
+
+    Runs in the caller's transaction - commit afterwards.
+    """
+    from app import (db, ARCHIVE_TABLES, Project, Task, GamePlanStep, GamePlanStepData, UserActivity,
+                     next_sync_version, record_bulk_tombstones)
+    from suggest import queue_change
+
+    criteria = hot_criteria(project_ids)
+    # Tombstones carry the owning project's user_id, so every entity joins back to its project
+    owner_joins = {
+        Project: [],
+        GamePlanStep: [Project.id == GamePlanStep.project_id],
+        GamePlanStepData: [GamePlanStep.id == GamePlanStepData.step_id, Project.id == GamePlanStep.project_id],
+        Task: [Project.id == Task.project_id],
+    }
+    version = next_sync_version()
+    archived_at = db.literal(datetime.utcnow(), db.DateTime)
+
+    moved = {}
+    for model, archive_table in ARCHIVE_TABLES.items():
+        columns = list(model.__table__.columns)
+        rows = db.select(*columns, archived_at).where(*criteria[model])
+        result = db.session.execute(archive_table.insert().from_select(
+            [column.name for column in columns] + ['archived_at'], rows
+        ))
+        moved[archive_table.name] = result.rowcount
+        # Archived rows leave the synced tables, so replicas should drop them too
+        record_bulk_tombstones(model, criteria[model] + owner_joins[model], Project.user_id, version)
+
+    db.session.execute(
+        db.update(UserActivity).where(UserActivity.project_id.in_(project_ids)).values(version=version)
+        .execution_options(synchronize_session=False)
+    )
+    # The bulk delete bypasses the ORM, so take the projects out of the typeahead indexes by hand
+    for project_id, user_id in db.session.execute(
+        db.select(Project.id, Project.user_id).where(Project.id.in_(project_ids))
+    ):
+        queue_change(db.session, user_id, 'project', project_id, None)
+    # ON DELETE CASCADE takes the steps, step data and tasks with each project
+    db.session.execute(
+        db.delete(Project).where(Project.id.in_(project_ids)).execution_options(synchronize_session=False)
+    )
+    return moved
+
+def archive_projects(killed_days=DEFAULT_KILLED_DAYS, inactive_days=None, batch_size=DEFAULT_BATCH_SIZE,
+                     dry_run=False, progress=None):
+    """Archive every due project in batches that each commit on their own; returns a summary
+
+    Must run inside an app context. progress(summary) is called after each batch.
+    """
+    from app import db
+
+    query = archivable_projects_query(killed_days, inactive_days)
+    summary = {'projects': 0, 'rows': {}}
+    if dry_run:
+        summary['projects'] = db.session.execute(
+            db.select(db.func.count()).select_from(query.order_by(None).subquery())
+        ).scalar()
+        return summary
+
+    while True:
+        project_ids = db.session.execute(query.limit(batch_size)).scalars().all()
+        if not project_ids:
+            break
+        try:
+            moved = archive_batch(project_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        summary['projects'] += len(project_ids)
+        for table, count in moved.items():
+            summary['rows'][table] = summary['rows'].get(table, 0) + count
+        if progress:
+            progress(summary)
+        if len(project_ids) < batch_size:
+            break
+    return summary
+
+def restore_project(project_id):
+    """Move an archived project and its children back into the hot tables
+
+    Returns False if the project is not archived, and raises ArchiveError if
+    it can't come back (its idea is gone, or its ids were reused). Runs in the
+    caller's transaction - commit afterwards.
+    """
+    from app import db, ARCHIVE_TABLES, AppIdea, Project, next_sync_version
+    from suggest import queue_change
+
+    archived = ARCHIVE_TABLES[Project]
+    row = db.session.execute(db.select(archived).where(archived.c.id == project_id)).first()
+    if row is None:
+        return False
+    if db.session.get(AppIdea, row.app_idea_id) is None:
+        raise ArchiveError(f'The idea for archived project {project_id} no longer exists')
+
+    criteria = archive_criteria(project_id)
+    # SQLite reuses the highest freed id, so a new row may have taken an archived row's id since
+    for model, archive_table in ARCHIVE_TABLES.items():
+        archived_ids = db.select(archive_table.c.id).where(*criteria[model])
+        if db.session.execute(db.select(model.id).where(model.id.in_(archived_ids)).limit(1)).first():
+            raise ArchiveError(f'Archived project {project_id} cannot be restored: '
+                               f'its {model.__tablename__} ids are now used by other rows')
+
+    version = next_sync_version()
+    for model, archive_table in ARCHIVE_TABLES.items():
+        names = [column.name for column in model.__table__.columns]
+        # Restored rows get a fresh version so sync clients pull them back in
+        columns = [db.literal(version).label(name) if name == 'version' else archive_table.c[name] for name in names]
+        db.session.execute(model.__table__.insert().from_select(
+            names, db.select(*columns).where(*criteria[model])
+        ))
+    discard_archived_project(project_id, criteria)
+    queue_change(db.session, row.user_id, 'project', project_id, row.name)
+    return True
+
+def discard_archived_project(project_id, criteria=None):
+    """Permanently delete an archived project and its children; returns False if it was not archived"""
+    from app import db, ARCHIVE_TABLES
+
+    criteria = criteria or archive_criteria(project_id)
+    # Children first - the step data filter reads the archived steps
+    deleted = 0
+    for model, archive_table in reversed(list(ARCHIVE_TABLES.items())):
+        deleted += db.session.execute(archive_table.delete().where(*criteria[model])).rowcount
+    return deleted > 0
+
+def discard_archived_for_idea(idea_id):
+    """Delete the archived projects of an idea that is being deleted (the archive has no cascades)"""
+    from app import db, ARCHIVE_TABLES, Project
+
+    archived = ARCHIVE_TABLES[Project]
+    project_ids = db.session.execute(
+        db.select(archived.c.id).where(archived.c.app_idea_id == idea_id)
+    ).scalars().all()
+    for project_id in project_ids:
+        discard_archived_project(project_id)
+    return len(project_ids)
+
+def archived_projects(user_id):
+    """Archived project rows owned by user_id (legacy rows when None), newest first"""
+    from app import db, ARCHIVE_TABLES, Project, owned_by
+
+    archived = ARCHIVE_TABLES[Project]
+    return db.session.execute(
+        db.select(archived).where(owned_by(archived.c.user_id, user_id)).order_by(archived.c.created_at.desc())
+    ).all()
+
+def archived_project(project_id):
+    from app import db, ARCHIVE_TABLES, Project
+
+    archived = ARCHIVE_TABLES[Project]
+    return db.session.execute(db.select(archived).where(archived.c.id == project_id)).first()
+
+def archived_children(model, project_id):
+    """Archived tasks or game plan steps of one project"""
+    from app import db, ARCHIVE_TABLES, GamePlanStep
+
+    archive_table = ARCHIVE_TABLES[model]
+    order = archive_table.c.step_number if model is GamePlanStep else archive_table.c.created_at.desc()
+    return db.session.execute(
+        db.select(archive_table).where(archive_table.c.project_id == project_id).order_by(order)
+    ).all()
+
+def main():
+    parser = argparse.ArgumentParser(description='Move killed and inactive projects into the archive tables')
+    subcommands = parser.add_subparsers(dest='command')
+    restore = subcommands.add_parser('restore', help='Move an archived project back')
+    restore.add_argument('project_id', type=int)
+    parser.add_argument('--killed-days', type=int, default=DEFAULT_KILLED_DAYS,
+                        help='Archive killed projects unchanged for this many days')
+    parser.add_argument('--inactive-days', type=int,
+                        help='Also archive projects (except live ones) with no changes for this many days')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Projects per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the projects that would be archived')
+    args = parser.parse_args()
+
+    from app import app, db
+    with app.app_context():
+        if args.command == 'restore':
+            try:
+                restored = restore_project(args.project_id)
+                db.session.commit()
+            except ArchiveError as e:
+                print(f"❌ {e}")
+                return 1
+            if not restored:
+                print(f"❌ Project {args.project_id} is not archived")
+                return 1
+            print(f"✅ Restored project {args.project_id}")
+            return 0
+
+        started = datetime.now()
+
+        def progress(summary):
+            print(f"   📦 {summary['projects']:,} projects archived")
+
+        summary = archive_projects(args.killed_days, args.inactive_days, args.batch_size, args.dry_run, progress)
+
+    if args.dry_run:
+        print(f"🔍 {summary['projects']:,} projects would be archived")
+        return 0
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"\n✅ Archived {summary['projects']:,} projects in {elapsed:.1f}s")
+    for table, count in summary['rows'].items():
+        print(f"   {table}: {count:,} rows")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
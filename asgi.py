@@ -0,0 +1,317 @@
+"""
+ASGI Entry Point
+
+Serves the app from an asyncio event loop, next to the WSGI entry points
+(api/index.py, run.py). The hot routes are handled by async handlers here:
+
+    GET  /api/auth/user
+    GET  /api/app-ideas
+    GET  /api/projects
+    GET  /api/dashboard/stats
+    POST /api/game-plan/<step_id>/data   (and PUT)
+
+Their Supabase token check is an async HTTP call (aiohttp), and their database
+work runs on an async driver (aiosqlite or asyncpg) through SQLAlchemy's
+asyncio extension. A request waiting on either one only parks a coroutine, so
+one process keeps serving while hundreds of slow auth calls are in flight. The
+query and business logic is the same code the Flask routes use (list_app_ideas,
+dashboard_stats, apply_step_data, ...), run with AsyncSession.run_sync.
+
+Every other route - and hot routes with options the async handlers don't
+cover, like ?include_archived=1 or ?async=1 - goes to the Flask app through a WSGI
+adapter with its own thread pool (ASGI_WSGI_THREADS, default 20). At most
+ASGI_AUTH_CONNECTIONS (default 200) auth calls are open at once. Async
+handlers are off when the database has no async driver or per-user SQLite
+shards are enabled; then everything goes to Flask.
+
+Usage:
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --port 5000
+    python benchmark_asgi.py             # many concurrent slow-auth requests, one process
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qs
+
+try:
+    import aiohttp
+    from a2wsgi import WSGIMiddleware
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError as e:
+    raise ImportError(f"ASGI mode needs extra packages - pip install -r requirements-asgi.txt ({e})") from e
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+import metrics
+from app import (
+    app as flask_app, init_database, shard_router, assign_sync_versions, score_changed_ideas,
+    index_changed_ideas, track_suggest_changes, apply_suggest_changes, discard_suggest_changes,
+    list_app_ideas, IDEA_SORTS, parse_facets, count_idea_facets, list_projects, dashboard_stats,
+    apply_step_data, serialize_idea, serialize_project, GamePlanStep,
+)
+
+DEFAULT_WSGI_THREADS = 20
+DEFAULT_AUTH_CONNECTIONS = 200
+AUTH_TIMEOUT_SECONDS = 10
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+class AsyncBridgeSession(Session):
+    """Sync session AsyncSession.run_sync hands to the shared route logic"""
+
+# Same scores, sync versions, tombstones, duplicate and typeahead indexes as writes through db.session
+event.listen(AsyncBridgeSession, 'before_flush', score_changed_ideas)
+event.listen(AsyncBridgeSession, 'before_flush', assign_sync_versions)
+event.listen(AsyncBridgeSession, 'after_flush', index_changed_ideas)
+event.listen(AsyncBridgeSession, 'after_flush', track_suggest_changes)
+event.listen(AsyncBridgeSession, 'after_commit', apply_suggest_changes)
+event.listen(AsyncBridgeSession, 'after_soft_rollback', discard_suggest_changes)
+
+def async_database_url(uri):
+    """The async-driver URL for uri, or None if its database has no async driver"""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return None
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'postgresql':
+        query = dict(url.query)
+        # asyncpg spells psycopg2's sslmode as ssl
+        if 'sslmode' in query:
+            query['ssl'] = query.pop('sslmode')
+        # Supabase's transaction pooler (pgbouncer) can't keep prepared statements
+        query['prepared_statement_cache_size'] = '0'
+        url = url.set(query=query)
+    return url
+
+class AsyncState:
+    """Engine, session factory and HTTP client, created on startup"""
+
+    def __init__(self):
+        self.engine = None
+        self.sessions = None
+        self.http = None
+
+    @property
+    def enabled(self):
+        return self.sessions is not None
+
+    async def start(self):
+        # Migrations and the sync engine, same as a WSGI cold start
+        await asyncio.to_thread(init_database)
+        url = async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+        if url is None or shard_router.enabled:
+            print("ℹ️  Async handlers disabled - serving every route through Flask")
+        else:
+            connect_args = {'statement_cache_size': 0} if url.get_backend_name() == 'postgresql' else {}
+            self.engine = create_async_engine(url, connect_args=connect_args, pool_pre_ping=True)
+            if url.get_backend_name() == 'sqlite':
+                event.listen(self.engine.sync_engine, 'connect', enable_sqlite_foreign_keys)
+            self.sessions = async_sessionmaker(self.engine, sync_session_class=AsyncBridgeSession,
+                                               expire_on_commit=False)
+        # Concurrent token checks are capped by this pool, not by threads
+        connections = int(os.environ.get('ASGI_AUTH_CONNECTIONS', DEFAULT_AUTH_CONNECTIONS))
+        self.http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=AUTH_TIMEOUT_SECONDS),
+                                          connector=aiohttp.TCPConnector(limit=connections))
+
+    async def stop(self):
+        if self.http is not None:
+            await self.http.close()
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    async def run(self, fn):
+        """Run fn(session) - ordinary sync ORM code - against the async driver"""
+        async with self.sessions() as session:
+            return await session.run_sync(fn)
+
+state = AsyncState()
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # app.py's listener only recognises plain sqlite3 connections
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+class Request:
+    def __init__(self, scope, receive):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.args = {key: values[0] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        self.receive = receive
+        self.user = None
+
+    async def json(self):
+        body = b''
+        while True:
+            message = await self.receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        return json.loads(body) if body else None
+
+    @property
+    def token(self):
+        header = self.headers.get('authorization', '')
+        return header[len('Bearer '):] if header.startswith('Bearer ') else None
+
+async def fetch_user(request):
+    """Verify the request's Supabase token (GET /auth/v1/user); returns the user dict or None"""
+    supabase_url, supabase_key = os.environ.get('SUPABASE_URL'), os.environ.get('SUPABASE_KEY')
+    if not request.token or not supabase_url or not supabase_key:
+        return None
+    if request.user is None:
+        started = time.perf_counter()
+        try:
+            async with state.http.get(
+                f"{supabase_url.rstrip('/')}/auth/v1/user",
+                headers={'apikey': supabase_key, 'Authorization': f'Bearer {request.token}'}
+            ) as response:
+                user = await response.json() if response.status == 200 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            metrics.observe_auth_call('get_user', started, 'error')
+            print(f"Error getting user from token: {e}")
+            return None
+        metrics.observe_auth_call('get_user', started, 'ok' if user else 'invalid')
+        request.user = user or {}
+    return request.user or None
+
+async def current_user_id(request):
+    user = await fetch_user(request)
+    return user.get('id') if user else None
+
+# Hot route handlers - each returns (status, payload)
+
+async def get_auth_user(request):
+    if not os.environ.get('SUPABASE_URL') or not os.environ.get('SUPABASE_KEY'):
+        return 401, {'authenticated': False, 'error': 'Supabase not available'}
+    user = await fetch_user(request)
+    if not user:
+        return 401, {'authenticated': False}
+    return 200, {
+        'authenticated': True,
+        'user': {'id': user.get('id'), 'email': user.get('email'), 'user_metadata': user.get('user_metadata') or {}}
+    }
+
+async def get_app_ideas(request):
+    user_id = await current_user_id(request)
+    sort = request.args.get('sort') or 'created_at'
+    if sort not in IDEA_SORTS:
+        return 400, {'error': f"sort must be one of: {', '.join(IDEA_SORTS)}"}
+    try:
+        facets = parse_facets(request.args.get('facets'))
+    except ValueError as e:
+        return 400, {'error': str(e)}
+    filters = {name: request.args.get(name, '') for name in ('search', 'status', 'mrr_range')}
+
+    def load(session):
+        ideas = [serialize_idea(idea) for idea in list_app_ideas(session, user_id, sort=sort, **filters)]
+        if not facets:
+            return ideas
+        return {'ideas': ideas, 'facets': count_idea_facets(session, user_id, facets, **filters)}
+
+    return 200, await state.run(load)
+
+async def get_projects(request):
+    user_id = await current_user_id(request)
+    return 200, await state.run(lambda session: [
+        serialize_project(project) for project in list_projects(session, user_id)
+    ])
+
+async def get_dashboard_stats(request):
+    return 200, await state.run(dashboard_stats)
+
+async def save_step_data(request, step_id):
+    data = await request.json()
+    if not isinstance(data, dict):
+        return 400, {'error': 'No data provided', 'message': 'Failed to save step data'}
+
+    def save(session):
+        step = session.get(GamePlanStep, step_id)
+        if step is None:
+            return 404, {'error': 'Game plan step not found'}
+        project = apply_step_data(session, step, data)
+        session.commit()
+        return 200, {
+            'message': 'Step data saved successfully',
+            'status': step.status,
+            'project_progress': project.progress if project else 0
+        }
+
+    try:
+        return await state.run(save)
+    except Exception as e:
+        return 500, {'error': str(e), 'message': 'Failed to save step data'}
+
+# (methods, pattern, handler, endpoint label used in metrics, query args only Flask handles)
+HOT_ROUTES = [
+    ({'GET'}, re.compile(r'^/api/auth/user$'), get_auth_user, '/api/auth/user', ()),
+    ({'GET'}, re.compile(r'^/api/app-ideas$'), get_app_ideas, '/api/app-ideas', ()),
+    ({'GET'}, re.compile(r'^/api/projects$'), get_projects, '/api/projects', ('include_archived',)),
+    ({'GET'}, re.compile(r'^/api/dashboard/stats$'), get_dashboard_stats, '/api/dashboard/stats', ('async',)),
+    ({'POST', 'PUT'}, re.compile(r'^/api/game-plan/(\d+)/data$'), save_step_data,
+     '/api/game-plan/<int:step_id>/data', ()),
+]
+
+def match_route(request):
+    for methods, pattern, handler, endpoint, flask_only_args in HOT_ROUTES:
+        match = pattern.match(request.path)
+        if match and request.method in methods and not any(arg in request.args for arg in flask_only_args):
+            return handler, [int(group) for group in match.groups()], endpoint
+    return None, None, None
+
+async def send_json(send, request, status, payload, extra_headers):
+    body = flask_app.json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    origin = request.headers.get('origin')
+    if origin:
+        # Same as CORS(app, supports_credentials=True) on the Flask side
+        headers += [(b'access-control-allow-origin', origin.encode('latin-1')),
+                    (b'access-control-allow-credentials', b'true'), (b'vary', b'Origin')]
+    headers += [(name.lower().encode(), value.encode()) for name, value in extra_headers.items()]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+wsgi_app = WSGIMiddleware(flask_app, workers=int(os.environ.get('ASGI_WSGI_THREADS', DEFAULT_WSGI_THREADS)))
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await state.start()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await state.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    if scope['type'] == 'http' and state.enabled:
+        request = Request(scope, receive)
+        handler, arguments, endpoint = match_route(request)
+        if handler is not None:
+            stats = metrics.start_request(endpoint)
+            status = 500
+            try:
+                status, payload = await handler(request, *arguments)
+                await send_json(send, request, status, payload, metrics.response_headers(stats))
+            finally:
+                metrics.finish_request(stats, request.method, request.path, status)
+            return
+
+    await wsgi_app(scope, receive, send)
@@ -2,63 +2,528 @@
 """
 Database Backup Script
 
-This script creates a timestamped backup of your workflow.db database.
-Run this regularly to ensure your data is safe.
+Creates consistent, compressed, checksummed backups of the workflow database
+and prunes old ones on an hourly/daily/weekly rotation.
+
+- SQLite: copied page by page through the online backup API, so the app can
+  keep writing while the backup runs and the copy is never torn mid-write.
+- Postgres (DATABASE_URL=postgresql://...): each table is dumped with COPY.
+
+Every backup is stream-compressed (zstd when the zstandard package is
+installed, gzip otherwise) and gets a JSON manifest with SHA-256 checksums,
+sizes and throughput, which `verify` and `restore` check before trusting it.
 
 Usage:
-    python backup_db.py
+    python backup_db.py                          # back up, then apply retention
+    python backup_db.py backup --compression gzip --no-prune
+    python backup_db.py list
+    python backup_db.py verify backups/workflow_backup_20260101_211450.db.zst
+    python backup_db.py restore backups/workflow_backup_20260101_211450.db.zst --force
+    python backup_db.py prune --hourly 24 --daily 7 --weekly 4
 """
 
-import shutil
+import argparse
+import gzip
+import hashlib
+import json
 import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
 from datetime import datetime
 
-def backup_database():
-    """Create a timestamped backup of workflow.db"""
-    db_path = 'workflow.db'
-    backup_dir = 'backups'
-    
-    # Create backups directory if it doesn't exist
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except Exception:
+    pass
+
+BACKUP_DIR = 'backups'
+BACKUP_PREFIX = 'workflow_backup_'
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+# Pages copied per online-backup step, and the pause that lets writers in between steps
+SQLITE_PAGES_PER_STEP = 1024
+SQLITE_STEP_SLEEP = 0.005
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# How many hourly, daily and weekly backups `prune` keeps by default
+DEFAULT_RETENTION = {'hourly': 24, 'daily': 7, 'weekly': 4}
+
+EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+
+def default_compression():
+    return 'zstd' if zstandard else 'gzip'
+
+def open_compressed_writer(path, compression):
+    if compression == 'zstd':
+        if not zstandard:
+            raise RuntimeError("zstd compression needs the zstandard package: pip install zstandard")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+    return gzip.open(path, 'wb', compresslevel=6)
+
+def open_compressed_reader(path):
+    if path.endswith(EXTENSIONS['zstd']):
+        if not zstandard:
+            raise RuntimeError("This backup is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return gzip.open(path, 'rb')
+
+class HashingWriter:
+    """File-like wrapper that checksums and counts the bytes passing through it"""
+
+    def __init__(self, target):
+        self.target = target
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.target.write(data)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def compress_file(source_path, target_path, compression):
+    """Stream-compress a file and return (raw_sha256, raw_size)"""
+    with open(source_path, 'rb') as source, open_compressed_writer(target_path, compression) as target:
+        writer = HashingWriter(target)
+        for block in iter(lambda: source.read(COPY_BUFFER_SIZE), b''):
+            writer.write(block)
+    return writer.sha256.hexdigest(), writer.size
+
+def decompress_file(source_path, target_path):
+    """Stream-decompress a file and return (raw_sha256, raw_size)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open_compressed_reader(source_path) as source, open(target_path, 'wb') as target:
+        for block in iter(lambda: source.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+            size += len(block)
+            target.write(block)
+    return digest.hexdigest(), size
+
+def write_manifest(path, manifest):
+    with open(path + '.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def read_manifest(path):
+    manifest_path = path + '.json'
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No manifest found for {path} (expected {manifest_path})")
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def get_database_target():
+    """Return ('postgres', url) or ('sqlite', path) for the configured database"""
+    database_url = os.environ.get('DATABASE_URL', '')
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+    if database_url.startswith('postgresql://'):
+        return 'postgres', database_url.split('?')[0]
+    if database_url.startswith('sqlite:///'):
+        return 'sqlite', database_url[len('sqlite:///'):]
+    # Flask-SQLAlchemy 3 keeps relative SQLite paths in the instance folder
+    for path in ('workflow.db', os.path.join('instance', 'workflow.db')):
+        if os.path.exists(path):
+            return 'sqlite', path
+    return 'sqlite', 'workflow.db'
+
+def format_rate(size, seconds):
+    return f"{size / (1024 * 1024) / max(seconds, 1e-6):.1f} MB/s"
+
+# Backup
+def backup_sqlite(db_path, backup_dir, compression):
+    if not os.path.exists(db_path):
+        print(f"Error: {db_path} not found. Nothing to backup.")
+        return None
+
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    backup_path = os.path.join(backup_dir, f'{BACKUP_PREFIX}{timestamp}.db{EXTENSIONS[compression]}')
+    started = time.monotonic()
+
+    def progress(status, remaining, total):
+        copied = total - remaining
+        print(f"\r   Copying pages: {copied:,}/{total:,}", end='', flush=True)
+
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=backup_dir)
+    os.close(fd)
+    try:
+        # Online backup: copies a consistent snapshot in steps, releasing the lock between them
+        source = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        snapshot = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(snapshot, pages=SQLITE_PAGES_PER_STEP, progress=progress, sleep=SQLITE_STEP_SLEEP)
+        finally:
+            snapshot.close()
+            source.close()
+        print()
+        copied = time.monotonic()
+
+        raw_sha256, raw_size = compress_file(snapshot_path, backup_path, compression)
+    finally:
+        os.remove(snapshot_path)
+
+    finished = time.monotonic()
+    compressed_size = os.path.getsize(backup_path)
+    manifest = {
+        'kind': 'sqlite',
+        'source': os.path.abspath(db_path),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'compression': compression,
+        'files': [{
+            'name': os.path.basename(backup_path),
+            'raw_size': raw_size,
+            'raw_sha256': raw_sha256,
+            'compressed_size': compressed_size,
+            'compressed_sha256': file_sha256(backup_path),
+        }],
+        'seconds': round(finished - started, 3),
+        'copy_throughput': format_rate(raw_size, copied - started),
+        'compress_throughput': format_rate(raw_size, finished - copied),
+    }
+    write_manifest(backup_path, manifest)
+    return backup_path, manifest
+
+def get_postgres_tables(cursor):
+    """Public tables in foreign-key order, so parents are restored before children"""
+    cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'public' ORDER BY tablename")
+    tables = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        SELECT conrelid::regclass::text, confrelid::regclass::text
+        FROM pg_constraint
+        WHERE contype = 'f' AND connamespace = 'public'::regnamespace
+    """)
+    parents = {table: set() for table in tables}
+    for child, parent in cursor.fetchall():
+        child, parent = child.strip('"'), parent.strip('"')
+        if child in parents and parent != child:
+            parents[child].add(parent)
+
+    ordered = []
+    while parents:
+        ready = sorted(t for t, deps in parents.items() if not deps & set(parents))
+        if not ready:
+            # Foreign-key cycle - fall back to alphabetical for the remainder
+            ready = sorted(parents)
+        for table in ready:
+            ordered.append(table)
+            del parents[table]
+    return ordered
+
+def backup_postgres(database_url, backup_dir, compression):
+    try:
+        import psycopg2
+    except ImportError:
+        print("Error: psycopg2 is required for Postgres backups: pip install psycopg2-binary")
+        return None
+
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    backup_path = os.path.join(backup_dir, f'{BACKUP_PREFIX}{timestamp}.pg')
+    os.makedirs(backup_path)
+    started = time.monotonic()
+    files = []
+
+    conn = psycopg2.connect(database_url)
+    try:
+        # One repeatable-read snapshot so every table is dumped as of the same moment
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with conn.cursor() as cursor:
+            tables = get_postgres_tables(cursor)
+            for table in tables:
+                file_name = f'{table}.copy{EXTENSIONS[compression]}'
+                file_path = os.path.join(backup_path, file_name)
+                table_started = time.monotonic()
+                with open_compressed_writer(file_path, compression) as target:
+                    writer = HashingWriter(target)
+                    cursor.copy_expert(f'COPY "{table}" TO STDOUT WITH (FORMAT csv, HEADER true)', writer)
+                elapsed = time.monotonic() - table_started
+                print(f"   {table}: {writer.size:,} bytes ({format_rate(writer.size, elapsed)})")
+                files.append({
+                    'name': file_name,
+                    'table': table,
+                    'raw_size': writer.size,
+                    'raw_sha256': writer.sha256.hexdigest(),
+                    'compressed_size': os.path.getsize(file_path),
+                    'compressed_sha256': file_sha256(file_path),
+                })
+        conn.rollback()
+    finally:
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    raw_total = sum(f['raw_size'] for f in files)
+    manifest = {
+        'kind': 'postgres',
+        'source': database_url.split('@')[-1],
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'compression': compression,
+        'files': files,
+        'seconds': round(elapsed, 3),
+        'copy_throughput': format_rate(raw_total, elapsed),
+    }
+    write_manifest(backup_path, manifest)
+    return backup_path, manifest
+
+def backup_database(compression=None, backup_dir=BACKUP_DIR, prune=True, retention=None):
+    """Create a compressed, checksummed backup of the configured database"""
+    compression = compression or default_compression()
     if not os.path.exists(backup_dir):
         os.makedirs(backup_dir)
         print(f"Created backup directory: {backup_dir}")
-    
-    # Check if database exists
-    if not os.path.exists(db_path):
-        print(f"Error: {db_path} not found. Nothing to backup.")
-        return False
-    
-    # Create timestamped backup filename
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_filename = f'workflow_backup_{timestamp}.db'
-    backup_path = os.path.join(backup_dir, backup_filename)
-    
+
+    kind, target = get_database_target()
+    print(f"📦 Backing up {kind} database ({compression})...")
     try:
-        # Copy database file
-        shutil.copy2(db_path, backup_path)
-        
-        # Get file sizes
-        original_size = os.path.getsize(db_path)
-        backup_size = os.path.getsize(backup_path)
-        
-        print(f"✓ Backup created successfully!")
-        print(f"  Original: {db_path} ({original_size:,} bytes)")
-        print(f"  Backup: {backup_path} ({backup_size:,} bytes)")
-        
-        # List all backups
-        backups = [f for f in os.listdir(backup_dir) if f.startswith('workflow_backup_')]
-        backups.sort(reverse=True)
-        
-        print(f"\nTotal backups: {len(backups)}")
-        if len(backups) > 0:
-            print(f"Latest backup: {backups[0]}")
-        
-        return True
-        
+        result = backup_sqlite(target, backup_dir, compression) if kind == 'sqlite' \
+            else backup_postgres(target, backup_dir, compression)
     except Exception as e:
         print(f"Error creating backup: {e}")
         return False
+    if not result:
+        return False
 
-if __name__ == '__main__':
-    backup_database()
+    backup_path, manifest = result
+    raw_size = sum(f['raw_size'] for f in manifest['files'])
+    compressed_size = sum(f['compressed_size'] for f in manifest['files'])
+    print(f"✓ Backup created successfully!")
+    print(f"  Backup: {backup_path}")
+    print(f"  Size: {raw_size:,} bytes -> {compressed_size:,} bytes compressed "
+          f"({compressed_size / max(raw_size, 1):.0%})")
+    print(f"  Took {manifest['seconds']}s (copy {manifest['copy_throughput']}"
+          + (f", compress {manifest['compress_throughput']}" if 'compress_throughput' in manifest else '') + ")")
+
+    if prune:
+        prune_backups(backup_dir, retention or DEFAULT_RETENTION)
+    return True
+
+# Listing and retention
+def list_backups(backup_dir=BACKUP_DIR):
+    """Return (created_at, path) for every backup that has a manifest, newest first"""
+    if not os.path.exists(backup_dir):
+        return []
+    backups = []
+    for name in os.listdir(backup_dir):
+        if not name.startswith(BACKUP_PREFIX) or name.endswith('.json'):
+            continue
+        path = os.path.join(backup_dir, name)
+        if not os.path.exists(path + '.json'):
+            continue
+        stamp = name[len(BACKUP_PREFIX):len(BACKUP_PREFIX) + len('YYYYmmdd_HHMMSS')]
+        try:
+            backups.append((datetime.strptime(stamp, TIMESTAMP_FORMAT), path))
+        except ValueError:
+            continue
+    return sorted(backups, reverse=True)
+
+def select_retained(backups, retention):
+    """Keep the newest backup in each of the most recent N hours, days and weeks"""
+    buckets = {
+        'hourly': lambda ts: ts.strftime('%Y%m%d%H'),
+        'daily': lambda ts: ts.strftime('%Y%m%d'),
+        'weekly': lambda ts: ts.strftime('%G%V'),
+    }
+    keep = set()
+    for period, count in retention.items():
+        seen = set()
+        for created_at, path in backups:
+            if len(seen) >= count:
+                break
+            bucket = buckets[period](created_at)
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(path)
+    return keep
+
+def prune_backups(backup_dir=BACKUP_DIR, retention=None):
+    retention = retention or DEFAULT_RETENTION
+    backups = list_backups(backup_dir)
+    keep = select_retained(backups, retention)
+    removed = 0
+    for _, path in backups:
+        if path in keep:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        os.remove(path + '.json')
+        removed += 1
+    print(f"🧹 Retention ({retention['hourly']} hourly, {retention['daily']} daily, {retention['weekly']} weekly): "
+          f"kept {len(keep)}, removed {removed}")
+    return removed
+
+# Verify and restore
+def verify_backup(backup_path, keep_snapshot=False):
+    """Check checksums (and SQLite integrity); returns the decompressed snapshot path for SQLite"""
+    manifest = read_manifest(backup_path)
+    snapshot_path = None
+    for entry in manifest['files']:
+        file_path = backup_path if manifest['kind'] == 'sqlite' else os.path.join(backup_path, entry['name'])
+        if file_sha256(file_path) != entry['compressed_sha256']:
+            raise ValueError(f"Checksum mismatch for {entry['name']} (compressed file is corrupt)")
+
+        fd, temp_path = tempfile.mkstemp(suffix='.restore')
+        os.close(fd)
+        try:
+            raw_sha256, raw_size = decompress_file(file_path, temp_path)
+            if raw_sha256 != entry['raw_sha256'] or raw_size != entry['raw_size']:
+                raise ValueError(f"Checksum mismatch for {entry['name']} (decompressed data differs)")
+            if manifest['kind'] == 'sqlite':
+                conn = sqlite3.connect(temp_path)
+                try:
+                    result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+                finally:
+                    conn.close()
+                if result != 'ok':
+                    raise ValueError(f"SQLite integrity check failed: {result}")
+                snapshot_path = temp_path
+        finally:
+            if temp_path != snapshot_path or not keep_snapshot:
+                os.remove(temp_path)
+    return manifest, snapshot_path if keep_snapshot else None
+
+def restore_sqlite(snapshot_path, target_path):
+    # Copy through the backup API so a running app sees the swap as a single write transaction
+    source = sqlite3.connect(snapshot_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=SQLITE_PAGES_PER_STEP)
+    finally:
+        target.close()
+        source.close()
+
+def restore_postgres(backup_path, manifest, database_url):
+    import psycopg2
+    tables = [entry['table'] for entry in manifest['files']]
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('TRUNCATE ' + ', '.join(f'"{t}"' for t in tables) + ' RESTART IDENTITY CASCADE')
+            for entry in manifest['files']:
+                with open_compressed_reader(os.path.join(backup_path, entry['name'])) as source:
+                    cursor.copy_expert(f'COPY "{entry["table"]}" FROM STDIN WITH (FORMAT csv, HEADER true)', source)
+                print(f"   Restored {entry['table']}")
+            # Move sequences past the restored rows - only for serial columns, since some tables
+            # (idea_signature, idea_lsh_bucket) are keyed by another table's id and have no sequence
+            cursor.execute(
+                "SELECT table_name, column_name FROM information_schema.columns"
+                " WHERE table_schema = current_schema() AND table_name = ANY(%s)"
+                " AND (column_default LIKE 'nextval(%%' OR is_identity = 'YES')",
+                (tables,)
+            )
+            for table, column in cursor.fetchall():
+                cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (f'"{table}"', column))
+                sequence = cursor.fetchone()[0]
+                if sequence:
+                    cursor.execute(
+                        f'SELECT setval(%s, COALESCE((SELECT MAX("{column}") FROM "{table}"), 0) + 1, false)',
+                        (sequence,)
+                    )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def restore_backup(backup_path, target=None, force=False):
+    backup_path = backup_path.rstrip('/')
+    print(f"🔍 Verifying {backup_path}...")
+    started = time.monotonic()
+    manifest, snapshot_path = verify_backup(backup_path, keep_snapshot=True)
+    print("✓ Checksums verified")
+
+    try:
+        kind, configured_target = get_database_target()
+        if manifest['kind'] != kind and not target:
+            raise ValueError(f"Backup is {manifest['kind']} but the configured database is {kind}")
+        target = target or configured_target
+
+        if manifest['kind'] == 'sqlite':
+            if os.path.exists(target) and not force:
+                raise ValueError(f"{target} exists - pass --force to overwrite it")
+            restore_sqlite(snapshot_path, target)
+        else:
+            if not force:
+                raise ValueError("Restoring replaces every table in the database - pass --force to continue")
+            restore_postgres(backup_path, manifest, target)
+    finally:
+        if snapshot_path:
+            os.remove(snapshot_path)
+
+    raw_size = sum(f['raw_size'] for f in manifest['files'])
+    elapsed = time.monotonic() - started
+    print(f"✓ Restored {raw_size:,} bytes into {target} in {elapsed:.1f}s ({format_rate(raw_size, elapsed)})")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Back up, verify and restore the workflow database')
+    subparsers = parser.add_subparsers(dest='command')
 
+    backup_parser = subparsers.add_parser('backup', help='Create a backup (default command)')
+    backup_parser.add_argument('--compression', choices=list(EXTENSIONS), default=None)
+    backup_parser.add_argument('--no-prune', action='store_true', help='Skip the retention policy')
+
+    subparsers.add_parser('list', help='List backups, newest first')
+
+    verify_parser = subparsers.add_parser('verify', help='Check a backup against its manifest')
+    verify_parser.add_argument('backup')
+
+    restore_parser = subparsers.add_parser('restore', help='Verify a backup and restore it')
+    restore_parser.add_argument('backup')
+    restore_parser.add_argument('--target', help='SQLite file or Postgres URL to restore into')
+    restore_parser.add_argument('--force', action='store_true', help='Overwrite existing data')
+
+    prune_parser = subparsers.add_parser('prune', help='Apply the retention policy')
+    for parser_ in (backup_parser, prune_parser):
+        for period, count in DEFAULT_RETENTION.items():
+            parser_.add_argument(f'--{period}', type=int, default=count, help=f'{period.capitalize()} backups to keep')
+
+    args = parser.parse_args()
+    command = args.command or 'backup'
+    retention = {period: getattr(args, period, count) for period, count in DEFAULT_RETENTION.items()}
+
+    try:
+        if command == 'backup':
+            ok = backup_database(getattr(args, 'compression', None), prune=not getattr(args, 'no_prune', False),
+                                 retention=retention)
+            return 0 if ok else 1
+        if command == 'list':
+            backups = list_backups()
+            print(f"Total backups: {len(backups)}")
+            for created_at, path in backups:
+                manifest = read_manifest(path)
+                size = sum(f['compressed_size'] for f in manifest['files'])
+                print(f"   {created_at:%Y-%m-%d %H:%M:%S}  {manifest['kind']:8}  {size:>14,} bytes  {path}")
+            return 0
+        if command == 'verify':
+            manifest, _ = verify_backup(args.backup.rstrip('/'))
+            print(f"✓ {args.backup} is intact ({len(manifest['files'])} file(s) verified)")
+            return 0
+        if command == 'restore':
+            restore_backup(args.backup, args.target, args.force)
+            return 0
+        prune_backups(retention=retention)
+        return 0
+    except (ValueError, FileNotFoundError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
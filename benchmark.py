@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Endpoint Benchmark
+
+Seeds a database with seed_data.py, then calls every GET route in app.py
+(plus the common writes) with concurrent clients and reports, per route:
+p50/p95/p99 latency, throughput and SQL statements per request (read from
+the X-Query-Count header, see metrics.py).
+
+By default requests go through the Flask test client, which measures the
+app and the database without any network or server overhead. --server
+starts a real threaded WSGI server on a local port instead, --workers N
+starts the production server (serve.py) with N worker processes, and --url
+points the benchmark at one that is already running (it must use the same
+database as --database-url). Comparing req/s for --workers 1 and --workers
+<cores> at a matching --concurrency shows how throughput scales across cores.
+
+Save a run with --save-baseline and compare later runs with --baseline: a
+route regresses when its p95 is more than --tolerance slower (default 25%)
+or it runs more SQL statements than before. The exit code is 1 on any
+regression, so it can gate CI.
+
+Usage:
+    python benchmark.py                                  # 1k rows, temporary SQLite
+    python benchmark.py --scale 100k --concurrency 8 --requests 200
+    python benchmark.py --database-url postgresql://localhost/bench --scale 1m --server
+    python benchmark.py --workers 4 --concurrency 16   # serve.py with 4 worker processes
+    python benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmark.py --baseline benchmarks/baseline.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_REQUESTS = 50
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TOLERANCE = 0.25
+
+# Routes that only echo configuration, that migrate/scrape rather than serve users, or that need a queued job
+SKIPPED_ROUTES = {'/', '/test', '/metrics', '/migrate', '/api/test-env', '/api/auth/user', '/api/auth/config',
+                  '/api/jobs/<int:job_id>', '/api/jobs/<int:job_id>/download'}
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def anonymous_ids():
+    """Ids of rows owned by the anonymous user (who the benchmark calls the API as)"""
+    from app import db, AppIdea, Project, Task, GamePlanStep
+
+    def first(query):
+        return db.session.execute(query).scalar()
+
+    project_id = first(db.select(db.func.min(Project.id)).where(Project.user_id.is_(None)))
+    return {
+        'app-ideas': first(db.select(db.func.min(AppIdea.id)).where(AppIdea.user_id.is_(None))),
+        'projects': project_id,
+        'tasks': first(db.select(db.func.min(Task.id)).where(Task.project_id == project_id)),
+        'game-plan': first(db.select(db.func.min(GamePlanStep.id)).where(GamePlanStep.project_id == project_id)),
+    }
+
+def build_routes(app, ids):
+    """(name, method, url, json) for every GET route plus idempotent writes"""
+    routes = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if 'GET' not in rule.methods or rule.endpoint == 'static' or rule.rule in SKIPPED_ROUTES:
+            continue
+        resource = rule.rule.split('/')[2] if rule.rule.startswith('/api/') else None
+        url = rule.rule
+        for argument in rule.arguments:
+            url = url.replace(f'<int:{argument}>', str(ids.get(resource)))
+        routes.append((f'GET {rule.rule}', 'GET', url, None))
+
+    routes += [
+        ('GET /api/app-ideas?search', 'GET', '/api/app-ideas?search=saas', None),
+        ('GET /api/sync?since', 'GET', '/api/sync?since=1', None),
+        ('PUT /api/tasks/<int:id>', 'PUT', f"/api/tasks/{ids['tasks']}", {'status': 'in_progress'}),
+        ('PUT /api/projects/<int:id>', 'PUT', f"/api/projects/{ids['projects']}", {'progress': 42}),
+        ('POST /api/game-plan/<int:step_id>/data', 'POST', f"/api/game-plan/{ids['game-plan']}/data",
+         {'confidence_check': 7}),
+    ]
+    return routes
+
+class TestClientDriver:
+    """Calls the app in-process; each worker thread gets its own test client"""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def __call__(self, method, url, body):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        response.get_data()
+        return time.perf_counter() - started, response.status_code, response.headers.get('X-Query-Count')
+
+class HttpDriver:
+    """Calls a WSGI server over HTTP"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def __call__(self, method, url, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + url, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'} if data else {})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, headers = e.code, e.headers
+        return time.perf_counter() - started, status, headers.get('X-Query-Count')
+
+def start_server(app):
+    """Serve app with werkzeug's threaded WSGI server on a free local port"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def start_production_server(workers, timeout=60):
+    """serve.py on a free local port (same DATABASE_URL); returns (process, base URL)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(workers), '--bind', f'127.0.0.1:{port}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            urllib.request.urlopen(base_url + '/api/auth/config', timeout=1).read()
+            return process, base_url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('serve.py did not start')
+
+def run_route(driver, method, url, body, requests, concurrency, warmup):
+    for _ in range(warmup):
+        driver(method, url, body)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: driver(method, url, body), range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(result[0] * 1000 for result in results)
+    queries = [int(result[2]) for result in results if result[2] is not None]
+    errors = sum(1 for result in results if result[1] >= 500)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'rps': round(requests / wall, 1) if wall > 0 else 0.0,
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'status': results[-1][1],
+    }
+
+def compare(results, baseline, tolerance):
+    """Regressions as (route, reason) pairs"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance) and result['p95_ms'] - before['p95_ms'] > 1:
+            regressions.append((name, f"p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms"))
+        if result['queries'] is not None and before.get('queries') is not None and result['queries'] > before['queries']:
+            regressions.append((name, f"queries/request {before['queries']} -> {result['queries']}"))
+        if result['errors'] and not before.get('errors'):
+            regressions.append((name, f"{result['errors']} server errors"))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every API route against seeded data')
+    parser.add_argument('--scale', default='1k', help='Seed size: 1k, 100k or 1m (see seed_data.py)')
+    parser.add_argument('--database-url', help='Database to seed and use (default: temporary SQLite)')
+    parser.add_argument('--no-seed', action='store_true', help='Use the data already in --database-url')
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Measured requests per route')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Concurrent clients')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per route first')
+    parser.add_argument('--route', action='append', help='Only run routes whose name contains this (repeatable)')
+    parser.add_argument('--server', action='store_true', help='Go through a local threaded WSGI server')
+    parser.add_argument('--workers', type=int, help='Go through serve.py with this many worker processes')
+    parser.add_argument('--url', help='Benchmark an already running server at this base URL')
+    parser.add_argument('--output', help='Write the results as JSON')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Store the results as the new baseline')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare against a stored baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed p95 slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    from seed_data import SCALES, seed
+    if args.scale not in SCALES:
+        parser.error(f"--scale must be one of {', '.join(SCALES)}")
+
+    os.environ['DATABASE_URL'] = args.database_url or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'benchmark.db')}"
+    os.environ.setdefault('SLOW_QUERY_MS', '-1')
+    os.environ.setdefault('METRICS_QUERY_THRESHOLD', '1000000')
+    os.environ['LAZY_INIT'] = '0'
+    from app import app, db
+
+    with app.app_context():
+        database = db.engine.dialect.name
+        print(f"🗄️  {db.engine.url.render_as_string(hide_password=True)}")
+        if not args.no_seed:
+            started = time.monotonic()
+            counts = seed(SCALES[args.scale])
+            print(f"🌱 Seeded {sum(counts.values()):,} rows in {time.monotonic() - started:.1f}s")
+        ids = anonymous_ids()
+        db.session.remove()
+
+    routes = build_routes(app, ids)
+    if args.route:
+        routes = [route for route in routes if any(pattern in route[0] for pattern in args.route)]
+
+    server = process = None
+    if args.url:
+        driver, mode = HttpDriver(args.url), args.url
+    elif args.workers:
+        process, base_url = start_production_server(args.workers)
+        driver, mode = HttpDriver(base_url), f'serve.py with {args.workers} workers at {base_url}'
+    elif args.server:
+        server, base_url = start_server(app)
+        driver, mode = HttpDriver(base_url), f'WSGI server at {base_url}'
+    else:
+        driver, mode = TestClientDriver(app), 'Flask test client'
+
+    print(f"🏁 {len(routes)} routes x {args.requests} requests, {args.concurrency} concurrent clients ({mode})\n")
+    print(f"   {'route':<46} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'queries':>8}")
+    results = {}
+    try:
+        for name, method, url, body in routes:
+            result = run_route(driver, method, url, body, args.requests, args.concurrency, args.warmup)
+            results[name] = result
+            queries = '-' if result['queries'] is None else f"{result['queries']:g}"
+            flag = '❌' if result['errors'] else '  '
+            print(f"{flag} {name:<46} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                  f"{result['rps']:>8.1f} {queries:>8}")
+    finally:
+        if server is not None:
+            server.shutdown()
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        'scale': args.scale,
+        'database': database,
+        'mode': 'http' if (args.url or args.server or args.workers) else 'test_client',
+        'workers': args.workers,
+        'concurrency': args.concurrency,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'routes': results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+    if args.save_baseline:
+        print(f"\n💾 Baseline saved to {args.save_baseline}")
+
+    status = 1 if any(result['errors'] for result in results.values()) else 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get('scale'), baseline.get('database')) != (args.scale, report['database']):
+            print(f"\n⚠️  Baseline was recorded at scale {baseline.get('scale')} on {baseline.get('database')}")
+        regressions = compare(results, baseline.get('routes', {}), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.baseline}:")
+            for name, reason in regressions:
+                print(f"   {name}: {reason}")
+            status = 1
+        else:
+            print(f"\n✅ No regressions against {args.baseline}")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
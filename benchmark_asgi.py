@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Concurrent Slow-Auth Benchmark (ASGI)
+
+Shows that one asgi.py process keeps many requests in flight while each of
+them waits on a slow Supabase auth call. It starts:
+
+- a stub Supabase auth server that answers GET /auth/v1/user after
+  --auth-delay-ms (default 300 ms)
+- asgi:app in one uvicorn worker process (one event loop), pointed at the
+  stub and at a temporary SQLite database seeded by seed_data.py
+
+and then fires --requests authenticated requests at a hot route,
+--concurrency at a time, from this process. With a blocking worker those requests would take
+at least requests x delay / threads; here the wall time stays close to
+(requests / concurrency) x delay.
+
+Usage:
+    python benchmark_asgi.py
+    python benchmark_asgi.py --requests 1000 --concurrency 500 --auth-delay-ms 500
+    python benchmark_asgi.py --path /api/dashboard/stats
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+STUB_KEY = 'benchmark-anon-key'
+
+async def start_stub_auth(delay, user):
+    """Minimal HTTP server standing in for Supabase's /auth/v1/user"""
+    body = json.dumps(user).encode()
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                # Keep-alive: read request heads until the client closes
+                head = await reader.readuntil(b'\r\n\r\n')
+                if not head:
+                    break
+                await asyncio.sleep(delay)
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0, backlog=4096)
+    return server, server.sockets[0].getsockname()[1]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_asgi_server(port, timeout=30):
+    """uvicorn asgi:app in its own process, so the load generator doesn't share its GIL"""
+    server = subprocess.Popen([
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+        '--log-level', 'warning', '--backlog', '4096',
+    ], cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/auth/config', timeout=1).read()
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    server.kill()
+    return None
+
+async def get(port, path, token):
+    """One GET on a fresh connection; returns the status code.
+
+    Plain asyncio streams rather than an HTTP client library: with hundreds
+    of connections a client's pool bookkeeping becomes the bottleneck."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n'
+                     f'Connection: close\r\n\r\n'.encode())
+        await writer.drain()
+        response = await reader.read()
+        return int(response.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+async def fire(port, path, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(n):
+        async with semaphore:
+            started = time.perf_counter()
+            status = await get(port, path, f'token-{n}')
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    wall = time.perf_counter() - started
+    return sorted(latencies), statuses, wall
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent slow-auth requests against one ASGI process')
+    parser.add_argument('--path', default='/api/app-ideas', help='Hot route to call (default: /api/app-ideas)')
+    parser.add_argument('--requests', type=int, default=500, help='Total requests')
+    parser.add_argument('--concurrency', type=int, default=250, help='Requests in flight at once')
+    parser.add_argument('--auth-delay-ms', type=float, default=300, help='Stub auth server response time')
+    parser.add_argument('--scale', default='1k', help='Seed size for the temporary database (see seed_data.py)')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='asgi-bench-'), 'bench.db')}"
+    os.environ['LAZY_INIT'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '-1')
+    from app import app, db, AppIdea
+    from benchmark import percentile
+    from seed_data import SCALES, seed
+
+    with app.app_context():
+        seed(SCALES[args.scale])
+        # Authenticate as a seeded user so the listing returns real rows
+        user_id = db.session.execute(
+            db.select(AppIdea.user_id).where(AppIdea.user_id.isnot(None)).limit(1)
+        ).scalar()
+        db.session.remove()
+
+    stub_loop = asyncio.new_event_loop()
+    threading.Thread(target=stub_loop.run_forever, daemon=True).start()
+    user = {'id': user_id, 'email': 'benchmark@example.com', 'user_metadata': {}}
+    _, stub_port = asyncio.run_coroutine_threadsafe(
+        start_stub_auth(args.auth_delay_ms / 1000, user), stub_loop).result()
+    os.environ['SUPABASE_URL'] = f'http://127.0.0.1:{stub_port}'
+    os.environ['SUPABASE_KEY'] = STUB_KEY
+
+    port = free_port()
+    server = start_asgi_server(port)
+    if server is None:
+        print("❌ ASGI server did not start")
+        return 1
+
+    print(f"🏁 {args.requests} x GET {args.path}, {args.concurrency} in flight, "
+          f"auth takes {args.auth_delay_ms:.0f} ms (one uvicorn process, one event loop)")
+    try:
+        latencies, statuses, wall = asyncio.run(fire(port, args.path, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    ideal = -(-args.requests // args.concurrency) * args.auth_delay_ms / 1000
+    serial = args.requests * args.auth_delay_ms / 1000
+    print(f"\n   status codes   {statuses}")
+    print(f"   p50/p95/p99    {percentile(latencies, 0.5):.0f} / {percentile(latencies, 0.95):.0f} / "
+          f"{percentile(latencies, 0.99):.0f} ms")
+    print(f"   wall time      {wall:.2f} s  (auth alone: {ideal:.2f} s at this concurrency, "
+          f"{serial:.0f} s one at a time)")
+    print(f"   throughput     {args.requests / wall:.0f} req/s")
+    print(f"   in flight      {sum(latencies) / 1000 / wall:.0f} requests on average")
+    return 0 if set(statuses) == {200} else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check
+
+Runs every GET endpoint (and the common writes) against a database freshly
+seeded by seed_data.py, captures the plan of every SQL statement they issue (see
+slow_queries.py), and fails when a filtered or joined query reads a table
+without an index. Run it after changing a query or a model - a missing index
+shows up here long before the table is big enough to hurt.
+
+Statements with no WHERE clause or join (plain "list everything" counts)
+can't use an index and are skipped. On PostgreSQL, sequential scans are
+disabled for the run, so a Seq Scan in a plan means no usable index exists.
+
+By default it uses a throwaway SQLite database. --database-url points it at
+another (empty, disposable) database instead - it writes seed data.
+
+Usage:
+    python check_query_plans.py               # exits 1 if a hot query scans a table
+    python check_query_plans.py --verbose     # print every plan
+    python check_query_plans.py --database-url postgresql://.../plans_test
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# Enough for a few dozen users (see seed_data.py) - plans depend on indexes, not volume
+PLAN_CHECK_ROWS = 5000
+
+# table -> why reading all of it is fine; keep this short and justified
+ALLOWED_SCANS = {}
+
+FILTERED = re.compile(r'\b(WHERE|JOIN)\b', re.IGNORECASE)
+# count(*) FILTER (WHERE ...) filters an aggregate, not the rows read
+AGGREGATE_FILTER = re.compile(r'FILTER \(WHERE', re.IGNORECASE)
+
+def is_filtered(sql):
+    return bool(FILTERED.search(AGGREGATE_FILTER.sub('', sql)))
+
+def first_id(model):
+    from app import db
+    return db.session.query(db.func.min(model.id)).filter(
+        *([model.user_id.is_(None)] if hasattr(model, 'user_id') else [])
+    ).scalar()
+
+def build_requests():
+    """(method, url, json) for every GET route plus the writes the UI makes most"""
+    from app import app, db, AppIdea, Project, Task, GamePlanStep
+    import jobs
+
+    idea_id, project_id = first_id(AppIdea), first_id(Project)
+    step_id = db.session.query(db.func.min(GamePlanStep.id)).filter_by(project_id=project_id).scalar()
+    task_id = db.session.query(db.func.min(Task.id)).filter_by(project_id=project_id).scalar()
+    # An export by the anonymous user, so the job routes (download included) find a row they may read
+    job_id = jobs.enqueue('export', {'format': 'ndjson'})
+    ids = {'app-ideas': idea_id, 'projects': project_id, 'tasks': task_id, 'game-plan': step_id, 'jobs': job_id}
+    skipped = {'/', '/test', '/metrics', '/migrate', '/api/test-env', '/api/database/status'}
+
+    requests = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if 'GET' not in rule.methods or rule.endpoint == 'static' or rule.rule in skipped:
+            continue
+        resource = rule.rule.split('/')[2] if rule.rule.startswith('/api/') else None
+        url = rule.rule
+        for argument in rule.arguments:
+            url = url.replace(f'<int:{argument}>', str(ids.get(resource)))
+        requests.append(('GET', url, None))
+
+    requests += [
+        ('GET', '/api/app-ideas?search=Idea&status=Validated', None),
+        ('GET', '/api/app-ideas?sort=score', None),
+        ('GET', '/api/app-ideas?status=Validated&facets=status,mrr_range,difficulty,competition_level', None),
+        ('GET', '/api/suggest?q=inv', None),
+        ('GET', '/api/projects?include_archived=1', None),
+        ('GET', '/api/sync?since=1', None),
+        ('POST', '/api/app-ideas', {'name': 'Plan check idea'}),
+        ('PUT', f'/api/app-ideas/{idea_id}', {'status': 'Validated'}),
+        ('PUT', f'/api/projects/{project_id}', {'progress': 50}),
+        ('PUT', f'/api/tasks/{task_id}', {'status': 'completed'}),
+        ('POST', f'/api/game-plan/{step_id}/data', {'go_no_go': 'go'}),
+        ('PUT', f'/api/game-plan/{step_id}', {'status': 'completed'}),
+        ('POST', f'/api/projects/{project_id}/kill', None),
+        ('POST', f'/api/projects/{project_id}/revive', None),
+        ('DELETE', f'/api/tasks/{task_id}', None),
+        ('DELETE', f'/api/app-ideas/{idea_id}', None),
+    ]
+    return requests
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when a hot query reads a table without an index')
+    parser.add_argument('--database-url', help='Disposable database to seed and test (default: temporary SQLite)')
+    parser.add_argument('--verbose', action='store_true', help='Print the plan of every statement')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='plan-check-')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'plans.db')}"
+    os.environ.pop('SQLITE_SHARD_DIR', None)
+    os.environ['LAZY_INIT'] = '0'
+
+    from sqlalchemy import event
+    from app import app, db
+    from seed_data import seed
+    import slow_queries
+
+    with app.app_context():
+        print(f"🌱 Seeding {db.engine.url.render_as_string(hide_password=True)}")
+        if db.engine.dialect.name == 'postgresql':
+            @event.listens_for(db.engine, 'connect')
+            def disable_seqscan(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute('SET enable_seqscan = off')
+                cursor.close()
+            db.engine.dispose()
+        seed(PLAN_CHECK_ROWS)
+        requests = build_requests()
+        db.session.remove()
+
+    tables = set(db.metadata.tables)
+    client = app.test_client()
+    problems, statements = [], 0
+    for method, url, body in requests:
+        with slow_queries.capture() as records:
+            response = client.open(url, method=method, json=body)
+        print(f"{'✅' if response.status_code < 500 else '❌'} {method} {url} -> {response.status_code} "
+              f"({len(records)} statements)")
+        for record in records:
+            statements += 1
+            sql = ' '.join(record['sql'].split())
+            if args.verbose and record['plan']:
+                print(f"   {sql[:120]}")
+                for line in record['plan']:
+                    print(f"      {line}")
+            if record.get('plan_error'):
+                print(f"   ⚠️  Could not explain: {record['plan_error']}")
+            # Subqueries and CTEs show up as scans of their alias - only real tables count
+            scans = [table for table in record['full_scans'] if table in tables and table not in ALLOWED_SCANS]
+            if scans and is_filtered(record['sql']):
+                problems.append((method, url, scans, sql))
+        if response.status_code >= 500:
+            problems.append((method, url, [], f'HTTP {response.status_code}'))
+
+    print(f"\n🔍 Checked {statements} statements from {len(requests)} requests")
+    if not problems:
+        print("✅ Every filtered query uses an index")
+        return 0
+    print(f"❌ {len(problems)} queries read a table without an index:")
+    for method, url, scans, sql in problems:
+        print(f"   {method} {url}: {', '.join(scans) or 'request failed'}\n      {sql[:300]}")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
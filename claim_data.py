@@ -0,0 +1,97 @@
+"""
+Legacy Data Claiming
+
+Assigns legacy rows (created before sign-in existed, so user_id IS NULL) to a
+Supabase user with set-based UPDATE ... RETURNING statements instead of
+loading every row into the ORM. Work is done in bounded batches that each
+commit on their own, so claiming a very large legacy set never holds one long
+transaction.
+
+Used by POST /api/auth/migrate-data and migrate_data_to_user.py.
+"""
+
+DEFAULT_BATCH_SIZE = 5000
+
+def claim_batch(model, user_id, version, batch_size):
+    """Claim up to batch_size unowned rows of model and return their ids"""
+    from app import db
+
+    unowned = db.select(model.id).where(model.user_id.is_(None)).limit(batch_size)
+    if db.engine.dialect.update_returning:
+        statement = (
+            db.update(model)
+            .where(model.id.in_(unowned.scalar_subquery()))
+            .values(user_id=user_id, version=version)
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        return db.session.execute(statement).scalars().all()
+
+    # Databases without UPDATE ... RETURNING: pick the ids first, then update exactly those
+    ids = db.session.execute(unowned).scalars().all()
+    if ids:
+        db.session.execute(
+            db.update(model).where(model.id.in_(ids)).values(user_id=user_id, version=version)
+            .execution_options(synchronize_session=False)
+        )
+    return ids
+
+def touch_project_children(project_ids, version):
+    """Bump the sync version of tasks, steps and step data under newly claimed projects
+
+    The claimed user's replica has never seen these rows, so they have to show up
+    in the next delta. The UPDATE row counts double as the migration report.
+    """
+    from app import db, Task, GamePlanStep, GamePlanStepData
+
+    options = {'synchronize_session': False}
+    tasks = db.session.execute(
+        db.update(Task).where(Task.project_id.in_(project_ids)).values(version=version).execution_options(**options)
+    ).rowcount
+    steps = db.session.execute(
+        db.update(GamePlanStep).where(GamePlanStep.project_id.in_(project_ids)).values(version=version)
+        .execution_options(**options)
+    ).rowcount
+    step_ids = db.select(GamePlanStep.id).where(GamePlanStep.project_id.in_(project_ids)).scalar_subquery()
+    step_data = db.session.execute(
+        db.update(GamePlanStepData).where(GamePlanStepData.step_id.in_(step_ids)).values(version=version)
+        .execution_options(**options)
+    ).rowcount
+    return tasks, steps, step_data
+
+def claim_legacy_data(user_id, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Assign every unowned idea, project and activity to user_id and return per-entity counts
+
+    Must run inside an app context. progress(entity, claimed_so_far) is called
+    after each committed batch.
+    """
+    from app import db, AppIdea, Project, UserActivity, next_sync_version
+
+    claimed = {'ideas': 0, 'projects': 0, 'tasks': 0, 'steps': 0, 'step_data': 0, 'activities': 0}
+    for entity, model in (('ideas', AppIdea), ('projects', Project), ('activities', UserActivity)):
+        while True:
+            try:
+                version = next_sync_version()
+                ids = claim_batch(model, user_id, version, batch_size)
+                if ids and model is Project:
+                    tasks, steps, step_data = touch_project_children(ids, version)
+                    claimed['tasks'] += tasks
+                    claimed['steps'] += steps
+                    claimed['step_data'] += step_data
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            claimed[entity] += len(ids)
+            if ids and progress:
+                progress(entity, claimed[entity])
+            if len(ids) < batch_size:
+                break
+    if any(claimed.values()):
+        from suggest import invalidate
+        invalidate(user_id, None)
+    if claimed['ideas']:
+        # Claimed ideas were scored with the anonymous weights
+        from scoring import rescore_user
+        rescore_user(user_id, batch_size)
+    return claimed
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Ideas
+
+Finds ideas that say the same thing in different words without comparing
+every pair. Each idea's name, description and problem_to_solve are
+normalised (lowercase, punctuation dropped) and cut into overlapping
+SHINGLE_SIZE-character shingles. A MinHash signature of NUM_HASHES values
+estimates the Jaccard similarity of two shingle sets: the share of positions
+where the signatures agree.
+
+Locality-sensitive hashing groups the signature into BANDS bands of
+ROWS_PER_BAND values; two ideas that agree on a whole band share that band's
+bucket. Ideas above about 50% similarity almost always share a bucket,
+and ideas below 30% rarely do. So candidates are found with an index lookup
+and only they are compared.
+
+Signatures (idea_signature) and buckets (idea_lsh_bucket) are kept up to date
+on every write:
+- ORM writes re-index the ideas whose text changed (after_flush in app.py)
+- imports index each chunk
+- deleted ideas lose their rows through ON DELETE CASCADE
+
+POST /api/app-ideas lists possible duplicates of the new idea (or refuses
+it with ?reject_duplicates=1), and GET /api/app-ideas/duplicates clusters
+all of a user's ideas. The report reads each bucket once, and it caps
+buckets at MAX_BUCKET_SIZE, so it runs in near-linear time.
+
+Usage:
+    python duplicates.py index                  # index ideas that have no signature yet
+    python duplicates.py report --user USER_ID  # clusters of near-duplicates ('anonymous' for legacy ideas)
+    python duplicates.py report --threshold 0.7
+"""
+
+import argparse
+import re
+import sys
+import time
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_HASHES = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_HASHES // BANDS
+DEFAULT_THRESHOLD = 0.5
+MAX_BUCKET_SIZE = 100
+MAX_CANDIDATES = 200
+DEFAULT_BATCH_SIZE = 500
+TEXT_FIELDS = ('name', 'description', 'problem_to_solve')
+
+# Fixed hash family (a * x + b) mod p, so signatures are comparable across processes and restarts
+MERSENNE_PRIME = (1 << 61) - 1
+_parameters = np.random.default_rng(20240611).integers(1, 1 << 32, size=(2, NUM_HASHES), dtype=np.uint64)
+HASH_A, HASH_B = _parameters
+
+# Signatures
+
+def shingles(text):
+    """crc32 of each character shingle of the normalised text (one shingle for very short text)"""
+    text = ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode('utf-8'))} if text else set()
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode('utf-8')) for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def idea_text(idea):
+    """The indexed text of an AppIdea object or a mapping"""
+    get = idea.get if isinstance(idea, Mapping) else lambda field: getattr(idea, field, None)
+    return ' '.join(str(get(field)) for field in TEXT_FIELDS if get(field))
+
+def signature(text):
+    """uint32[NUM_HASHES] MinHash signature of a text, or None when it has no shingles"""
+    values = shingles(text)
+    if not values:
+        return None
+    x = np.fromiter(values, dtype=np.uint64, count=len(values))
+    # a, b and x are all below 2**32, so a * x + b fits in 64 bits
+    hashed = (HASH_A[:, None] * x[None, :] + HASH_B[:, None]) % MERSENNE_PRIME
+    return (hashed.min(axis=1) & 0xFFFFFFFF).astype(np.uint32)
+
+def buckets(sig):
+    """One bucket key per band: the band number in the high bits, a hash of its rows in the low 32"""
+    bands = sig.reshape(BANDS, ROWS_PER_BAND)
+    return [(band << 32) | zlib.crc32(bands[band].tobytes()) for band in range(BANDS)]
+
+def similarity(sig, others):
+    """Estimated Jaccard similarity of sig with each row of others"""
+    return (np.asarray(others) == sig).mean(axis=1)
+
+def decode(blob):
+    return np.frombuffer(blob, dtype=np.uint32)
+
+# Index maintenance
+
+def index_tables(metadata=None):
+    if metadata is None:
+        from app import db
+        metadata = db.metadata
+    return metadata.tables['idea_signature'], metadata.tables['idea_lsh_bucket']
+
+def index_ideas(connection, ideas, metadata=None):
+    """(Re)write the signature and buckets of ideas - AppIdea objects or mappings with id and TEXT_FIELDS"""
+    signatures, bucket_rows = index_tables(metadata)
+    ids = [idea['id'] if isinstance(idea, Mapping) else idea.id for idea in ideas]
+    if not ids:
+        return 0
+    connection.execute(bucket_rows.delete().where(bucket_rows.c.idea_id.in_(ids)))
+    connection.execute(signatures.delete().where(signatures.c.idea_id.in_(ids)))
+    signature_values, bucket_values = [], []
+    for idea_id, idea in zip(ids, ideas):
+        sig = signature(idea_text(idea))
+        if sig is None:
+            continue
+        signature_values.append({'idea_id': idea_id, 'signature': sig.tobytes()})
+        bucket_values.extend({'idea_id': idea_id, 'bucket': key} for key in set(buckets(sig)))
+    if signature_values:
+        connection.execute(signatures.insert(), signature_values)
+        connection.execute(bucket_rows.insert(), bucket_values)
+    return len(signature_values)
+
+def index_missing(engine, metadata=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Index every idea that has no signature yet; returns how many were indexed"""
+    from sqlalchemy import select
+    signatures, _ = index_tables(metadata)
+    ideas = (metadata or signatures.metadata).tables['app_idea']
+    query = select(ideas.c.id, *[ideas.c[field] for field in TEXT_FIELDS]).where(
+        ~select(signatures.c.idea_id).where(signatures.c.idea_id == ideas.c.id).exists())
+
+    indexed = last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                query.where(ideas.c.id > last_id).order_by(ideas.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            index_ideas(connection, rows, metadata)
+        indexed += len(rows)
+        if progress:
+            progress(indexed)
+    return indexed
+
+# Queries
+
+def find_similar(session, user_id, idea, threshold=DEFAULT_THRESHOLD, exclude_id=None, limit=10):
+    """Ideas of user_id whose text is at least `threshold` similar to idea (an object or mapping)"""
+    from app import db, AppIdea, owned_by
+    signatures, bucket_rows = index_tables()
+    sig = signature(idea_text(idea))
+    if sig is None:
+        return []
+    query = (
+        db.select(bucket_rows.c.idea_id).distinct()
+        .join(AppIdea.__table__, AppIdea.__table__.c.id == bucket_rows.c.idea_id)
+        .where(bucket_rows.c.bucket.in_(buckets(sig)), owned_by(AppIdea.__table__.c.user_id, user_id))
+        .limit(MAX_CANDIDATES)
+    )
+    if exclude_id is not None:
+        query = query.where(bucket_rows.c.idea_id != exclude_id)
+    with session.no_autoflush:
+        candidates = session.execute(
+            db.select(signatures.c.idea_id, signatures.c.signature, AppIdea.name)
+            .join(AppIdea.__table__, AppIdea.__table__.c.id == signatures.c.idea_id)
+            .where(signatures.c.idea_id.in_(query))
+        ).all()
+    if not candidates:
+        return []
+    scores = similarity(sig, [decode(row.signature) for row in candidates])
+    matches = sorted(
+        ({'id': row.idea_id, 'name': row.name, 'similarity': round(float(score), 3)}
+         for row, score in zip(candidates, scores) if score >= threshold),
+        key=lambda match: -match['similarity']
+    )
+    return matches[:limit]
+
+def cluster_report(session, user_id, threshold=DEFAULT_THRESHOLD, max_bucket_size=MAX_BUCKET_SIZE):
+    """Groups of near-duplicate ideas owned by user_id, largest first
+
+    Every bucket with 2..max_bucket_size ideas yields candidate pairs; pairs
+    at or above the threshold are joined with union-find. Bigger buckets
+    (very generic text) are skipped and counted.
+    """
+    from app import db, AppIdea, owned_by
+    signatures, bucket_rows = index_tables()
+    ideas = AppIdea.__table__
+    started = time.perf_counter()
+
+    rows = session.execute(
+        db.select(bucket_rows.c.bucket, bucket_rows.c.idea_id)
+        .join(ideas, ideas.c.id == bucket_rows.c.idea_id)
+        .where(owned_by(ideas.c.user_id, user_id))
+    ).all()
+    report = {'threshold': threshold, 'ideas_indexed': 0, 'candidate_pairs': 0, 'skipped_buckets': 0,
+              'clusters': []}
+    if not rows:
+        return report
+    keys = np.array([row[0] for row in rows], dtype=np.int64)
+    idea_ids = np.array([row[1] for row in rows], dtype=np.int64)
+    order = np.argsort(keys, kind='stable')
+    keys, idea_ids = keys[order], idea_ids[order]
+    report['ideas_indexed'] = int(len(np.unique(idea_ids)))
+
+    # Candidate pairs from each shared bucket
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    pairs = set()
+    for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+        if size > max_bucket_size:
+            report['skipped_buckets'] += 1
+            continue
+        members = idea_ids[start:start + size].tolist()
+        pairs.update((a, b) if a < b else (b, a) for i, a in enumerate(members) for b in members[i + 1:])
+    report['candidate_pairs'] = len(pairs)
+    if not pairs:
+        return report
+
+    involved = sorted({idea_id for pair in pairs for idea_id in pair})
+    position = {idea_id: index for index, idea_id in enumerate(involved)}
+    stored = dict(session.execute(
+        db.select(signatures.c.idea_id, signatures.c.signature).where(signatures.c.idea_id.in_(involved))
+    ).all())
+    matrix = np.stack([decode(stored[idea_id]) for idea_id in involved])
+    left = np.array([position[a] for a, _ in pairs])
+    right = np.array([position[b] for _, b in pairs])
+    scores = (matrix[left] == matrix[right]).mean(axis=1)
+
+    parent = list(range(len(involved)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best = {}
+    for a, b, score in zip(left, right, scores):
+        if score >= threshold:
+            parent[root(a)] = root(b)
+            best[a] = max(best.get(a, 0), score)
+            best[b] = max(best.get(b, 0), score)
+
+    groups = {}
+    for index in best:
+        groups.setdefault(root(index), []).append(index)
+    names = dict(session.execute(
+        db.select(ideas.c.id, ideas.c.name).where(ideas.c.id.in_([involved[i] for i in best]))
+    ).all())
+    for members in sorted(groups.values(), key=len, reverse=True):
+        report['clusters'].append([
+            {'id': involved[i], 'name': names.get(involved[i]), 'best_similarity': round(float(best[i]), 3)}
+            for i in sorted(members, key=lambda i: involved[i])
+        ])
+    report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate ideas via MinHash/LSH')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('index', help='Index ideas that have no signature yet')
+    report = commands.add_parser('report', help='Print clusters of near-duplicate ideas')
+    report.add_argument('--user', help="User id ('anonymous' for ideas without one)")
+    report.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    from app import app, db, shard_router
+    with app.app_context():
+        if args.command == 'index':
+            started = time.monotonic()
+            indexed = index_missing(db.engine, db.metadata, progress=lambda n: print(f"   {n:,} ideas indexed"))
+            print(f"✅ Indexed {indexed:,} ideas in {time.monotonic() - started:.1f}s")
+            return 0
+
+        user_id = None if args.user in (None, 'anonymous') else args.user
+        with shard_router.use_shard(user_id):
+            result = cluster_report(db.session, user_id, args.threshold)
+        print(f"🔍 {result['ideas_indexed']:,} ideas, {result['candidate_pairs']:,} candidate pairs, "
+              f"{len(result['clusters']):,} clusters")
+        for cluster in result['clusters']:
+            print('   • ' + ', '.join(f"#{idea['id']} {idea['name']}" for idea in cluster))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
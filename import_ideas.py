@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Bulk Idea Import
+
+Streams app ideas from a CSV or NDJSON (one JSON object per line) file into
+the database. Rows are validated against the AppIdea columns and inserted in
+chunks with one multi-row INSERT per chunk, so memory stays flat no matter
+how large the file is. Bad rows are reported and skipped - they never abort
+the import.
+
+Usage:
+    python import_ideas.py ideas.csv
+    python import_ideas.py ideas.ndjson --user-id YOUR_SUPABASE_USER_ID
+    python import_ideas.py ideas.csv --dedupe source_url --chunk-size 1000
+
+The same importer backs POST /api/app-ideas/import.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+DEDUPE_FIELDS = ('name', 'source_url')
+
+# Columns the importer never takes from the file
+PROTECTED_COLUMNS = {'id', 'user_id', 'score', 'created_at', 'updated_at', 'version'}
+
+def get_importable_columns():
+    """Map AppIdea column name -> (python type, max length) for every importable column"""
+    from app import AppIdea
+    columns = {}
+    for column in AppIdea.__table__.columns:
+        if column.name in PROTECTED_COLUMNS:
+            continue
+        python_type = column.type.python_type
+        columns[column.name] = (python_type, getattr(column.type, 'length', None))
+    return columns
+
+def clean_row(raw, columns):
+    """Validate one raw row and return the values to insert (raises ValueError on bad data)"""
+    if not isinstance(raw, dict):
+        raise ValueError('Row must be an object')
+
+    row = {}
+    for key, value in raw.items():
+        if key not in columns:
+            continue
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        python_type, max_length = columns[key]
+        if python_type is float:
+            if isinstance(value, str):
+                value = value.strip().replace('$', '').replace(',', '')
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a number, got {raw[key]!r}")
+        else:
+            value = str(value).strip()
+            if max_length and len(value) > max_length:
+                raise ValueError(f"{key} is longer than {max_length} characters")
+        row[key] = value
+
+    if not row.get('name'):
+        raise ValueError('name is required')
+    row.setdefault('mrr_range', '$10k-30k')
+    row.setdefault('status', 'Researching')
+    return row
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, raw_row) pairs from a text stream without reading it all into memory"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for raw in reader:
+            yield reader.line_num, raw
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+    else:
+        raise ValueError(f"Unsupported format '{fmt}' (expected csv or ndjson)")
+
+def import_ideas(stream, fmt='csv', user_id=None, chunk_size=DEFAULT_CHUNK_SIZE, dedupe=None, progress=None):
+    """Import ideas from a text stream and return a summary report
+
+    Must run inside an app context. Each chunk is committed on its own, so a
+    failure part-way through keeps the chunks already written.
+    """
+    from app import db, AppIdea, next_sync_version, owned_by, track_activity
+    from duplicates import index_ideas
+    from scoring import compute_scores, get_weights
+    from suggest import queue_change
+
+    if dedupe and dedupe not in DEDUPE_FIELDS:
+        raise ValueError(f"dedupe must be one of {', '.join(DEDUPE_FIELDS)}")
+
+    columns = get_importable_columns()
+    weights = get_weights(db.session, user_id)
+    report = {'processed': 0, 'inserted': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+
+    def record_error(row_number, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'error': message})
+
+    def flush_chunk(chunk):
+        if dedupe:
+            # One IN query per chunk finds rows already stored by this user (earlier chunks included)
+            dedupe_column = getattr(AppIdea, dedupe)
+            values = {row[dedupe] for _, row in chunk if row.get(dedupe)}
+            existing = set()
+            if values:
+                existing = set(db.session.scalars(
+                    db.select(dedupe_column).where(dedupe_column.in_(values), owned_by(AppIdea.user_id, user_id))
+                ))
+            unique = []
+            for row_number, row in chunk:
+                value = row.get(dedupe)
+                if value and value in existing:
+                    report['duplicates'] += 1
+                    continue
+                if value:
+                    existing.add(value)
+                unique.append((row_number, row))
+            chunk = unique
+        if not chunk:
+            return
+
+        version = next_sync_version()
+        now = datetime.utcnow()
+        # Bulk inserts skip the ORM listeners that score ideas - score the chunk in one go
+        scores = compute_scores([row for _, row in chunk], weights)
+        ids = db.session.scalars(db.insert(AppIdea).returning(AppIdea.id, sort_by_parameter_order=True), [
+            dict(row, user_id=user_id, score=float(score), version=version, created_at=now, updated_at=now)
+            for (_, row), score in zip(chunk, scores)
+        ]).all()
+        # Same for the near-duplicate index, now that the ids are known
+        index_ideas(db.session.connection(), [dict(row, id=idea_id) for (_, row), idea_id in zip(chunk, ids)])
+        # A rebuild is cheaper than inserting a whole chunk into the typeahead index
+        queue_change(db.session, user_id)
+        db.session.commit()
+        report['inserted'] += len(chunk)
+        if progress:
+            progress(report)
+
+    chunk = []
+    for row_number, raw in iter_rows(stream, fmt):
+        report['processed'] += 1
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            chunk.append((row_number, clean_row(raw, columns)))
+        except ValueError as e:
+            record_error(row_number, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush_chunk(chunk)
+            chunk = []
+    flush_chunk(chunk)
+
+    report['errors_truncated'] = report['failed'] > len(report['errors'])
+    if report['inserted']:
+        track_activity('idea_created', notes=f"Imported {report['inserted']} ideas", user_id=user_id)
+    return report
+
+def detect_format(filename):
+    return 'ndjson' if filename.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream app ideas from CSV or NDJSON into the database')
+    parser.add_argument('file', help='CSV or NDJSON file to import')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='File format (default: from extension)')
+    parser.add_argument('--user-id', help='Supabase user ID that will own the ideas')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per INSERT')
+    parser.add_argument('--dedupe', choices=DEDUPE_FIELDS, help='Skip rows whose name/source_url already exists')
+    args = parser.parse_args()
+
+    from app import app, shard_router
+    fmt = args.format or detect_format(args.file)
+    started = datetime.now()
+    print(f"📥 Importing {args.file} ({fmt})...")
+
+    def progress(report):
+        print(f"   {report['inserted']:,} inserted, {report['failed']:,} failed, {report['duplicates']:,} duplicates")
+
+    with app.app_context(), shard_router.use_shard(args.user_id):
+        with open(args.file, newline='', encoding='utf-8-sig') as stream:
+            report = import_ideas(stream, fmt, args.user_id, args.chunk_size, args.dedupe, progress)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"\n✅ Imported {report['inserted']:,} of {report['processed']:,} rows in {elapsed:.1f}s")
+    if report['duplicates']:
+        print(f"   Skipped {report['duplicates']:,} duplicates")
+    if report['failed']:
+        print(f"   ⚠️  {report['failed']:,} rows failed validation:")
+        for error in report['errors'][:20]:
+            print(f"      row {error['row']}: {error['error']}")
+    return 0 if not report['failed'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cold Start Import Report
+
+Imports the Vercel entry point (api/index.py) in a fresh interpreter with
+`python -X importtime` and reports where the time goes: the total, a
+per-package breakdown of self time, and the slowest individual modules.
+Each run is a new process, so nothing is cached in sys.modules.
+
+With --budget-ms it doubles as a regression check: the exit code is 1 when
+the fastest of --repeat runs is over budget, so it can gate CI or a deploy.
+
+Usage:
+    python import_report.py                        # lazy init, as on Vercel
+    python import_report.py --eager                # LAZY_INIT=0, as locally
+    python import_report.py --budget-ms 600 --repeat 5
+    python import_report.py --module app --top 30
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def import_statement(module):
+    if module == 'api.index':
+        # api/ is not a package - Vercel loads index.py from it directly
+        return "import sys; sys.path.insert(0, 'api'); import index"
+    return f'import {module}'
+
+def run_import(module, eager=False):
+    """Import module in a fresh interpreter and return [(module, self_us, cumulative_us, depth)]"""
+    env = dict(os.environ, LAZY_INIT='0' if eager else '1', PYTHONDONTWRITEBYTECODE='1')
+    if not eager:
+        env.setdefault('VERCEL', '1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', import_statement(module)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{result.stderr[-2000:]}')
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+def summarize(entries):
+    """Total import time plus self time grouped by top-level package"""
+    total_us = sum(cumulative for _, _, cumulative, depth in entries if depth == 0)
+    packages = {}
+    for name, self_us, _, _ in entries:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return total_us, packages
+
+def main():
+    parser = argparse.ArgumentParser(description='Report (and budget) the cold import time of the Vercel handler')
+    parser.add_argument('--module', default='api.index', help='Module to import (default: api.index)')
+    parser.add_argument('--eager', action='store_true', help='Measure with LAZY_INIT=0')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to take the fastest of')
+    parser.add_argument('--top', type=int, default=15, help='Rows to show in each table')
+    parser.add_argument('--budget-ms', type=float, help='Fail (exit 1) if the import takes longer than this')
+    args = parser.parse_args()
+
+    runs = [run_import(args.module, args.eager) for _ in range(max(1, args.repeat))]
+    fastest = min(runs, key=lambda entries: summarize(entries)[0])
+    total_us, packages = summarize(fastest)
+
+    mode = 'eager' if args.eager else 'lazy'
+    print(f"⏱️  import {args.module} ({mode}): {total_us / 1000:.1f} ms "
+          f"(fastest of {len(runs)}, {len(fastest)} modules)")
+
+    print(f"\n📦 Self time by package")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {self_us / 1000:8.1f} ms  {100 * self_us / total_us:5.1f}%  {package}")
+
+    print(f"\n🐢 Slowest modules (cumulative)")
+    slowest = sorted(fastest, key=lambda entry: -entry[2])
+    for name, self_us, cumulative_us, _ in slowest[:args.top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    if args.budget_ms is not None:
+        if total_us / 1000 > args.budget_ms:
+            print(f"\n❌ Cold import is over budget: {total_us / 1000:.1f} ms > {args.budget_ms:.0f} ms")
+            return 1
+        print(f"\n✅ Within budget: {total_us / 1000:.1f} ms <= {args.budget_ms:.0f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+Background Jobs
+
+A small job queue kept in the app's own database (the background_job table),
+so slow work - game plan generation, claiming legacy data, imports, exports,
+stats recomputation, backups - can leave the request: the route queues a job
+and answers 202 Accepted with a link to GET /api/jobs/<id>.
+
+Routes only queue a job when asked to, with ?async=1 or a
+"Prefer: respond-async" header; otherwise they run the work inline as before.
+
+The worker runs jobs on a thread pool; kinds marked process=True (backups,
+exports) go to a process pool instead, so compression and serialisation
+don't hold the GIL the other jobs need. A job is claimed with a conditional
+UPDATE, so any number of worker processes - sidecars or gunicorn workers - can
+share one queue without running a job twice. Failed jobs are retried with
+exponential backoff up to their max_attempts. Running jobs are heartbeated,
+and a job whose worker died is picked up again once its lock goes stale.
+
+The scheduler enqueues periodic jobs from cron expressions (UTC): backups,
+archiving, VACUUM and purging finished jobs. Each schedule slot has a dedupe
+key, so it runs once however many schedulers are up. Override a schedule
+with JOB_SCHEDULE_<NAME>='<cron>' or turn it off with 'off'.
+
+Usage:
+    python jobs.py worker                          # threads + processes + scheduler
+    python jobs.py worker --threads 8 --processes 2 --no-scheduler
+    python jobs.py enqueue backup
+    python jobs.py enqueue generate_game_plan --payload '{"project_id": 3}'
+    python jobs.py list                            # recent jobs
+    JOBS_IN_PROCESS=1 python serve.py              # or: a worker thread inside each web worker
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+DEFAULT_THREADS = 4
+DEFAULT_PROCESSES = 2
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0  # Seconds an idle worker thread waits before looking again
+HEARTBEAT_INTERVAL = 30
+LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT', 300))  # No heartbeat for this long: the worker died
+RETRY_BASE_SECONDS = int(os.environ.get('JOB_RETRY_BASE_SECONDS', 30))
+RETRY_MAX_SECONDS = 3600
+RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR', 'job_files')  # Uploads waiting to be imported, finished exports
+
+# (name, cron, kind, payload) - minute hour day-of-month month day-of-week, in UTC
+SCHEDULE = [
+    ('backup', '0 * * * *', 'backup', {}),
+    ('archive', '0 3 * * *', 'archive', {}),
+    ('vacuum', '30 3 * * 0', 'vacuum', {}),
+    ('purge_jobs', '15 4 * * *', 'purge_jobs', {}),
+]
+
+class JobError(Exception):
+    """Raised by a handler for a failure that retrying won't fix"""
+
+# Handler registry
+
+HANDLERS = {}
+
+def handler(kind, process=False, max_attempts=DEFAULT_MAX_ATTEMPTS, system=False):
+    """Register fn(payload, job) as the handler for kind
+
+    process: run in the process pool. system: maintenance work that users
+    can't see through the API. The return value (JSON-serialisable) becomes
+    the job's result.
+    """
+    def register(fn):
+        HANDLERS[kind] = {'fn': fn, 'process': process, 'max_attempts': max_attempts, 'system': system}
+        return fn
+    return register
+
+def is_user_job(kind):
+    return kind in HANDLERS and not HANDLERS[kind]['system']
+
+class JobContext:
+    """What a handler gets besides its payload"""
+
+    def __init__(self, job_id, user_id):
+        self.id = job_id
+        self.user_id = user_id
+
+    def progress(self, report):
+        """Publish a progress report (any JSON value); also counts as a heartbeat"""
+        from app import db, BackgroundJob
+        table = BackgroundJob.__table__
+        with db.engine.begin() as connection:
+            connection.execute(table.update().where(table.c.id == self.id).values(
+                progress=json.dumps(report, default=str), locked_at=datetime.utcnow()))
+
+# Queue
+
+def job_table():
+    from app import BackgroundJob
+    return BackgroundJob.__table__
+
+def enqueue(kind, payload=None, user_id=None, run_at=None, max_attempts=None, dedupe_key=None):
+    """Queue a job; returns its id, or None when dedupe_key was already used. Needs an app context."""
+    from sqlalchemy.exc import IntegrityError
+    from app import db
+
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    now = datetime.utcnow()
+    values = {
+        'kind': kind, 'user_id': user_id, 'payload': json.dumps(payload or {}), 'status': 'queued',
+        'attempts': 0, 'max_attempts': max_attempts or HANDLERS[kind]['max_attempts'],
+        'run_at': run_at or now, 'dedupe_key': dedupe_key, 'created_at': now,
+    }
+    try:
+        with db.engine.begin() as connection:
+            return connection.execute(job_table().insert().values(**values)).inserted_primary_key[0]
+    except IntegrityError:
+        if dedupe_key is None:
+            raise
+        return None
+
+def get_job(job_id):
+    from app import db
+    table = job_table()
+    with db.engine.connect() as connection:
+        return connection.execute(table.select().where(table.c.id == job_id)).mappings().first()
+
+def list_jobs(user_id=None, status=None, limit=50, include_system=False):
+    from app import db
+    table = job_table()
+    query = table.select().order_by(table.c.id.desc()).limit(limit)
+    if not include_system:
+        query = query.where(table.c.user_id == user_id if user_id else table.c.user_id.is_(None))
+        query = query.where(table.c.kind.in_([kind for kind in HANDLERS if is_user_job(kind)]))
+    if status:
+        query = query.where(table.c.status == status)
+    with db.engine.connect() as connection:
+        return connection.execute(query).mappings().all()
+
+def serialize_job(job):
+    def load(value):
+        return json.loads(value) if value else None
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'max_attempts': job['max_attempts'],
+        'progress': load(job['progress']),
+        'result': load(job['result']),
+        'error': job['error'],
+        'run_at': job['run_at'].isoformat() if job['run_at'] else None,
+        'created_at': job['created_at'].isoformat() if job['created_at'] else None,
+        'started_at': job['started_at'].isoformat() if job['started_at'] else None,
+        'finished_at': job['finished_at'].isoformat() if job['finished_at'] else None,
+    }
+
+def claimable(table, now):
+    """Queued jobs that are due, and running jobs whose worker stopped heartbeating"""
+    from sqlalchemy import and_, or_
+    return or_(
+        and_(table.c.status == 'queued', table.c.run_at <= now),
+        and_(table.c.status == 'running', table.c.locked_at < now - timedelta(seconds=LOCK_TIMEOUT),
+             table.c.attempts < table.c.max_attempts),
+    )
+
+def claim_next(worker_name):
+    """Claim the next due job for worker_name; returns its row or None"""
+    from app import db
+    table = job_table()
+    now = datetime.utcnow()
+    query = db.select(table.c.id).where(claimable(table, now)).order_by(table.c.run_at, table.c.id).limit(5)
+    with db.engine.connect() as connection:
+        candidates = connection.execute(query).scalars().all()
+
+    for job_id in candidates:
+        # Conditional UPDATE: only one worker's claim matches, the others see rowcount 0 and move on
+        with db.engine.begin() as connection:
+            claimed = connection.execute(table.update().where(table.c.id == job_id, claimable(table, now)).values(
+                status='running', locked_by=worker_name, locked_at=now, started_at=now,
+                attempts=table.c.attempts + 1,
+            )).rowcount
+        if claimed == 1:
+            return get_job(job_id)
+    return None
+
+def finish(job, worker_name, result=None, error=None, permanent=False):
+    """Record a job's outcome - or schedule its retry - if worker_name still holds it"""
+    from app import db
+    table = job_table()
+    now = datetime.utcnow()
+    if error is None:
+        values = {'status': 'succeeded', 'result': json.dumps(result, default=str), 'error': None}
+    elif permanent or job['attempts'] >= job['max_attempts']:
+        values = {'status': 'failed', 'error': error}
+    else:
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (job['attempts'] - 1))
+        values = {'status': 'queued', 'error': error,
+                  'run_at': now + timedelta(seconds=delay * random.uniform(0.9, 1.1))}
+    if values['status'] != 'queued':
+        values['finished_at'] = now
+    with db.engine.begin() as connection:
+        connection.execute(table.update().where(table.c.id == job['id'], table.c.locked_by == worker_name)
+                           .values(locked_by=None, locked_at=None, **values))
+    return values['status']
+
+def run_handler(kind, payload, job_id, user_id):
+    """Run a job's handler; returns (result, error, permanent). Needs an app context."""
+    from app import db
+    from sharding import shard_router
+    if kind not in HANDLERS:
+        return None, f"Unknown job kind: {kind}", True
+    try:
+        # User jobs see the same data their routes do - the user's shard when sharding is on
+        with shard_router.use_shard(user_id):
+            return HANDLERS[kind]['fn'](payload, JobContext(job_id, user_id)), None, False
+    except JobError as e:
+        return None, str(e), True
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}', False
+    finally:
+        db.session.remove()
+
+def run_in_process(kind, payload, job_id, user_id):
+    """Process pool entry point - a fresh interpreter with its own engine"""
+    os.environ.setdefault('LAZY_INIT', '1')
+    from app import app
+    with app.app_context():
+        result, error, permanent = run_handler(kind, payload, job_id, user_id)
+    # Only plain JSON values cross back to the parent
+    return json.loads(json.dumps(result, default=str)), error, permanent
+
+# Worker
+
+class Worker:
+    """Runs queued jobs on `threads` threads, handing process=True kinds to `processes` processes"""
+
+    def __init__(self, threads=DEFAULT_THREADS, processes=DEFAULT_PROCESSES, scheduler=True):
+        self.name = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.threads = max(1, threads)
+        self.processes = processes
+        self.scheduler = scheduler
+        self.stopping = threading.Event()
+        self.running = set()
+        self.running_lock = threading.Lock()
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        self.workers = []
+
+    def start(self):
+        if self.processes:
+            self.pool = self.new_pool()
+        targets = [self.work] * self.threads + [self.heartbeat]
+        if self.scheduler:
+            targets.append(self.schedule)
+        for target in targets:
+            thread = threading.Thread(target=target, name=f'jobs-{target.__name__}', daemon=True)
+            thread.start()
+            self.workers.append(thread)
+        print(f"⚙️  Job worker {self.name}: {self.threads} threads, {self.processes} processes, "
+              f"scheduler {'on' if self.scheduler else 'off'}")
+
+    def new_pool(self):
+        # spawn, not fork: the parent has threads and open connections
+        return ProcessPoolExecutor(self.processes, mp_context=get_context('spawn'))
+
+    def submit(self, arguments):
+        pool = self.pool
+        try:
+            return pool.submit(run_in_process, *arguments).result()
+        except BrokenProcessPool:
+            # A child died (e.g. out of memory); later jobs get a fresh pool, this one is retried
+            with self.pool_lock:
+                if self.pool is pool:
+                    self.pool = self.new_pool()
+            raise
+
+    def stop(self, timeout=None):
+        """Finish the jobs in hand, then stop"""
+        self.stopping.set()
+        for thread in self.workers:
+            thread.join(timeout)
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+    def work(self):
+        from app import app
+        while not self.stopping.is_set():
+            try:
+                with app.app_context():
+                    job = claim_next(self.name)
+            except Exception as e:
+                print(f"⚠️  Job queue unavailable: {e}")
+                job = None
+            if job is None:
+                self.stopping.wait(POLL_INTERVAL)
+                continue
+            self.execute(job)
+
+    def execute(self, job):
+        from app import app
+        kind = job['kind']
+        with self.running_lock:
+            self.running.add(job['id'])
+        started = time.monotonic()
+        try:
+            arguments = (kind, json.loads(job['payload'] or '{}'), job['id'], job['user_id'])
+            if kind in HANDLERS and HANDLERS[kind]['process'] and self.pool is not None:
+                result, error, permanent = self.submit(arguments)
+            else:
+                with app.app_context():
+                    result, error, permanent = run_handler(*arguments)
+        except Exception as e:
+            # A broken process pool or an unreadable payload
+            result, error, permanent = None, f'{type(e).__name__}: {e}', False
+        finally:
+            with self.running_lock:
+                self.running.discard(job['id'])
+        with app.app_context():
+            status = finish(job, self.name, result, error, permanent)
+        print(f"{'✅' if status == 'succeeded' else '⚠️ '} Job {job['id']} ({kind}) {status} "
+              f"in {time.monotonic() - started:.1f}s" + (f": {error}" if error else ''))
+
+    def heartbeat(self):
+        """Keep the locks on running jobs fresh so they aren't taken for abandoned"""
+        from app import app, db
+        table = job_table()
+        while not self.stopping.wait(HEARTBEAT_INTERVAL):
+            with self.running_lock:
+                running = list(self.running)
+            if not running:
+                continue
+            try:
+                with app.app_context(), db.engine.begin() as connection:
+                    connection.execute(table.update().where(table.c.id.in_(running), table.c.locked_by == self.name)
+                                       .values(locked_at=datetime.utcnow()))
+            except Exception as e:
+                print(f"⚠️  Job heartbeat failed: {e}")
+
+    def schedule(self):
+        """Enqueue periodic jobs whose cron matches, once per minute"""
+        from app import app
+        entries = active_schedule()
+        last_minute = None
+        while not self.stopping.is_set():
+            minute = datetime.utcnow().replace(second=0, microsecond=0)
+            if minute != last_minute:
+                last_minute = minute
+                for name, cron, kind, payload in entries:
+                    if cron_matches(cron, minute):
+                        try:
+                            with app.app_context():
+                                enqueue(kind, payload, dedupe_key=f'schedule:{name}:{minute.isoformat()}')
+                        except Exception as e:
+                            print(f"⚠️  Could not schedule {name}: {e}")
+            self.stopping.wait(60 - datetime.utcnow().second + 0.5)
+
+# Scheduler
+
+def parse_cron_field(field, low, high):
+    """Set of values a cron field allows: *, */n, a, a-b, a-b/n and comma lists"""
+    values = set()
+    for part in field.split(','):
+        spec, _, step = part.partition('/')
+        if spec == '*':
+            start, end = low, high
+        elif '-' in spec:
+            start, end = (int(value) for value in spec.split('-', 1))
+        else:
+            start = end = int(spec)
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field '{field}' is outside {low}-{high}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+def cron_matches(cron, moment):
+    fields = cron.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression needs 5 fields: '{cron}'")
+    minutes, hours, days, months, weekdays = (
+        parse_cron_field(field, low, high)
+        for field, (low, high) in zip(fields, [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]))
+    weekday = (moment.weekday() + 1) % 7  # cron counts from Sunday = 0 (or 7)
+    day_ok = moment.day in days
+    weekday_ok = weekday in weekdays or (weekday == 0 and 7 in weekdays)
+    # Like cron: with both day fields restricted, either one matching is enough
+    if fields[2] != '*' and fields[4] != '*':
+        day_matches = day_ok or weekday_ok
+    else:
+        day_matches = day_ok and weekday_ok
+    return moment.minute in minutes and moment.hour in hours and moment.month in months and day_matches
+
+def active_schedule():
+    """SCHEDULE with JOB_SCHEDULE_<NAME> overrides applied"""
+    entries = []
+    for name, cron, kind, payload in SCHEDULE:
+        cron = os.environ.get(f'JOB_SCHEDULE_{name.upper()}', cron).strip()
+        if cron.lower() in ('off', 'none', ''):
+            continue
+        cron_matches(cron, datetime.utcnow())  # Fail fast on a bad expression
+        entries.append((name, cron, kind, payload))
+    return entries
+
+# In-process worker
+
+_in_process_worker = None
+
+def start_in_process(threads=None):
+    """Run a worker (threads only) inside this process, e.g. each gunicorn worker"""
+    global _in_process_worker
+    if _in_process_worker is None:
+        _in_process_worker = Worker(threads or int(os.environ.get('JOB_THREADS', 2)), processes=0)
+        _in_process_worker.start()
+    return _in_process_worker
+
+def stop_in_process():
+    """Let the in-process worker finish the jobs in hand before this process exits"""
+    global _in_process_worker
+    if _in_process_worker is not None:
+        _in_process_worker.stop()
+        _in_process_worker = None
+
+# Handlers
+
+def job_file_path(name):
+    os.makedirs(JOB_FILES_DIR, exist_ok=True)
+    return os.path.join(os.path.abspath(JOB_FILES_DIR), name)
+
+@handler('generate_game_plan')
+def generate_game_plan_job(payload, job):
+    from app import db, Project, build_game_plan
+    project = db.session.get(Project, payload['project_id'])
+    if project is None:
+        raise JobError(f"Project {payload['project_id']} not found")
+    return {'project_id': project.id, 'steps': build_game_plan(project)}
+
+@handler('claim_data')
+def claim_data_job(payload, job):
+    from claim_data import claim_legacy_data
+    if not job.user_id:
+        raise JobError('Claiming legacy data needs a signed-in user')
+    claimed = {}
+
+    def report(entity, count):
+        claimed[entity] = count
+        job.progress(claimed)
+
+    return {'migrated': claim_legacy_data(job.user_id, progress=report)}
+
+# Imports commit chunk by chunk - a retry would insert the early chunks twice
+@handler('import_ideas', max_attempts=1)
+def import_ideas_job(payload, job):
+    import io
+    from import_ideas import import_ideas
+    try:
+        with open(payload['path'], 'rb') as f:
+            stream = io.TextIOWrapper(f, encoding='utf-8-sig', newline='')
+            return import_ideas(stream, payload['format'], job.user_id, payload['chunk_size'],
+                                payload.get('dedupe'), progress=job.progress)
+    except ValueError as e:
+        raise JobError(str(e))
+    finally:
+        if os.path.exists(payload['path']):
+            os.remove(payload['path'])
+
+@handler('export', process=True)
+def export_job(payload, job):
+    from export_data import generate_export
+    fmt = payload.get('format', 'ndjson')
+    path = job_file_path(f'export-{job.id}.{fmt}')
+    size = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in generate_export(job.user_id, fmt):
+            f.write(chunk)
+            size += len(chunk)
+    return {'format': fmt, 'file': os.path.basename(path), 'characters': size}
+
+@handler('rescore_ideas')
+def rescore_ideas_job(payload, job):
+    from scoring import rescore_user
+    return {'changed': rescore_user(job.user_id, progress=job.progress)}
+
+@handler('duplicate_report')
+def duplicate_report_job(payload, job):
+    from app import db
+    from duplicates import DEFAULT_THRESHOLD, cluster_report
+    return cluster_report(db.session, job.user_id, payload.get('threshold', DEFAULT_THRESHOLD))
+
+@handler('dashboard_stats')
+def dashboard_stats_job(payload, job):
+    from app import db, dashboard_stats
+    return dashboard_stats(db.session)
+
+@handler('backup', process=True, max_attempts=2, system=True)
+def backup_job(payload, job):
+    from backup_db import backup_database, list_backups, BACKUP_DIR
+    backup_dir = payload.get('backup_dir', BACKUP_DIR)
+    if not backup_database(payload.get('compression'), backup_dir):
+        raise RuntimeError('Backup failed (see worker log)')
+    backups = list_backups(backup_dir)
+    return {'backup': backups[0][1] if backups else None}
+
+@handler('archive', system=True)
+def archive_job(payload, job):
+    from archive import archive_projects, DEFAULT_KILLED_DAYS
+    return archive_projects(payload.get('killed_days', DEFAULT_KILLED_DAYS), payload.get('inactive_days'),
+                            progress=job.progress)
+
+@handler('vacuum', system=True, max_attempts=1)
+def vacuum_job(payload, job):
+    """Reclaim space and refresh planner statistics on the shared database"""
+    from app import db
+    started = time.monotonic()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if db.engine.dialect.name == 'sqlite':
+            connection.exec_driver_sql('VACUUM')
+            connection.exec_driver_sql('PRAGMA optimize')
+        else:
+            connection.exec_driver_sql('VACUUM (ANALYZE)')
+    return {'database': db.engine.dialect.name, 'seconds': round(time.monotonic() - started, 2)}
+
+@handler('purge_jobs', system=True)
+def purge_jobs_job(payload, job):
+    """Delete finished jobs (and their files) after RETENTION_DAYS; fail jobs abandoned on their last attempt"""
+    from app import db
+    table = job_table()
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=payload.get('days', RETENTION_DAYS))
+    finished = table.c.status.in_(['succeeded', 'failed']) & (table.c.finished_at < cutoff)
+    with db.engine.begin() as connection:
+        exports = connection.execute(
+            db.select(table.c.result).where(finished, table.c.kind == 'export')).scalars().all()
+        for result in exports:
+            name = json.loads(result).get('file') if result else None
+            if name and os.path.exists(job_file_path(name)):
+                os.remove(job_file_path(name))
+        abandoned = connection.execute(table.update().where(
+            table.c.status == 'running', table.c.locked_at < now - timedelta(seconds=LOCK_TIMEOUT),
+            table.c.attempts >= table.c.max_attempts,
+        ).values(status='failed', error='Worker stopped during the last attempt', finished_at=now,
+                 locked_by=None, locked_at=None)).rowcount
+        deleted = connection.execute(table.delete().where(finished)).rowcount
+    return {'deleted': deleted, 'abandoned': abandoned}
+
+def main():
+    parser = argparse.ArgumentParser(description='Background job worker and queue tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    worker = commands.add_parser('worker', help='Run jobs until SIGTERM/Ctrl+C')
+    worker.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='Job threads')
+    worker.add_argument('--processes', type=int, default=DEFAULT_PROCESSES, help='Processes for process=True kinds')
+    worker.add_argument('--no-scheduler', action='store_true', help="Don't enqueue periodic jobs")
+    add = commands.add_parser('enqueue', help='Queue a job')
+    add.add_argument('kind', choices=sorted(HANDLERS))
+    add.add_argument('--payload', default='{}', help='JSON payload')
+    add.add_argument('--user-id', help='Run as this user')
+    show = commands.add_parser('list', help='Show recent jobs')
+    show.add_argument('--status', help='Only jobs with this status')
+    show.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault('LAZY_INIT', '0')
+    from app import app
+
+    if args.command == 'enqueue':
+        with app.app_context():
+            job_id = enqueue(args.kind, json.loads(args.payload), args.user_id)
+        print(f"✅ Queued job {job_id} ({args.kind})")
+        return 0
+
+    if args.command == 'list':
+        with app.app_context():
+            jobs = list_jobs(status=args.status, limit=args.limit, include_system=True)
+        for job in jobs:
+            print(f"   {job['id']:>6}  {job['kind']:<20} {job['status']:<10} attempt {job['attempts']}/"
+                  f"{job['max_attempts']}  {job['created_at']:%Y-%m-%d %H:%M:%S}  {job['error'] or ''}")
+        return 0
+
+    runner = Worker(args.threads, args.processes, scheduler=not args.no_scheduler)
+    done = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: done.set())
+    runner.start()
+    while not done.wait(1):
+        pass
+    print("⏹️  Stopping - finishing running jobs...")
+    runner.stop()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Market Data Store
+
+Compiles the bundled datasets into typed, memory-mapped NumPy arrays, once:
+
+- cbsa-est2022.csv     Census population estimates 2020-2022 for every metro
+                       and micro area, metro division and member county
+- lagdp1224.xlsx       BEA real GDP by county, 2020-2023
+- BEA_Full_data.xlsx   BEA state annual summary (GDP, income, PCE, price
+                       parities, employment...), 1998-2024
+
+The store is a directory of .npy files (MARKET_DATA_DIR, default
+market_data/) plus manifest.json. Strings are dictionary-encoded: text
+columns hold int32 codes into a fixed-width string array. Lookups go through
+sorted key arrays (np.searchsorted): county FIPS and CBSA code to row, and a
+CBSA -> member counties index in CSR form (offsets + rows).
+
+Opening the store maps the files read-only (np.load(mmap_mode='r')) rather
+than reading them, so it takes milliseconds and every worker process shares
+the same pages through the OS page cache. get_store() rebuilds the store
+first when it is missing or older than its source files.
+
+County GDP rows are matched to FIPS codes through the county names in
+cbsa-est2022.csv, so counties outside any metro/micro area - and Virginia's
+combined county/city areas - have FIPS 0 (their state is still known).
+
+Usage:
+    python market_data.py build          # compile the store (needs openpyxl)
+    python market_data.py info           # arrays, shapes and load time
+    python market_data.py lookup 48453   # a county (5-digit FIPS) or CBSA (5-digit code)
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.environ.get('MARKET_DATA_DIR', os.path.join(BASE_DIR, 'market_data'))
+SOURCES = {
+    'cbsa': os.path.join(BASE_DIR, 'cbsa-est2022.csv'),
+    'county_gdp': os.path.join(BASE_DIR, 'lagdp1224.xlsx'),
+    'bea': os.path.join(BASE_DIR, 'BEA_Full_data.xlsx'),
+}
+FORMAT_VERSION = 1
+
+POPULATION_COLUMNS = ['ESTIMATESBASE2020', 'POPESTIMATE2020', 'POPESTIMATE2021', 'POPESTIMATE2022']
+CHANGE_COLUMNS = ['NPOPCHG2020', 'NPOPCHG2021', 'NPOPCHG2022']
+COUNTY_KIND = 'County or equivalent'
+COUNTY_SUFFIXES = re.compile(r' (County|Parish|city|City|Borough|Municipality|Census Area|City and Borough)$')
+
+class MarketDataError(Exception):
+    """Raised when the store cannot be built or opened"""
+
+# Building
+
+def string_dictionary(values):
+    """(sorted unique strings as a fixed-width array, int32 code per value)"""
+    unique = sorted(set(values))
+    codes = {value: code for code, value in enumerate(unique)}
+    width = max((len(value) for value in unique), default=1)
+    return np.array(unique, dtype=f'<U{width}'), np.array([codes[value] for value in values], dtype=np.int32)
+
+def lookup_index(keys, rows=None):
+    """(sorted keys, row for each key) for np.searchsorted lookups"""
+    keys = np.asarray(keys)
+    rows = np.arange(len(keys), dtype=np.int32) if rows is None else np.asarray(rows, dtype=np.int32)
+    order = np.argsort(keys, kind='stable')
+    return keys[order], rows[order]
+
+def read_cbsa(path):
+    with open(path, encoding='latin-1', newline='') as f:
+        records = list(csv.DictReader(f))
+
+    # Counties carry their state in the FIPS code - learn the abbreviations from them
+    state_by_abbreviation = {}
+    for record in records:
+        if record['STCOU']:
+            state_by_abbreviation[record['NAME'].rsplit(', ', 1)[-1]] = int(record['STCOU']) // 1000
+
+    def state_of(record):
+        if record['STCOU']:
+            return int(record['STCOU']) // 1000
+        # Multi-state areas ("..., NY-NJ-PA") are filed under their principal state
+        return state_by_abbreviation.get(record['NAME'].rsplit(', ', 1)[-1].split('-')[0], 0)
+
+    kinds, kind_codes = string_dictionary([record['LSAD'] for record in records])
+    names, name_codes = string_dictionary([record['NAME'] for record in records])
+    arrays = {
+        'dict.area_kind': kinds,
+        'dict.area_name': names,
+        'areas.kind': kind_codes.astype(np.int8),
+        'areas.name': name_codes,
+        'areas.cbsa': np.array([int(record['CBSA']) for record in records], dtype=np.int32),
+        'areas.division': np.array([int(record['MDIV'] or 0) for record in records], dtype=np.int32),
+        'areas.county_fips': np.array([int(record['STCOU'] or 0) for record in records], dtype=np.int32),
+        'areas.state_fips': np.array([state_of(record) for record in records], dtype=np.int16),
+        'areas.population': np.array([[int(record[column]) for column in POPULATION_COLUMNS] for record in records],
+                                     dtype=np.int32),
+        'areas.change': np.array([[int(record[column]) for column in CHANGE_COLUMNS] for record in records],
+                                 dtype=np.int32),
+    }
+
+    # CBSA -> its summary row and its member counties (CSR: counties of CBSA i are rows[offsets[i]:offsets[i+1]])
+    county_kind = int(np.searchsorted(kinds, COUNTY_KIND))
+    is_county = arrays['areas.kind'] == county_kind
+    is_division = arrays['areas.division'] > 0
+    summary_rows = np.flatnonzero(~is_county & ~is_division)
+    cbsa_codes, cbsa_rows = lookup_index(arrays['areas.cbsa'][summary_rows], summary_rows)
+    county_rows = np.flatnonzero(is_county)
+    county_rows = county_rows[np.argsort(arrays['areas.cbsa'][county_rows], kind='stable')]
+    counts = np.searchsorted(arrays['areas.cbsa'][county_rows], cbsa_codes, side='right') - \
+        np.searchsorted(arrays['areas.cbsa'][county_rows], cbsa_codes, side='left')
+    arrays['index.cbsa_code'], arrays['index.cbsa_row'] = cbsa_codes, cbsa_rows
+    arrays['index.cbsa_county_offsets'] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+    arrays['index.cbsa_county_rows'] = county_rows.astype(np.int32)
+    arrays['index.county_fips'], arrays['index.county_row'] = lookup_index(
+        arrays['areas.county_fips'][county_rows], county_rows)
+    division_rows = np.flatnonzero(is_division & ~is_county)
+    arrays['index.division_code'], arrays['index.division_row'] = lookup_index(
+        arrays['areas.division'][division_rows], division_rows)
+    return arrays, state_by_abbreviation
+
+def worksheet_rows(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise MarketDataError("Building the store needs openpyxl: pip install openpyxl")
+    import warnings
+    with warnings.catch_warnings():
+        # BEA workbooks have no default style
+        warnings.simplefilter('ignore')
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            return list(workbook.worksheets[0].iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+def number(value):
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+def read_bea(path):
+    """State annual summary as values[geo, line, year]"""
+    rows = worksheet_rows(path)
+    header = next(index for index, row in enumerate(rows) if row and row[0] == 'GeoFips')
+    years = [int(value) for value in rows[header][4:] if value]
+    geos, lines, values = {}, {}, {}
+    for row in rows[header + 1:]:
+        if not row[0] or not str(row[0]).isdigit() or row[2] in (None, ''):
+            continue
+        geo, line = int(row[0]), int(row[2])
+        geos.setdefault(geo, row[1])
+        # "  Real GDP (millions of chained 2017 dollars) 1" - drop the footnote number
+        lines.setdefault(line, re.sub(r'\s+\d+$', '', row[3].strip()))
+        values[geo, line] = [number(value) for value in row[4:4 + len(years)]]
+
+    geo_codes, line_codes = sorted(geos), sorted(lines)
+    cube = np.full((len(geo_codes), len(line_codes), len(years)), np.nan)
+    for (geo, line), series in values.items():
+        cube[geo_codes.index(geo), line_codes.index(line)] = series
+    width = max(len(name) for name in geos.values())
+    line_width = max(len(text) for text in lines.values())
+    state_fips = {name: geo // 1000 for geo, name in geos.items()}
+    return {
+        'bea.geo_fips': np.array(geo_codes, dtype=np.int32),
+        'bea.geo_name': np.array([geos[geo] for geo in geo_codes], dtype=f'<U{width}'),
+        'bea.line_code': np.array(line_codes, dtype=np.int16),
+        'bea.line_name': np.array([lines[line] for line in line_codes], dtype=f'<U{line_width}'),
+        'bea.years': np.array(years, dtype=np.int16),
+        'bea.values': cube,
+    }, state_fips
+
+def read_county_gdp(path, state_fips, county_fips_by_name):
+    """Real GDP by county (and state) in thousands of chained 2017 dollars"""
+    rows = worksheet_rows(path)
+    header = next(index for index, row in enumerate(rows) if row and row[1] == 2020)
+    years = [int(value) for value in rows[header][1:5]]
+    states, counties, fallback = [], [], []
+    state = None
+    state_name = {fips: name for name, fips in state_fips.items()}
+    for row in rows[header + 1:]:
+        if not row[0] or not isinstance(row[1], (int, float)):
+            continue
+        name = str(row[0]).strip()
+        series = [number(value) for value in row[1:5]]
+        if row[5] == '--':
+            # State (or national) total - the counties below it belong to it
+            state = state_fips.get(name, 0)
+            states.append((state, series))
+            continue
+        base = re.sub(r' \(Independent City\)$', '', name)
+        kind = 'city' if base != name else 'county'
+        # "Fremont (includes Yellowstone National Park)"
+        base = re.sub(r' \(.*\)$', '', base).lower()
+        fips = county_fips_by_name.get((state, base, kind), 0)
+        if not fips:
+            # Virginia lists most independent cities by bare name
+            fallback.append(len(counties))
+            fips = county_fips_by_name.get((state, base, 'city'), 0)
+        counties.append((fips, state, name, series))
+
+    # A bare name can also be a county outside any CBSA ("Richmond" is listed twice
+    # in Virginia); an exact match wins, then the larger economy - the city
+    fallback_rows = set(fallback)
+    claimed = {county[0] for index, county in enumerate(counties) if index not in fallback_rows}
+    for index in sorted(fallback, key=lambda index: -counties[index][3][-1]):
+        if counties[index][0] in claimed:
+            counties[index] = (0,) + counties[index][1:]
+        claimed.add(counties[index][0])
+
+    # The District of Columbia only has a state-level row
+    listed = {county[1] for county in counties}
+    for state, series in states:
+        fips = county_fips_by_name.get((state, state_name.get(state, '').lower(), 'county'))
+        if fips and state not in listed:
+            counties.append((fips, state, state_name[state], series))
+
+    names, name_codes = string_dictionary([county[2] for county in counties])
+    arrays = {
+        'county_gdp.years': np.array(years, dtype=np.int16),
+        'county_gdp.fips': np.array([county[0] for county in counties], dtype=np.int32),
+        'county_gdp.state_fips': np.array([county[1] for county in counties], dtype=np.int16),
+        'county_gdp.name': name_codes,
+        'dict.county_gdp_name': names,
+        'county_gdp.real_gdp': np.array([county[3] for county in counties]),
+        'state_gdp.fips': np.array([state for state, _ in states], dtype=np.int16),
+        'state_gdp.real_gdp': np.array([series for _, series in states]),
+    }
+    matched = np.flatnonzero(arrays['county_gdp.fips'] > 0)
+    arrays['index.gdp_fips'], arrays['index.gdp_row'] = lookup_index(arrays['county_gdp.fips'][matched], matched)
+    return arrays
+
+def county_names(cbsa_arrays):
+    """(state FIPS, lowercase base name, 'county' or 'city') -> county FIPS"""
+    names = cbsa_arrays['dict.area_name'][cbsa_arrays['areas.name']]
+    lookup = {}
+    for name, fips in zip(names, cbsa_arrays['areas.county_fips']):
+        if not fips:
+            continue
+        place = str(name).rsplit(', ', 1)[0]
+        match = COUNTY_SUFFIXES.search(place)
+        base = place[:match.start()] if match else place
+        kind = 'city' if match and match.group(1) == 'city' else 'county'
+        lookup[int(fips) // 1000, base.lower(), kind] = int(fips)
+        # Some are listed in full: "Anchorage Municipality", "Baltimore City", "District of Columbia"
+        lookup.setdefault((int(fips) // 1000, place.lower(), 'county'), int(fips))
+    return lookup
+
+def source_fingerprint(path):
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {'file': os.path.basename(path), 'size': stat.st_size, 'mtime': int(stat.st_mtime), 'sha256': digest}
+
+def build(store_dir=None, verbose=False):
+    """Compile the source files into store_dir; returns the manifest"""
+    store_dir = store_dir or STORE_DIR
+    started = time.monotonic()
+    missing = [path for path in SOURCES.values() if not os.path.exists(path)]
+    if missing:
+        raise MarketDataError(f"Missing source files: {', '.join(missing)}")
+
+    arrays, _ = read_cbsa(SOURCES['cbsa'])
+    bea, state_fips = read_bea(SOURCES['bea'])
+    arrays.update(bea)
+    arrays.update(read_county_gdp(SOURCES['county_gdp'], state_fips, county_names(arrays)))
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'built_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'sources': {name: source_fingerprint(path) for name, path in SOURCES.items()},
+        'columns': {'areas.population': POPULATION_COLUMNS, 'areas.change': CHANGE_COLUMNS},
+        'arrays': {name: {'dtype': str(array.dtype), 'shape': list(array.shape)} for name, array in arrays.items()},
+    }
+
+    # Write next to the store and swap it in, so readers never see a half-written store
+    staging = f'{store_dir}.build-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    retired = f'{store_dir}.old-{os.getpid()}'
+    if os.path.exists(store_dir):
+        os.rename(store_dir, retired)
+    try:
+        os.rename(staging, store_dir)
+    except OSError:
+        # Another process swapped in its build first - it is built from the same sources
+        shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(retired, ignore_errors=True)
+
+    if verbose:
+        matched = int((arrays['county_gdp.fips'] > 0).sum())
+        print(f"🗺️  {len(arrays['areas.cbsa']):,} census areas, {len(arrays['index.cbsa_code']):,} CBSAs, "
+              f"{len(arrays['index.county_fips']):,} counties")
+        print(f"📈 {len(arrays['county_gdp.fips']):,} county GDP rows ({matched:,} matched to a FIPS code), "
+              f"BEA {' x '.join(map(str, arrays['bea.values'].shape))} (state x statistic x year)")
+        print(f"✅ Built {store_dir} in {time.monotonic() - started:.2f}s")
+    return manifest
+
+# Loading
+
+class MarketData:
+    """The opened store: arrays by name, plus lookups by FIPS and CBSA code"""
+
+    def __init__(self, store_dir, manifest, arrays):
+        self.store_dir = store_dir
+        self.manifest = manifest
+        self.arrays = arrays
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def _find(self, index, code):
+        keys = self.arrays[f'index.{index}']
+        position = int(np.searchsorted(keys, code))
+        if position < len(keys) and keys[position] == code:
+            return int(position)
+        return None
+
+    def county_row(self, fips):
+        position = self._find('county_fips', int(fips))
+        return None if position is None else int(self.arrays['index.county_row'][position])
+
+    def cbsa_row(self, code):
+        position = self._find('cbsa_code', int(code))
+        return None if position is None else int(self.arrays['index.cbsa_row'][position])
+
+    def county_rows_in_cbsa(self, code):
+        position = self._find('cbsa_code', int(code))
+        if position is None:
+            return np.empty(0, dtype=np.int32)
+        offsets = self.arrays['index.cbsa_county_offsets']
+        return self.arrays['index.cbsa_county_rows'][offsets[position]:offsets[position + 1]]
+
+    def area_name(self, row):
+        return str(self.arrays['dict.area_name'][self.arrays['areas.name'][row]])
+
+    def area_kind(self, row):
+        return str(self.arrays['dict.area_kind'][self.arrays['areas.kind'][row]])
+
+    def area(self, row):
+        population = self.arrays['areas.population'][row]
+        return {
+            'name': self.area_name(row),
+            'kind': self.area_kind(row),
+            'cbsa': int(self.arrays['areas.cbsa'][row]),
+            'division': int(self.arrays['areas.division'][row]) or None,
+            'county_fips': f"{int(self.arrays['areas.county_fips'][row]):05d}" if self.arrays['areas.county_fips'][row] else None,
+            'state_fips': f"{int(self.arrays['areas.state_fips'][row]):02d}",
+            'population': dict(zip(self.manifest['columns']['areas.population'], population.tolist())),
+            'change': dict(zip(self.manifest['columns']['areas.change'], self.arrays['areas.change'][row].tolist())),
+        }
+
+    def county_gdp(self, fips):
+        """{year: real GDP in thousands of chained 2017 dollars} for a county, or None"""
+        position = self._find('gdp_fips', int(fips))
+        if position is None:
+            return None
+        row = self.arrays['index.gdp_row'][position]
+        years = self.arrays['county_gdp.years'].tolist()
+        return dict(zip(years, self.arrays['county_gdp.real_gdp'][row].tolist()))
+
+def open_store(store_dir=None):
+    """Memory-map every array of a built store"""
+    store_dir = store_dir or STORE_DIR
+    try:
+        with open(os.path.join(store_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise MarketDataError(f"No market data store at {store_dir} - run: python market_data.py build")
+    if manifest.get('format') != FORMAT_VERSION:
+        raise MarketDataError(f"Market data store at {store_dir} has an old format - rebuild it")
+    arrays = {
+        name: np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+        for name in manifest['arrays']
+    }
+    return MarketData(store_dir, manifest, arrays)
+
+def is_stale(store_dir=None):
+    """True when the store is missing or was built from different source files"""
+    try:
+        with open(os.path.join(store_dir or STORE_DIR, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return True
+    if manifest.get('format') != FORMAT_VERSION:
+        return True
+    for name, path in SOURCES.items():
+        recorded = manifest['sources'].get(name, {})
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        if (recorded.get('size'), recorded.get('mtime')) != (stat.st_size, int(stat.st_mtime)):
+            return True
+    return False
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The shared store for this process, built first if missing or stale"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if is_stale():
+                    build()
+                _store = open_store()
+    return _store
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and inspect the memory-mapped market data store')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='Compile the source files into the store')
+    commands.add_parser('info', help='List the arrays in the store')
+    lookup = commands.add_parser('lookup', help='Show a county (FIPS) or CBSA (code)')
+    lookup.add_argument('code')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            build(verbose=True)
+            return 0
+
+        started = time.perf_counter()
+        store = open_store()
+        opened = (time.perf_counter() - started) * 1000
+
+        if args.command == 'info':
+            size = sum(os.path.getsize(os.path.join(store.store_dir, f'{name}.npy')) for name in store.arrays)
+            print(f"🗂️  {store.store_dir} (built {store.manifest['built_at']}, {size / 1024:,.0f} KB)")
+            for name, array in store.arrays.items():
+                print(f"   {name:<32} {str(array.dtype):<8} {' x '.join(map(str, array.shape))}")
+            print(f"\n⏱️  Opened {len(store.arrays)} arrays in {opened:.1f} ms")
+            return 0
+
+        code = int(args.code)
+        row = store.county_row(code)
+        if row is not None:
+            print(json.dumps({**store.area(row), 'real_gdp': store.county_gdp(code)}, indent=2))
+            return 0
+        row = store.cbsa_row(code)
+        if row is None:
+            print(f"❌ {args.code} is neither a county FIPS code nor a CBSA code in the store")
+            return 1
+        print(json.dumps({**store.area(row),
+                          'counties': [store.area_name(county) for county in store.county_rows_in_cbsa(code)]},
+                         indent=2))
+        return 0
+    except MarketDataError as e:
+        print(f"❌ {e}")
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Prometheus Metrics
+
+A small, dependency-free metrics registry rendered in the Prometheus text
+exposition format (version 0.0.4) at GET /metrics. It records:
+
+- per-endpoint request latency histograms, status counts and in-flight requests
+- SQL statements and cumulative database time per request, from engine
+  before/after_cursor_execute events (every engine, shards included)
+- connection pool usage, read at scrape time
+- Supabase auth call latency
+
+Requests that run more than METRICS_QUERY_THRESHOLD statements (default 50)
+are logged and counted in http_requests_over_query_threshold_total, which is
+how N+1 regressions show up. Every response also carries X-Query-Count and
+X-DB-Time-Ms headers (except streamed responses).
+
+Metrics are kept per process - with several server workers, scrape each one
+or aggregate in Prometheus.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_QUERY_THRESHOLD = 50
+
+query_threshold = int(os.environ.get('METRICS_QUERY_THRESHOLD', DEFAULT_QUERY_THRESHOLD))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 500)
+
+REGISTRY = []
+
+def format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        REGISTRY.append(self)
+
+    def key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, label_values, extra_labels, value) tuples"""
+        with self.lock:
+            items = list(self.values.items())
+        for label_values, value in items:
+            yield '', label_values, '', value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, label_values, extra, value in self.samples():
+            labels = format_labels(self.labelnames, label_values)
+            if extra:
+                labels = labels[:-1] + ',' + extra + '}' if labels else '{' + extra + '}'
+            lines.append(f'{self.name}{suffix}{labels} {format_value(value)}')
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        # collect() -> {label_values: value}, read at scrape time instead of stored values
+        self.collect = collect
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.collect is None:
+            yield from super().samples()
+            return
+        for label_values, value in self.collect().items():
+            yield '', label_values, '', value
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self.lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self.values.items()]
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '_bucket', label_values, f'le="{format_value(bound)}"', cumulative
+            yield '_sum', label_values, '', total
+            yield '_count', label_values, '', count
+
+def render():
+    """The whole registry in Prometheus text format"""
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+# Metric definitions
+
+http_requests_total = Counter(
+    'http_requests_total', 'HTTP requests by endpoint and status', ('method', 'endpoint', 'status'))
+http_request_duration_seconds = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint', ('method', 'endpoint'))
+http_requests_in_flight = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled')
+http_requests_over_query_threshold_total = Counter(
+    'http_requests_over_query_threshold_total', 'Requests that ran more SQL statements than the threshold',
+    ('endpoint',))
+
+db_statements_total = Counter(
+    'db_statements_total', 'SQL statements executed, by endpoint ("none" outside requests)', ('endpoint',))
+db_statement_seconds_total = Counter(
+    'db_statement_seconds_total', 'Time spent executing SQL statements, by endpoint', ('endpoint',))
+db_statements_per_request = Histogram(
+    'db_statements_per_request', 'SQL statements per request', ('endpoint',), QUERY_COUNT_BUCKETS)
+db_time_per_request_seconds = Histogram(
+    'db_time_per_request_seconds', 'Database time per request', ('endpoint',))
+
+supabase_auth_duration_seconds = Histogram(
+    'supabase_auth_duration_seconds', 'Latency of Supabase auth calls', ('operation', 'outcome'))
+
+def observe_auth_call(operation, started, outcome):
+    supabase_auth_duration_seconds.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
+
+# Request tracking - a context variable rather than flask.g, so asgi.py's async handlers
+# (which run outside Flask) count their statements the same way
+
+_current_request = ContextVar('request_metrics', default=None)
+
+def current_endpoint():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+def start_request(endpoint):
+    """Begin tracking a request; statements run in this context are counted against it"""
+    http_requests_in_flight.inc()
+    stats = {
+        'endpoint': endpoint,
+        'started': time.perf_counter(),
+        'statements': 0,
+        'db_seconds': 0.0,
+    }
+    _current_request.set(stats)
+    return stats
+
+def response_headers(stats):
+    return {
+        'X-Query-Count': str(stats['statements']),
+        'X-DB-Time-Ms': f"{stats['db_seconds'] * 1000:.1f}",
+    }
+
+def finish_request(stats, method, path, status):
+    """Record a finished request started with start_request()"""
+    if _current_request.get() is stats:
+        _current_request.set(None)
+    http_requests_in_flight.dec()
+    endpoint = stats['endpoint']
+    elapsed = time.perf_counter() - stats['started']
+    http_requests_total.inc(method=method, endpoint=endpoint, status=status)
+    http_request_duration_seconds.observe(elapsed, method=method, endpoint=endpoint)
+    db_statements_per_request.observe(stats['statements'], endpoint=endpoint)
+    db_time_per_request_seconds.observe(stats['db_seconds'], endpoint=endpoint)
+    if stats['statements'] > query_threshold:
+        http_requests_over_query_threshold_total.inc(endpoint=endpoint)
+        logger.warning(
+            "%s %s ran %d SQL statements (threshold %d, %.1f ms in the database) - possible N+1",
+            method, path, stats['statements'], query_threshold, stats['db_seconds'] * 1000
+        )
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current_request.get()
+    endpoint = stats['endpoint'] if stats else 'none'
+    db_statements_total.inc(endpoint=endpoint)
+    db_statement_seconds_total.inc(elapsed, endpoint=endpoint)
+    if stats:
+        stats['statements'] += 1
+        stats['db_seconds'] += elapsed
+
+@event.listens_for(Engine, 'handle_error')
+def discard_statement_timer(exception_context):
+    # Failed statements never reach after_cursor_execute - drop their start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_started'):
+        connection.info['metrics_started'].pop()
+
+def install(app, get_engines):
+    """Register the request hooks on app; get_engines() -> [(label, engine)] for pool stats"""
+
+    def pool_stats(reader):
+        def collect():
+            stats = {}
+            for label, engine in get_engines():
+                value = getattr(engine.pool, reader, None)
+                if callable(value):
+                    # Engines sharing a label (the shard engines) are summed
+                    key = (label,)
+                    stats[key] = stats.get(key, 0) + value()
+            return stats
+        return collect
+
+    Gauge('db_pool_size', 'Connections the pool keeps open', ('database',), pool_stats('size'))
+    Gauge('db_pool_checked_out', 'Connections currently in use', ('database',), pool_stats('checkedout'))
+    Gauge('db_pool_overflow', 'Connections open beyond the pool size', ('database',), pool_stats('overflow'))
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics = start_request(current_endpoint())
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats = g.get('metrics')
+        if stats is None:
+            return response
+        stats['status'] = response.status_code
+        # A streamed body runs its queries after the headers are sent
+        if not response.is_streamed:
+            response.headers.update(response_headers(stats))
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exception=None):
+        stats = g.pop('metrics', None)
+        if stats is not None:
+            finish_request(stats, request.method, request.path, stats.get('status', 500))
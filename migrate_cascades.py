@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Cascading Foreign Key Migration
+
+Brings existing databases in line with the ON DELETE CASCADE / SET NULL
+foreign keys declared on the models:
+
+1. Purges orphans left behind by older delete code (projects, tasks, steps and
+   step data whose parent is gone are deleted; activities pointing at deleted
+   projects/ideas are set to NULL) in bounded batches that each commit on their own
+2. SQLite: rebuilds each affected table with the new constraints (SQLite cannot
+   ALTER a foreign key), copying rows over and recreating its indexes
+3. PostgreSQL: swaps each constraint for one with the ON DELETE action, added
+   NOT VALID and validated afterwards so writers are never blocked on a full scan
+
+Safe to run repeatedly - tables that already have the right constraints are
+left alone. It runs automatically as migration 0003 (see migrations.py); the
+indexes cascades use to find children are built online by migration 0004.
+
+Usage:
+    python migrate_cascades.py
+    python migrate_cascades.py --batch-size 10000
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import MetaData, and_, exists, inspect, or_, select
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+DEFAULT_BATCH_SIZE = 5000
+
+def cascade_foreign_keys(metadata):
+    """Yield (table, foreign_key) for every model foreign key with an ON DELETE action"""
+    for table in metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            if fk.ondelete:
+                yield table, fk
+
+def find_outdated_tables(connection, metadata):
+    """Return the tables whose foreign keys in the database lack the model's ON DELETE action"""
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    outdated = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        wanted = {fk.parent.name: fk.ondelete.upper() for fk in table.foreign_keys if fk.ondelete}
+        if not wanted:
+            continue
+        actual = {}
+        for fk in inspector.get_foreign_keys(table.name):
+            ondelete = (fk.get('options') or {}).get('ondelete')
+            for column in fk['constrained_columns']:
+                actual[column] = ondelete.upper() if ondelete else None
+        if any(actual.get(column) != ondelete for column, ondelete in wanted.items()):
+            outdated.append(table)
+    return outdated
+
+def alive_conditions(table):
+    """Conditions that hold when every CASCADE parent chain above a row of table still exists"""
+    conditions = []
+    for fk in table.foreign_keys:
+        if fk.ondelete and fk.ondelete.upper() == 'CASCADE':
+            parent = fk.column.table
+            conditions.append(or_(fk.parent.is_(None), exists().where(fk.column == fk.parent, *alive_conditions(parent))))
+    return conditions
+
+def purge_orphans(engine, metadata, batch_size=DEFAULT_BATCH_SIZE, verbose=True):
+    """Detach (SET NULL) or delete (CASCADE) rows whose parent no longer exists, batch by batch
+
+    A row counts as orphaned when any parent up its CASCADE chain is gone, so a
+    project whose idea was deleted takes its tasks and steps with it. SET NULL
+    references are cleared first and deletes run children-first, which keeps
+    every statement valid even before the constraints cascade themselves.
+    """
+    existing_tables = set(inspect(engine).get_table_names())
+    work = []
+    for table, fk in cascade_foreign_keys(metadata):
+        if table.name in existing_tables and fk.ondelete.upper() == 'SET NULL':
+            parent = fk.column.table
+            orphaned = and_(fk.parent.isnot(None), ~exists().where(fk.column == fk.parent, *alive_conditions(parent)))
+            work.append((table, fk.parent.name, orphaned, 'detached'))
+    for table in reversed(metadata.sorted_tables):
+        conditions = alive_conditions(table)
+        if table.name in existing_tables and conditions:
+            work.append((table, None, ~and_(*conditions), 'deleted'))
+
+    purged = {}
+    for table, column_name, orphaned, action in work:
+        key = list(table.primary_key.columns)[0]
+        total = 0
+        while True:
+            with engine.begin() as connection:
+                batch = select(key).where(orphaned).limit(batch_size).correlate(None).scalar_subquery()
+                if column_name:
+                    statement = table.update().where(key.in_(batch)).values({column_name: None})
+                else:
+                    statement = table.delete().where(key.in_(batch))
+                count = connection.execute(statement).rowcount
+            total += count
+            if count < batch_size:
+                break
+        if total:
+            purged[f'{table.name}.{column_name}' if column_name else table.name] = total
+            if verbose:
+                target = f' ({column_name})' if column_name else ''
+                print(f"   🧹 {table.name}: {total:,} orphaned rows {action}{target}")
+    return purged
+
+def rebuild_sqlite_tables(engine, metadata, tables, verbose=True):
+    """Recreate SQLite tables with the model's constraints, using the rebuild sequence from the SQLite docs"""
+    raw = engine.raw_connection()
+    try:
+        connection = raw.driver_connection
+        connection.isolation_level = None
+        # Must be switched off outside a transaction, or the DROP TABLEs would cascade
+        connection.execute('PRAGMA foreign_keys=OFF')
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for table in tables:
+                existing = {row[1] for row in connection.execute(f'PRAGMA table_info("{table.name}")')}
+                columns = ', '.join(f'"{column.name}"' for column in table.columns if column.name in existing)
+
+                # Copy every table so the rebuilt one's foreign keys still resolve by name
+                scratch = MetaData()
+                for other in metadata.sorted_tables:
+                    if other is not table:
+                        other.to_metadata(scratch)
+                new_table = table.to_metadata(scratch, name=f'_rebuild_{table.name}')
+
+                connection.execute(str(CreateTable(new_table).compile(dialect=engine.dialect)))
+                connection.execute(
+                    f'INSERT INTO "{new_table.name}" ({columns}) SELECT {columns} FROM "{table.name}"'
+                )
+                connection.execute(f'DROP TABLE "{table.name}"')
+                connection.execute(f'ALTER TABLE "{new_table.name}" RENAME TO "{table.name}"')
+                for index in table.indexes:
+                    connection.execute(str(CreateIndex(index).compile(dialect=engine.dialect)))
+                if verbose:
+                    print(f"   🔗 {table.name}: rebuilt with cascading foreign keys")
+
+            violations = connection.execute('PRAGMA foreign_key_check').fetchall()
+            if violations:
+                raise RuntimeError(f'{len(violations)} foreign key violations remain, e.g. {violations[0]}')
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.execute('PRAGMA foreign_keys=ON')
+    finally:
+        raw.close()
+
+def alter_postgres_constraints(engine, tables, verbose=True):
+    """Replace each foreign key with one carrying the ON DELETE action, then validate it online"""
+    to_validate = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in tables:
+            constraints = {
+                tuple(fk['constrained_columns']): fk['name'] for fk in inspector.get_foreign_keys(table.name)
+            }
+            for fk in table.foreign_keys:
+                if not fk.ondelete:
+                    continue
+                name = constraints.get((fk.parent.name,)) or f'{table.name}_{fk.parent.name}_fkey'
+                drop = f'DROP CONSTRAINT IF EXISTS "{name}", ' if (fk.parent.name,) in constraints else ''
+                connection.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" {drop}ADD CONSTRAINT "{name}" '
+                    f'FOREIGN KEY ("{fk.parent.name}") REFERENCES "{fk.column.table.name}" ("{fk.column.name}") '
+                    f'ON DELETE {fk.ondelete.upper()} NOT VALID'
+                )
+                to_validate.append((table.name, name))
+
+    # VALIDATE only takes a SHARE UPDATE EXCLUSIVE lock, so reads and writes carry on meanwhile
+    for table_name, name in to_validate:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT "{name}"')
+        if verbose:
+            print(f"   🔗 {table_name}: {name} now cascades")
+
+def apply_cascade_constraints(engine=None, metadata=None, batch_size=DEFAULT_BATCH_SIZE, verbose=True):
+    """Purge orphans and install the cascading foreign keys; returns the names of the tables changed"""
+    if engine is None or metadata is None:
+        from app import db
+        engine = engine or db.engine
+        metadata = metadata or db.metadata
+
+    with engine.connect() as connection:
+        outdated = find_outdated_tables(connection, metadata)
+    if not outdated:
+        return []
+
+    if verbose:
+        print(f"🔗 Adding cascading foreign keys to {', '.join(table.name for table in outdated)}...")
+    purge_orphans(engine, metadata, batch_size, verbose)
+    if engine.dialect.name == 'sqlite':
+        rebuild_sqlite_tables(engine, metadata, outdated, verbose)
+    elif engine.dialect.name == 'postgresql':
+        alter_postgres_constraints(engine, outdated, verbose)
+    else:
+        raise RuntimeError(f'Cascading foreign key migration is not supported on {engine.dialect.name}')
+    return [table.name for table in outdated]
+
+def main():
+    parser = argparse.ArgumentParser(description='Install ON DELETE CASCADE foreign keys and purge orphaned rows')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Orphans removed per transaction')
+    args = parser.parse_args()
+
+    from app import app, db
+    from migrations import create_missing_indexes
+    with app.app_context():
+        print(f"🔍 Checking {db.engine.url.render_as_string(hide_password=True)}...")
+        # Orphans can exist even where the constraints are already in place (e.g. SQLite with foreign_keys off)
+        purged = purge_orphans(db.engine, db.metadata, args.batch_size)
+        changed = apply_cascade_constraints(db.engine, db.metadata, args.batch_size)
+        create_missing_indexes(db.engine, db.metadata)
+
+    if changed:
+        print(f"\n✅ Cascading foreign keys installed on {len(changed)} tables")
+    else:
+        print("\n✅ Foreign keys already cascade - nothing to change")
+    if purged:
+        print(f"   Purged {sum(purged.values()):,} orphaned rows")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
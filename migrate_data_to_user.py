@@ -8,7 +8,7 @@ This script will:
 3. Preserve all existing data
 
 Usage:
-    python migrate_data_to_user.py YOUR_SUPABASE_USER_ID
+    python migrate_data_to_user.py YOUR_SUPABASE_USER_ID [BATCH_SIZE]
 
 To get your user ID:
 1. Sign in to your app
@@ -19,7 +19,8 @@ To get your user ID:
 
 import os
 import sys
-from app import app, db, AppIdea, Project, Task, GamePlanStep, GamePlanStepData, UserActivity
+from app import app, db
+from claim_data import claim_legacy_data, DEFAULT_BATCH_SIZE
 from dotenv import load_dotenv
 
 # Load environment variables (ignore permission errors)
@@ -29,7 +30,7 @@ except Exception as e:
     print(f"⚠️  Could not load .env file: {e}")
     print("   Continuing with environment variables from system...")
 
-def migrate_data_to_user(user_id):
+def migrate_data_to_user(user_id, batch_size=DEFAULT_BATCH_SIZE):
     """Migrate all legacy data (without user_id) to the specified user"""
     
     if not user_id:
@@ -45,45 +46,26 @@ def migrate_data_to_user(user_id):
     print(f"🔄 Migrating data to user: {user_id}")
     print("-" * 50)
     
+    labels = {
+        'ideas': '📝 app ideas',
+        'projects': '📁 projects',
+        'activities': '📊 activities',
+    }
+    
+    def report_progress(entity, claimed):
+        print(f"   {labels[entity]}: {claimed:,} claimed so far")
+    
     with app.app_context():
         try:
-            # Migrate App Ideas
-            ideas = AppIdea.query.filter(AppIdea.user_id.is_(None)).all()
-            if ideas:
-                print(f"📝 Found {len(ideas)} app ideas without user_id")
-                for idea in ideas:
-                    idea.user_id = user_id
-                db.session.commit()
-                print(f"✅ Migrated {len(ideas)} app ideas")
-            else:
-                print("ℹ️  No app ideas to migrate")
-            
-            # Migrate Projects
-            projects = Project.query.filter(Project.user_id.is_(None)).all()
-            if projects:
-                print(f"📁 Found {len(projects)} projects without user_id")
-                for project in projects:
-                    project.user_id = user_id
-                db.session.commit()
-                print(f"✅ Migrated {len(projects)} projects")
-            else:
-                print("ℹ️  No projects to migrate")
-            
-            # Tasks are linked to projects, so they'll be accessible through projects
-            # But we can verify they exist
-            tasks = Task.query.join(Project).filter(Project.user_id == user_id).all()
-            print(f"✅ {len(tasks)} tasks are now accessible through migrated projects")
-            
-            # Game Plan Steps are linked to projects
-            steps = GamePlanStep.query.join(Project).filter(Project.user_id == user_id).all()
-            print(f"✅ {len(steps)} game plan steps are now accessible through migrated projects")
-            
-            # Step Data is linked to steps
-            step_data = GamePlanStepData.query.join(GamePlanStep).join(Project).filter(Project.user_id == user_id).all()
-            print(f"✅ {len(step_data)} step data entries are now accessible")
+            # Set-based UPDATE ... RETURNING in bounded batches, one commit per batch
+            migrated = claim_legacy_data(user_id, batch_size, progress=report_progress)
             
-            # User Activities - these don't have user_id, but we can optionally migrate them
-            # For now, we'll leave them as-is since they're just metrics
+            print(f"✅ Migrated {migrated['ideas']:,} app ideas")
+            print(f"✅ Migrated {migrated['projects']:,} projects")
+            print(f"✅ {migrated['tasks']:,} tasks are now accessible through migrated projects")
+            print(f"✅ {migrated['steps']:,} game plan steps are now accessible through migrated projects")
+            print(f"✅ {migrated['step_data']:,} step data entries are now accessible")
+            print(f"✅ Migrated {migrated['activities']:,} user activities")
             
             print("\n" + "=" * 50)
             print("✅ Migration completed successfully!")
@@ -116,6 +98,7 @@ def get_user_id_from_supabase():
     return None
 
 if __name__ == '__main__':
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BATCH_SIZE
     if len(sys.argv) > 1:
         user_id = sys.argv[1]
     else:
@@ -132,4 +115,4 @@ if __name__ == '__main__':
             print("3. Copy the User UID")
             sys.exit(1)
     
-    migrate_data_to_user(user_id)
+    migrate_data_to_user(user_id, batch_size)
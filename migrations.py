@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Versioned Schema Migrations
+
+One runner for every schema change, on SQLite and PostgreSQL alike. Applied
+migrations are recorded in the schema_migrations table, so each one runs once
+per database. Every migration is also written to be idempotent: a database
+that already has a change (e.g. created by an older create_all) just records
+it as applied.
+
+Only one process migrates at a time. On PostgreSQL the runner holds a
+session-level advisory lock; on SQLite it holds an exclusive lock on a
+<database>.migrate.lock file next to the database. Other processes wait for
+the lock (up to MIGRATION_LOCK_TIMEOUT seconds, default 30) and then find
+nothing left to do, or skip and serve with the schema as it is.
+
+At startup the common case - nothing pending - costs one small query against
+schema_migrations instead of a create_all() catalog scan.
+
+Index builds use CREATE INDEX CONCURRENTLY on PostgreSQL, so they never block
+writes to the table being indexed.
+
+Adding a migration: append a (id, description, function) entry to MIGRATIONS.
+The function receives (engine, metadata) and manages its own transactions.
+
+Usage:
+    python migrations.py              # apply pending migrations
+    python migrations.py --status     # list applied and pending migrations
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows - SQLite migrations run unlocked
+    fcntl = None
+
+DEFAULT_LOCK_TIMEOUT = 30
+
+# Any constant works as long as every instance uses the same one
+ADVISORY_LOCK_ID = zlib.crc32(b'saas-workflow-tool:schema-migrations')
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', migration_metadata,
+    Column('id', String(100), primary_key=True),
+    Column('description', String(255)),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+    Column('duration_ms', Integer),
+)
+
+class MigrationLockTimeout(Exception):
+    """Raised when another process holds the migration lock for longer than the timeout"""
+
+# Migrations
+
+def create_missing_tables(engine, metadata):
+    """Baseline: create any model table that does not exist yet (with its indexes)"""
+    metadata.create_all(engine)
+
+def add_missing_columns(engine, metadata):
+    """Add model columns older databases lack (the columns migrate_db.py used to add by hand)"""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        added = set()
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                spec = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {spec}')
+                added.add((table.name, column.name))
+
+        if ('user_activity', 'user_id') in added:
+            # Activities belong to the owner of the project or idea they are about
+            connection.exec_driver_sql("""
+                UPDATE user_activity SET user_id = COALESCE(
+                    (SELECT user_id FROM project WHERE project.id = user_activity.project_id),
+                    (SELECT user_id FROM app_idea WHERE app_idea.id = user_activity.idea_id)
+                )
+            """)
+
+def install_cascading_foreign_keys(engine, metadata):
+    from migrate_cascades import apply_cascade_constraints
+    apply_cascade_constraints(engine, metadata)
+
+def create_missing_indexes(engine, metadata):
+    """Create every model index that is missing - CONCURRENTLY on PostgreSQL"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    postgres = engine.dialect.name == 'postgresql'
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if postgres:
+            # A failed concurrent build leaves an INVALID index behind - drop it so it is rebuilt
+            invalid = connection.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+            )).scalars().all()
+            for name in invalid:
+                connection.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+                if postgres:
+                    ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+                    ddl = ddl.replace('CREATE UNIQUE INDEX', 'CREATE UNIQUE INDEX CONCURRENTLY', 1)
+                connection.exec_driver_sql(ddl)
+
+def add_idea_scores(engine, metadata, batch_size=1000):
+    """AppIdea.score with its (user_id, score) index, filled in with the default weights"""
+    from scoring import FIELDS, compute_scores
+    create_missing_tables(engine, metadata)
+    add_missing_columns(engine, metadata)
+    create_missing_indexes(engine, metadata)
+
+    table = metadata.tables['app_idea']
+    update = table.update().where(table.c.id == bindparam('idea_id')).values(score=bindparam('new_score'))
+    last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, *[table.c[field] for field in FIELDS])
+                .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            connection.execute(update, [
+                {'idea_id': row['id'], 'new_score': float(score)} for row, score in zip(rows, compute_scores(rows))
+            ])
+
+def add_duplicate_index(engine, metadata):
+    """MinHash signatures and LSH buckets for duplicates.py, built for every existing idea"""
+    from duplicates import index_missing
+    create_missing_tables(engine, metadata)
+    index_missing(engine, metadata)
+
+MIGRATIONS = [
+    ('0001_initial_schema', 'Create missing tables', create_missing_tables),
+    ('0002_add_missing_columns', 'Add columns introduced after the first release', add_missing_columns),
+    ('0003_cascading_foreign_keys', 'ON DELETE CASCADE / SET NULL and orphan cleanup', install_cascading_foreign_keys),
+    ('0004_foreign_key_and_sync_indexes', 'Build missing indexes online', create_missing_indexes),
+    ('0005_owner_stage_and_activity_date_indexes', 'Index the columns check_query_plans.py found scanned',
+     create_missing_indexes),
+    ('0006_background_jobs', 'Job queue table for jobs.py', create_missing_tables),
+    ('0007_idea_scores', 'Indexed AppIdea.score and per-user scoring weights (scoring.py)', add_idea_scores),
+    ('0008_duplicate_index', 'Near-duplicate idea index (duplicates.py)', add_duplicate_index),
+    ('0009_sync_snapshot_xmax', 'Record the PostgreSQL snapshot with each sync version (app.sync_token)',
+     add_missing_columns),
+]
+
+# Runner
+
+def applied_migrations(engine):
+    """Ids of the migrations already applied (empty if schema_migrations does not exist yet)"""
+    try:
+        with engine.connect() as connection:
+            return set(connection.execute(select(schema_migrations.c.id)).scalars())
+    except Exception:
+        return set()
+
+def pending_migrations(engine):
+    applied = applied_migrations(engine)
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+@contextmanager
+def migration_lock(engine, timeout=DEFAULT_LOCK_TIMEOUT):
+    """Hold the cross-process migration lock, waiting up to timeout seconds for it"""
+    deadline = time.monotonic() + timeout
+    if engine.dialect.name == 'postgresql':
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            while not connection.execute(text('SELECT pg_try_advisory_lock(:id)'), {'id': ADVISORY_LOCK_ID}).scalar():
+                if time.monotonic() > deadline:
+                    raise MigrationLockTimeout('Another instance is still migrating the database')
+                time.sleep(0.5)
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': ADVISORY_LOCK_ID})
+        return
+
+    database = engine.url.database
+    if engine.dialect.name != 'sqlite' or not database or database == ':memory:' or fcntl is None:
+        yield
+        return
+    with open(f'{database}.migrate.lock', 'w') as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    raise MigrationLockTimeout('Another process is still migrating the database')
+                time.sleep(0.2)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def run_migrations(engine=None, metadata=None, lock_timeout=None, verbose=True):
+    """Apply pending migrations under the migration lock; returns the ids applied"""
+    if engine is None or metadata is None:
+        from app import db
+        engine = engine or db.engine
+        metadata = metadata or db.metadata
+    if lock_timeout is None:
+        lock_timeout = float(os.environ.get('MIGRATION_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT))
+
+    # Fast path - one query when the schema is current
+    if not pending_migrations(engine):
+        return []
+
+    applied = []
+    with migration_lock(engine, lock_timeout):
+        migration_metadata.create_all(engine)
+        # Another instance may have finished while we waited for the lock
+        for migration_id, description, migrate in pending_migrations(engine):
+            if verbose:
+                print(f"🗄️  Applying migration {migration_id}: {description}")
+            started = time.monotonic()
+            migrate(engine, metadata)
+            with engine.begin() as connection:
+                connection.execute(schema_migrations.insert().values(
+                    id=migration_id,
+                    description=description,
+                    applied_at=datetime.utcnow(),
+                    duration_ms=int((time.monotonic() - started) * 1000)
+                ))
+            applied.append(migration_id)
+    return applied
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations')
+    parser.add_argument('--status', action='store_true', help='List applied and pending migrations')
+    parser.add_argument('--lock-timeout', type=float, help='Seconds to wait for another migrating process')
+    args = parser.parse_args()
+
+    from app import app, db
+    with app.app_context():
+        engine = db.engine
+        print(f"🔍 {engine.url.render_as_string(hide_password=True)}")
+        if args.status:
+            applied = applied_migrations(engine)
+            for migration_id, description, _ in MIGRATIONS:
+                mark = '✅' if migration_id in applied else '⏳'
+                print(f"   {mark} {migration_id}  {description}")
+            return 0
+        try:
+            applied = run_migrations(engine, db.metadata, args.lock_timeout)
+        except MigrationLockTimeout as e:
+            print(f"❌ {e}")
+            return 1
+
+    if applied:
+        print(f"\n✅ Applied {len(applied)} migrations")
+    else:
+        print("\n✅ Database is up to date. No migrations needed.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Regional Opportunity Ranking
+
+Scores every metro area, micro area or county in the market data store
+(market_data.py) for where an idea's audience is, from three components:
+
+- population   size of the market: log10 of the 2022 population estimate
+- growth       annualised growth 2020-2022: NPOPCHG2020-2022 over the 2020 base
+- momentum     whether growth is speeding up: the 2022 rate minus the 2021 rate
+
+Each component is standardised (z-score) over the candidate regions and
+combined with configurable weights; regions are ranked by the weighted score
+and get a percentile within the candidates. The components are computed once
+per store as whole-array NumPy expressions, so a ranking is a weighted sum,
+a percentile rank and an argpartition over ~2,700 rows, and rankings are
+cached per parameter set.
+
+Usage:
+    python regions.py                                   # top 10 metro areas
+    python regions.py --level county --state 48 --top 20
+    python regions.py --growth 2 --population 0.5 --min-population 250000
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import market_data
+
+LEVELS = {
+    'metro': ['Metropolitan Statistical Area'],
+    'micro': ['Micropolitan Statistical Area'],
+    'county': [market_data.COUNTY_KIND],
+    'all': ['Metropolitan Statistical Area', 'Micropolitan Statistical Area', market_data.COUNTY_KIND],
+}
+DEFAULT_LEVEL = 'metro'
+DEFAULT_WEIGHTS = {'population': 1.0, 'growth': 1.0, 'momentum': 0.5}
+DEFAULT_TOP = 10
+MAX_TOP = 500
+RANKING_CACHE_SIZE = 256
+# ESTIMATESBASE2020 is April 1 2020; POPESTIMATE2022 is July 1 2022
+GROWTH_YEARS = 2.25
+
+class Components:
+    """Per-row score components for one opened store"""
+
+    def __init__(self, store):
+        population = store['areas.population'].astype(np.float64)
+        change = store['areas.change'].astype(np.float64)
+        base, estimate_2020, estimate_2021, latest = population.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total_growth = change.sum(axis=1) / base
+            rate_2021 = change[:, 1] / estimate_2020
+            rate_2022 = change[:, 2] / estimate_2021
+            self.values = {
+                'population': np.log10(latest),
+                'growth': np.clip(1 + total_growth, 0, None) ** (1 / GROWTH_YEARS) - 1,
+                'momentum': rate_2022 - rate_2021,
+            }
+        self.latest_population = population[:, 3].astype(np.int64)
+        self.valid = (base > 0) & (estimate_2020 > 0) & (estimate_2021 > 0) & (latest > 0)
+        kind_names = list(store['dict.area_kind'])
+        self.level_masks = {
+            level: np.isin(store['areas.kind'], [kind_names.index(kind) for kind in kinds if kind in kind_names])
+            for level, kinds in LEVELS.items()
+        }
+
+_components = None
+_components_lock = threading.Lock()
+
+def components():
+    global _components
+    store = market_data.get_store()
+    if _components is None or _components[0] is not store:
+        with _components_lock:
+            if _components is None or _components[0] is not store:
+                _components = (store, Components(store))
+    return _components
+
+def integer(name, value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+
+def parse_weights(values):
+    """Weights by component name from a mapping of strings or numbers; missing ones keep their default"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for name in DEFAULT_WEIGHTS:
+        value = values.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            weights[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Weight '{name}' must be a number")
+        if not np.isfinite(weights[name]):
+            raise ValueError(f"Weight '{name}' must be finite")
+    if not any(weights.values()):
+        raise ValueError("At least one weight must be non-zero")
+    return weights
+
+def rank_regions(level=DEFAULT_LEVEL, weights=None, top=DEFAULT_TOP, state=None, min_population=0):
+    """Top regions by weighted score; see the module docstring for the components"""
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level '{level}' (use {', '.join(LEVELS)})")
+    top = integer('top', top)
+    if not 1 <= top <= MAX_TOP:
+        raise ValueError(f"top must be between 1 and {MAX_TOP}")
+    state = integer('state', state) if state not in (None, '') else None
+    min_population = integer('min_population', min_population or 0)
+    weights = parse_weights(weights or {})
+    store, _ = components()
+    return _ranking(store, level, tuple(sorted(weights.items())), top, state, min_population)
+
+@lru_cache(maxsize=RANKING_CACHE_SIZE)
+def _ranking(store, level, weights, top, state, min_population):
+    _, parts = components()
+    started = time.perf_counter()
+    candidates = parts.level_masks[level] & parts.valid
+    if state is not None:
+        candidates &= store['areas.state_fips'] == state
+    if min_population:
+        candidates &= parts.latest_population >= min_population
+    rows = np.flatnonzero(candidates)
+
+    score = np.zeros(len(rows))
+    standardised = {}
+    for name, weight in weights:
+        values = parts.values[name][rows]
+        spread = values.std()
+        standardised[name] = (values - values.mean()) / spread if spread > 0 else np.zeros(len(rows))
+        score += weight * standardised[name]
+
+    # Percentile: share of the other candidates that score lower
+    order = np.argsort(score, kind='stable')
+    ranks = np.empty(len(rows), dtype=np.int64)
+    ranks[order] = np.arange(len(rows))
+    percentile = ranks * 100.0 / max(len(rows) - 1, 1)
+
+    count = min(top, len(rows))
+    best = np.argpartition(-score, count - 1)[:count] if count else np.empty(0, dtype=np.int64)
+    best = best[np.argsort(-score[best], kind='stable')]
+
+    regions = []
+    for position, index in enumerate(best, start=1):
+        row = int(rows[index])
+        regions.append({
+            **store.area(row),
+            'rank': position,
+            'score': round(float(score[index]), 4),
+            'percentile': round(float(percentile[index]), 1),
+            'growth_rate': round(float(parts.values['growth'][row]), 5),
+            'momentum': round(float(parts.values['momentum'][row]), 5),
+            'components': {name: round(float(values[index]), 4) for name, values in standardised.items()},
+        })
+    return {
+        'level': level,
+        'weights': dict(weights),
+        'state_fips': f'{state:02d}' if state is not None else None,
+        'min_population': min_population,
+        'candidates': len(rows),
+        'regions': regions,
+        'computed_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank regions by population size, growth and momentum')
+    parser.add_argument('--level', choices=list(LEVELS), default=DEFAULT_LEVEL)
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP)
+    parser.add_argument('--state', type=int, help='State FIPS code (e.g. 48 for Texas)')
+    parser.add_argument('--min-population', type=int, default=0)
+    for name, weight in DEFAULT_WEIGHTS.items():
+        parser.add_argument(f'--{name}', type=float, default=weight, help=f'Weight (default: {weight})')
+    parser.add_argument('--json', action='store_true', help='Print the full result as JSON')
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        result = rank_regions(args.level, {name: getattr(args, name) for name in DEFAULT_WEIGHTS},
+                              args.top, args.state, args.min_population)
+        elapsed = (time.perf_counter() - started) * 1000
+    except (ValueError, market_data.MarketDataError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    print(f"🏙️  Top {len(result['regions'])} of {result['candidates']} {args.level} regions "
+          f"(weights {result['weights']}, {elapsed:.1f} ms including store open)")
+    for region in result['regions']:
+        print(f"   {region['rank']:>3}. {region['name'][:50]:<50} {region['population']['POPESTIMATE2022']:>11,}"
+              f"  {region['growth_rate'] * 100:+.2f}%/yr  score {region['score']:+.2f}  p{region['percentile']:.0f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
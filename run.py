@@ -1,19 +1,35 @@
 #!/usr/bin/env python3
 """
 Simple startup script for the Analytics Tool Landing Page
+
+Runs the production server (serve.py: gunicorn, one worker per core) by
+default. --dev starts Flask's debug server with auto-reload instead.
+
+Usage:
+    python run.py              # production server on :5000
+    python run.py --dev        # debug server on :5000
 """
 
-import os
+import argparse
 import sys
-from app import app
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Start the app on port 5000')
+    parser.add_argument('--dev', action='store_true', help="Flask's debug server with auto-reload")
+    args = parser.parse_args()
+
     print("🚀 Starting Analytics Tool Landing Page...")
     print("📍 Server will be available at: http://localhost:5000")
     print("📱 Open your browser to view the landing page")
     print("⏹️  Press Ctrl+C to stop the server")
     print("-" * 50)
-    
+
+    if not args.dev:
+        sys.argv = sys.argv[:1]
+        import serve
+        sys.exit(serve.main())
+
+    from app import app
     try:
         app.run(debug=True, host='0.0.0.0', port=5000)
     except KeyboardInterrupt:
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Idea Scoring
+
+Ranks ideas for promotion from the fields people compare on the ideas board.
+Each field is normalised to 0..1:
+
+- estimated_mrr, competitor_mrr   log scale: $0 -> 0, MRR_CEILING ($100k) and up -> 1
+- competition_level               Low 1, Medium 0.5, High 0
+- difficulty                      Easy 1, Medium 0.5, Hard 0
+- problem_severity                Critical 1, High 0.75, Medium 0.5, Low 0.25
+- revenue_confidence              High 1, Medium 0.6, Low 0.3
+
+The score is the weighted mean of the fields an idea has filled in (a blank
+field doesn't count for or against it), from 0 to 100; an idea with none of
+them scores 0. Weights are per user (IdeaScoringModel, DEFAULT_WEIGHTS until
+changed) and the maths runs on NumPy arrays over a whole batch of ideas.
+
+Scores are stored in AppIdea.score, indexed with user_id, so
+GET /api/app-ideas?sort=score reads ideas in index order. They stay current:
+- ORM writes (create, update, batch...) score the ideas they touch in a
+  before_flush listener (app.py)
+- imports score each chunk before inserting it; claiming legacy data
+  rescores the claimed ideas
+- changing the weights (PUT /api/app-ideas/scoring-model) rescores the
+  user's ideas, inline or as a rescore_ideas background job (jobs.py)
+
+Usage:
+    python scoring.py                  # rescore every user's ideas
+    python scoring.py --user USER_ID   # one user's (or 'anonymous')
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+DEFAULT_WEIGHTS = {
+    'estimated_mrr': 3.0,
+    'competitor_mrr': 2.0,
+    'revenue_confidence': 2.0,
+    'problem_severity': 2.0,
+    'competition_level': 1.0,
+    'difficulty': 1.0,
+}
+MRR_CEILING = 100_000
+LEVELS = {
+    'competition_level': {'low': 1.0, 'medium': 0.5, 'high': 0.0},
+    'difficulty': {'easy': 1.0, 'medium': 0.5, 'hard': 0.0},
+    'problem_severity': {'critical': 1.0, 'high': 0.75, 'medium': 0.5, 'low': 0.25},
+    'revenue_confidence': {'high': 1.0, 'medium': 0.6, 'low': 0.3},
+}
+FIELDS = list(DEFAULT_WEIGHTS)
+DEFAULT_BATCH_SIZE = 1000
+
+def parse_weights(data):
+    """Validated weights from a mapping; fields left out keep their default"""
+    if not isinstance(data, dict):
+        raise ValueError('weights must be an object')
+    unknown = set(data) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (use {', '.join(FIELDS)})")
+    weights = dict(DEFAULT_WEIGHTS)
+    for field, value in data.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value < float('inf'):
+            raise ValueError(f"Weight for {field} must be a non-negative number")
+        weights[field] = float(value)
+    if not any(weights.values()):
+        raise ValueError('At least one weight must be positive')
+    return weights
+
+def normalise(rows):
+    """[len(rows), len(FIELDS)] matrix of 0..1 values, NaN where a field is blank
+
+    rows are AppIdea objects or mappings with the FIELDS keys.
+    """
+    def get(row, field):
+        return row.get(field) if isinstance(row, Mapping) else getattr(row, field)
+
+    matrix = np.full((len(rows), len(FIELDS)), np.nan)
+    for column, field in enumerate(FIELDS):
+        values = [get(row, field) for row in rows]
+        if field in LEVELS:
+            levels = LEVELS[field]
+            matrix[:, column] = [levels.get(str(value).strip().lower(), np.nan) if value else np.nan
+                                 for value in values]
+        else:
+            mrr = np.array([value if isinstance(value, (int, float)) else np.nan for value in values], dtype=float)
+            with np.errstate(invalid='ignore'):
+                matrix[:, column] = np.clip(np.log1p(np.clip(mrr, 0, None)) / np.log1p(MRR_CEILING), 0, 1)
+    return matrix
+
+def compute_scores(rows, weights=None):
+    """Scores (0-100, 2 decimals) for a batch of ideas"""
+    weights = np.array([(weights or DEFAULT_WEIGHTS)[field] for field in FIELDS])
+    matrix = normalise(rows)
+    present = ~np.isnan(matrix)
+    total = (np.where(present, matrix, 0.0) * weights).sum(axis=1)
+    weight = (present * weights).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = np.where(weight > 0, total / weight * 100, 0.0)
+    return np.round(scores, 2)
+
+def get_weights(session, user_id):
+    from app import db, IdeaScoringModel, owned_by
+    # Also called from before_flush, where an autoflush would recurse
+    with session.no_autoflush:
+        stored = session.scalar(db.select(IdeaScoringModel.weights).where(owned_by(IdeaScoringModel.user_id, user_id)))
+    return {**DEFAULT_WEIGHTS, **json.loads(stored)} if stored else dict(DEFAULT_WEIGHTS)
+
+def score_ideas(session, ideas):
+    """Set .score on AppIdea objects (one weights lookup per owner)"""
+    by_user = {}
+    for idea in ideas:
+        by_user.setdefault(idea.user_id, []).append(idea)
+    for user_id, owned in by_user.items():
+        for idea, score in zip(owned, compute_scores(owned, get_weights(session, user_id))):
+            idea.score = float(score)
+
+def rescore_user(user_id, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Recompute every score of one user's ideas; returns how many changed. Needs an app context.
+
+    Reads ideas in id order in batches and only writes rows whose score moved,
+    with one executemany UPDATE (and one sync version) per committed batch.
+    """
+    from app import db, AppIdea, next_sync_version, owned_by
+    weights = get_weights(db.session, user_id)
+    table = AppIdea.__table__
+    columns = [table.c.id, table.c.score] + [table.c[field] for field in FIELDS]
+    update = table.update().where(table.c.id == db.bindparam('idea_id')).values(
+        score=db.bindparam('new_score'), version=db.bindparam('new_version'))
+
+    changed = scanned = last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(*columns).where(owned_by(table.c.user_id, user_id), table.c.id > last_id)
+            .order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        scanned += len(rows)
+        scores = compute_scores(rows, weights)
+        current = np.array([row['score'] if row['score'] is not None else np.nan for row in rows])
+        moved = np.flatnonzero(~np.isclose(scores, current))
+        if len(moved):
+            # Scores are part of the idea clients sync. Each batch commits on its own, so each
+            # takes its own version - a client that synced after batch 1 must still see batch 2
+            version = next_sync_version()
+            db.session.execute(update, [
+                {'idea_id': rows[index]['id'], 'new_score': float(scores[index]), 'new_version': version}
+                for index in moved
+            ])
+            db.session.commit()
+            changed += len(moved)
+        if progress:
+            progress({'scanned': scanned, 'changed': changed})
+    db.session.commit()
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute stored idea scores')
+    parser.add_argument('--user', help="User id ('anonymous' for ideas without one); default: every user")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app import app, db, AppIdea, shard_router
+    with app.app_context():
+        if args.user:
+            users = [None if args.user == 'anonymous' else args.user]
+        else:
+            users = db.session.scalars(db.select(AppIdea.user_id).distinct()).all()
+        started = time.monotonic()
+        total = 0
+        for user_id in users:
+            with shard_router.use_shard(user_id):
+                changed = rescore_user(user_id, args.batch_size)
+                db.session.remove()
+            total += changed
+            print(f"   {user_id or 'anonymous'}: {changed:,} scores changed")
+        print(f"✅ Rescored {len(users):,} users in {time.monotonic() - started:.1f}s ({total:,} changed)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
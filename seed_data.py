@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator
+
+Fills the configured database (SQLite or PostgreSQL) with realistic-looking
+users for benchmarks and query plan checks. Each user gets ideas, projects
+with a 15-step game plan and step data for every step, tasks and activity
+history. The first user is the anonymous/legacy owner (user_id NULL), so
+unauthenticated requests - which is how benchmark.py calls the API - see a
+full account.
+
+Rows are written with multi-row INSERTs in chunks (no ORM), all stamped
+with a single sync version, so even the 1m scale takes minutes rather than
+hours. Data is appended: ids continue after the highest existing id, and on
+PostgreSQL the id sequences are moved past the seeded rows.
+
+Usage:
+    python seed_data.py --scale 1k                 # ~1,000 rows
+    python seed_data.py --scale 100k
+    python seed_data.py --scale 1m --database-url postgresql://localhost/bench
+    python seed_data.py --rows 25000 --random-seed 7
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+DEFAULT_CHUNK_SIZE = 5000
+
+# Per-user shape of the data
+IDEAS_PER_USER = 20
+PROJECTS_PER_USER = 4
+STEPS_PER_PROJECT = 15
+TASKS_PER_PROJECT = 12
+ACTIVITIES_PER_USER = 30
+ROWS_PER_USER = (IDEAS_PER_USER + ACTIVITIES_PER_USER
+                 + PROJECTS_PER_USER * (1 + 2 * STEPS_PER_PROJECT + TASKS_PER_PROJECT))
+
+IDEA_STATUSES = ['Researching', 'Validated', 'Rejected', 'Planning']
+PROJECT_STAGES = ['discovery', 'planning', 'smoketest', 'building', 'testing', 'launching', 'live', 'killed']
+STEP_CATEGORIES = ['research', 'design', 'development', 'marketing', 'launch']
+TASK_STATUSES = ['todo', 'in_progress', 'completed', 'blocked']
+PRIORITIES = ['low', 'medium', 'high']
+ACTION_TYPES = ['outreach', 'smoke_test', 'idea_created', 'project_created', 'step_completed']
+WORDS = ('saas analytics invoice scheduling crm niche agency creator audit dashboard api '
+         'workflow churn onboarding pricing seo landing waitlist integration export').split()
+
+def sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def user_ids(count, rng):
+    """The anonymous owner first, then UUID-shaped ids"""
+    ids = [None]
+    while len(ids) < count:
+        ids.append('%08x-%04x-4%03x-%04x-%012x' % (
+            rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(12),
+            rng.getrandbits(16), rng.getrandbits(48)))
+    return ids
+
+def next_ids(connection, models):
+    from app import db
+    return {model: (connection.execute(db.select(db.func.max(model.id))).scalar() or 0) + 1 for model in models}
+
+def generate_user(index, user_id, ids, version, rng, today):
+    """Rows for one user as {model: [row dicts]}; ids holds the next free id per model"""
+    from app import AppIdea, Project, Task, GamePlanStep, GamePlanStepData, UserActivity
+    from scoring import compute_scores
+
+    rows = {model: [] for model in (AppIdea, Project, GamePlanStep, GamePlanStepData, Task, UserActivity)}
+    now = datetime.utcnow()
+
+    def take(model):
+        ids[model] += 1
+        return ids[model] - 1
+
+    idea_ids = []
+    for n in range(IDEAS_PER_USER):
+        created = now - timedelta(days=rng.randint(0, 720), minutes=rng.randint(0, 1440))
+        idea_ids.append(take(AppIdea))
+        rows[AppIdea].append({
+            'id': idea_ids[-1], 'user_id': user_id, 'name': f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} #{n}',
+            'description': sentence(rng, 30), 'status': rng.choice(IDEA_STATUSES),
+            'difficulty': rng.choice(['Easy', 'Medium', 'Hard']), 'mrr_range': rng.choice(['$1k-10k', '$10k-30k', '$30k+']),
+            'estimated_mrr': float(rng.randint(0, 50) * 1000), 'problem_statement': sentence(rng, 20),
+            'target_audience': sentence(rng, 4), 'core_features': sentence(rng, 25),
+            'created_at': created, 'updated_at': created, 'version': version,
+        })
+    for row, score in zip(rows[AppIdea], compute_scores(rows[AppIdea])):
+        row['score'] = float(score)
+
+    project_ids = []
+    for idea_id in rng.sample(idea_ids, PROJECTS_PER_USER):
+        created = now - timedelta(days=rng.randint(0, 365))
+        project_id = take(Project)
+        project_ids.append(project_id)
+        rows[Project].append({
+            'id': project_id, 'user_id': user_id, 'app_idea_id': idea_id, 'name': f'Project {project_id}',
+            'current_stage': rng.choice(PROJECT_STAGES), 'progress': rng.randint(0, 100),
+            'current_mrr': float(rng.randint(0, 200) * 50), 'target_mrr': 10000.0,
+            'created_at': created, 'updated_at': created, 'version': version,
+        })
+        for number in range(1, STEPS_PER_PROJECT + 1):
+            step_id = take(GamePlanStep)
+            status = rng.choice(['pending', 'in_progress', 'completed'])
+            rows[GamePlanStep].append({
+                'id': step_id, 'project_id': project_id, 'step_number': number, 'title': f'Step {number}',
+                'description': sentence(rng, 15), 'category': rng.choice(STEP_CATEGORIES),
+                'estimated_hours': rng.randint(1, 40), 'status': status,
+                'completed_at': created if status == 'completed' else None, 'created_at': created, 'version': version,
+            })
+            rows[GamePlanStepData].append({
+                'id': take(GamePlanStepData), 'step_id': step_id, 'competitors_looked_at': sentence(rng, 6),
+                'pain_point_1': sentence(rng, 20), 'how_solve_10x_better': sentence(rng, 25),
+                'confidence_check': rng.randint(1, 10), 'go_no_go': rng.choice(['go', 'no-go', None]),
+                'updated_at': created, 'version': version,
+            })
+        for n in range(TASKS_PER_PROJECT):
+            status = rng.choice(TASK_STATUSES)
+            rows[Task].append({
+                'id': take(Task), 'project_id': project_id, 'title': f'Task {n}: {sentence(rng, 5)}',
+                'description': sentence(rng, 15), 'stage': rng.choice(PROJECT_STAGES[:6]), 'status': status,
+                'priority': rng.choice(PRIORITIES), 'due_date': today + timedelta(days=rng.randint(-30, 60)),
+                'completed_at': now if status == 'completed' else None, 'created_at': created, 'version': version,
+            })
+
+    for n in range(ACTIVITIES_PER_USER):
+        action = ACTION_TYPES[n % len(ACTION_TYPES)]
+        rows[UserActivity].append({
+            'id': take(UserActivity), 'user_id': user_id,
+            # (action_type, action_date) is unique across all users - keep other users' types distinct
+            'action_type': action if user_id is None else f'{action}:{index}',
+            'action_date': today - timedelta(days=n // len(ACTION_TYPES)),
+            'project_id': rng.choice(project_ids), 'created_at': now, 'version': version,
+        })
+    return rows
+
+def seed(rows=SCALES['1k'], random_seed=42, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Append about `rows` rows of synthetic data; returns {table name: rows inserted}"""
+    from app import db, next_sync_version, AppIdea, Project, Task, GamePlanStep, GamePlanStepData, UserActivity
+    from duplicates import index_ideas
+    from migrate_to_supabase import reset_sequences
+
+    rng = random.Random(random_seed)
+    today = date.today()
+    users = user_ids(max(1, round(rows / ROWS_PER_USER)), rng)
+    # Parents first, so every chunk's foreign keys already exist
+    models = [AppIdea, Project, GamePlanStep, GamePlanStepData, Task, UserActivity]
+    counts = {model.__tablename__: 0 for model in models}
+
+    with db.engine.begin() as connection:
+        version = next_sync_version(connection)
+        ids = next_ids(connection, models)
+
+    pending = {model: [] for model in models}
+
+    def flush(force=False):
+        with db.engine.begin() as connection:
+            for model in models:
+                batch = pending[model]
+                if batch and (force or len(batch) >= chunk_size):
+                    connection.execute(model.__table__.insert(), batch)
+                    if model is AppIdea:
+                        index_ideas(connection, batch)
+                    counts[model.__tablename__] += len(batch)
+                    pending[model] = []
+
+    for index, user_id in enumerate(users):
+        for model, user_rows in generate_user(index, user_id, ids, version, rng, today).items():
+            pending[model].extend(user_rows)
+        if any(len(batch) >= chunk_size for batch in pending.values()):
+            flush(force=True)
+            if progress:
+                progress(index + 1, len(users), sum(counts.values()))
+    flush(force=True)
+
+    reset_sequences(db.engine, [model.__table__ for model in models])
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed the database with synthetic users and projects')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k', help='Approximate number of rows')
+    parser.add_argument('--rows', type=int, help='Exact target row count (overrides --scale)')
+    parser.add_argument('--database-url', help='Database to seed (default: DATABASE_URL or workflow.db)')
+    parser.add_argument('--random-seed', type=int, default=42, help='Seed for reproducible data')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per INSERT batch')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    from app import app, db
+
+    target = args.rows or SCALES[args.scale]
+    with app.app_context():
+        print(f"🌱 Seeding ~{target:,} rows into {db.engine.url.render_as_string(hide_password=True)}")
+        started = time.monotonic()
+
+        def report(done, total, inserted):
+            print(f"   {done:,}/{total:,} users, {inserted:,} rows ({inserted / (time.monotonic() - started):,.0f} rows/s)")
+
+        counts = seed(target, args.random_seed, args.chunk_size, progress=report)
+
+    elapsed = time.monotonic() - started
+    for table, count in counts.items():
+        print(f"   ✅ {table}: {count:,}")
+    print(f"\n✅ Inserted {sum(counts.values()):,} rows in {elapsed:.1f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
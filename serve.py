@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Production Server
+
+Runs the app under gunicorn's pre-fork model instead of Flask's single-process
+debug server:
+
+- one worker process per CPU core (WEB_CONCURRENCY), each with a few threads
+  (WEB_THREADS) so a worker waiting on Supabase auth still serves requests
+- the app is imported once in the master (--preload) and workers share its
+  memory copy-on-write; the heap is frozen out of the garbage collector
+  before forking so collections don't touch (and copy) the shared pages
+- database migrations run once in the master; every worker then drops the
+  inherited connection pools and opens its own connections
+- workers are recycled after MAX_REQUESTS requests (plus jitter) to bound
+  slow leaks
+- SIGHUP starts fresh workers and drains the old ones (to load new code,
+  which was preloaded, send USR2 for a new master, then TERM the old one);
+  SIGTERM stops accepting connections and lets in-flight requests finish
+  for up to GRACEFUL_TIMEOUT seconds
+- idle keep-alive connections are held for KEEPALIVE seconds
+- with JOBS_IN_PROCESS=1 each worker also runs background jobs (jobs.py)
+  on JOB_THREADS threads, instead of a separate `python jobs.py worker`
+
+Metrics (see metrics.py) are per worker, so scrape each one or aggregate.
+
+Usage:
+    python serve.py                            # 0.0.0.0:5000, one worker per core
+    python serve.py --workers 4 --threads 8 --bind 127.0.0.1:8000
+    kill -HUP <master pid>                     # graceful reload
+    python run.py --dev                        # Flask debug server with auto-reload
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    print("❌ gunicorn not installed. Install with: pip install -r requirements.txt")
+    sys.exit(1)
+
+DEFAULT_BIND = '0.0.0.0:5000'
+DEFAULT_THREADS = 4
+DEFAULT_MAX_REQUESTS = 1000
+DEFAULT_MAX_REQUESTS_JITTER = 100
+DEFAULT_TIMEOUT = 30
+DEFAULT_GRACEFUL_TIMEOUT = 30
+DEFAULT_KEEPALIVE = 5
+
+def default_workers():
+    return int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+def when_ready(server):
+    # Everything imported so far is shared with the workers; keep the collector off those pages
+    gc.freeze()
+    server.log.info("Ready - forking %s workers", server.cfg.workers)
+
+def post_fork(server, worker):
+    """Drop connection pools inherited from the master without closing its sockets"""
+    from app import app, metrics_engines
+    with app.app_context():
+        for _, engine in metrics_engines():
+            engine.dispose(close=False)
+    if os.environ.get('JOBS_IN_PROCESS', '').lower() in ('1', 'true', 'yes'):
+        import jobs
+        jobs.start_in_process()
+
+def worker_exit(server, worker):
+    # Recycled workers (MAX_REQUESTS) would otherwise kill jobs mid-run - their daemon threads die with
+    # the process and the jobs sit in 'running' until LOCK_TIMEOUT. Finish them while the engines still work.
+    import jobs
+    jobs.stop_in_process()
+    from app import app, metrics_engines
+    with app.app_context():
+        for _, engine in metrics_engines():
+            engine.dispose()
+
+class ProductionServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Called once in the master with preload_app
+        os.environ.setdefault('LAZY_INIT', '0')
+        from app import app, init_database
+        init_database()
+        return app
+
+def options(bind=DEFAULT_BIND, workers=None, threads=DEFAULT_THREADS):
+    return {
+        'bind': bind,
+        'workers': workers or default_workers(),
+        'worker_class': 'gthread',
+        'threads': threads,
+        'preload_app': True,
+        'max_requests': int(os.environ.get('MAX_REQUESTS', DEFAULT_MAX_REQUESTS)),
+        'max_requests_jitter': int(os.environ.get('MAX_REQUESTS_JITTER', DEFAULT_MAX_REQUESTS_JITTER)),
+        'timeout': int(os.environ.get('WORKER_TIMEOUT', DEFAULT_TIMEOUT)),
+        'graceful_timeout': int(os.environ.get('GRACEFUL_TIMEOUT', DEFAULT_GRACEFUL_TIMEOUT)),
+        'keepalive': int(os.environ.get('KEEPALIVE', DEFAULT_KEEPALIVE)),
+        'accesslog': os.environ.get('ACCESS_LOG'),
+        'errorlog': '-',
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the app under gunicorn (pre-fork, preloaded)')
+    parser.add_argument('--bind', default=os.environ.get('BIND', DEFAULT_BIND), help=f'Address to listen on (default: {DEFAULT_BIND})')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: WEB_CONCURRENCY or CPU count)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', DEFAULT_THREADS)),
+                        help=f'Threads per worker (default: {DEFAULT_THREADS})')
+    args = parser.parse_args()
+
+    config = options(args.bind, args.workers, args.threads)
+    print(f"🚀 Serving on http://{args.bind} with {config['workers']} workers x {config['threads']} threads")
+    ProductionServer(config).run()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,8 +20,9 @@ def setup_database():
     print(f"Database location: {os.path.abspath(db_path)}")
     
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        # Create all tables (and apply any pending schema migrations)
+        from migrations import run_migrations
+        run_migrations(db.engine, db.metadata)
         
         # Verify tables were created
         from sqlalchemy import inspect
@@ -0,0 +1,148 @@
+"""
+Per-User SQLite Shards
+
+Optional mode for self-hosted SQLite deployments: every signed-in user gets
+their own database file, so one user's writes (or a big import) never wait on
+another user's SQLite write lock. Legacy/anonymous data stays in the shared
+workflow.db.
+
+Enable it by pointing SQLITE_SHARD_DIR at a directory (ignored when
+DATABASE_URL is a PostgreSQL database). Shards are laid out as
+
+    <SQLITE_SHARD_DIR>/<2 hex chars of sha1(user_id)>/<user_id>.db
+
+so no directory ends up with more than a few thousand files. A shard is
+created, with the full schema, the first time its user touches the database.
+
+Routing happens in ShardedSession.get_bind: each statement goes to the
+current request user's shard engine. At most SQLITE_SHARD_CACHE_SIZE engines
+are kept open (least recently used are disposed first). Outside a request
+(scripts, the shared data) use `with shard_router.use_shard(user_id):`.
+
+Split an existing shared database into shards with split_shards.py.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+DEFAULT_SHARD_CACHE_SIZE = 32
+
+# Characters allowed in a shard file name (Supabase user ids are UUIDs)
+SAFE_USER_ID = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+# Set inside use_shard() - takes precedence over the request user
+_shard_override = ContextVar('shard_override', default=None)
+
+class ShardRouter:
+    """Maps user ids to SQLite shard files and keeps a bounded LRU of their engines"""
+
+    def __init__(self):
+        self.shard_dir = None
+        self.cache_size = DEFAULT_SHARD_CACHE_SIZE
+        self.schema_init = None
+        self.user_loader = None
+        self.engines = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.shard_dir is not None
+
+    def configure(self, shard_dir, schema_init, user_loader, cache_size=DEFAULT_SHARD_CACHE_SIZE):
+        """Turn sharding on
+
+        schema_init(engine) brings a shard's schema up to date; user_loader() returns
+        the current request's user id (or None).
+        """
+        self.shard_dir = os.path.abspath(shard_dir)
+        self.schema_init = schema_init
+        self.user_loader = user_loader
+        self.cache_size = max(1, cache_size)
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+    def shard_path(self, user_id):
+        digest = hashlib.sha1(user_id.encode('utf-8')).hexdigest()
+        name = user_id if SAFE_USER_ID.match(user_id) else digest
+        return os.path.join(self.shard_dir, digest[:2], f'{name}.db')
+
+    def get_engine(self, user_id):
+        """Return the engine for a user's shard, creating the shard on first use"""
+        with self.lock:
+            engine = self.engines.get(user_id)
+            if engine is not None:
+                self.engines.move_to_end(user_id)
+                return engine
+
+            path = self.shard_path(user_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 30})
+            event.listen(engine, 'connect', _enable_wal)
+            # Lazy schema init - a single query once the shard is up to date
+            self.schema_init(engine)
+
+            self.engines[user_id] = engine
+            while len(self.engines) > self.cache_size:
+                _, evicted = self.engines.popitem(last=False)
+                # Connections still checked out finish normally and are closed when returned
+                evicted.dispose()
+            return engine
+
+    def current_user_id(self):
+        override = _shard_override.get()
+        if override is not None:
+            return override
+        if has_request_context() and self.user_loader:
+            return self.user_loader()
+        return None
+
+    def current_engine(self):
+        """The shard engine for the current user, or None to use the shared database"""
+        if not self.enabled:
+            return None
+        user_id = self.current_user_id()
+        return self.get_engine(user_id) if user_id else None
+
+    @contextmanager
+    def use_shard(self, user_id):
+        """Route db.session to user_id's shard outside of a request (start a fresh session inside)
+
+        A None user_id keeps the default routing (the shared database outside a request).
+        """
+        token = _shard_override.set(user_id)
+        try:
+            yield self.get_engine(user_id) if self.enabled and user_id else None
+        finally:
+            _shard_override.reset(token)
+
+    def dispose_all(self):
+        with self.lock:
+            for engine in self.engines.values():
+                engine.dispose()
+            self.engines.clear()
+
+def _enable_wal(dbapi_connection, connection_record):
+    # WAL lets a shard's readers carry on while its user writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.close()
+
+shard_router = ShardRouter()
+
+class ShardedSession(Session):
+    """Flask-SQLAlchemy session that sends every statement to the current user's shard when enabled"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = shard_router.current_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
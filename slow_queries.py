@@ -0,0 +1,156 @@
+"""
+Slow Query Log
+
+Every SQL statement that takes at least SLOW_QUERY_MS milliseconds (default
+200, 0 logs everything, a negative value turns the log off) is recorded with
+its SQL, parameters, duration, the route that ran it and its query plan -
+`EXPLAIN QUERY PLAN` on SQLite, `EXPLAIN` on PostgreSQL - captured right after
+it ran, on the same connection.
+
+Records go to the `slow_queries` logger, to the in-memory `recent` buffer
+(last 100), and, when SLOW_QUERY_LOG is set, as JSON lines to that file.
+
+`full_scans(dialect, plan)` lists the tables a plan reads sequentially;
+check_query_plans.py uses it to fail when a hot query stops using an index.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 200
+MAX_PARAMETER_LENGTH = 200
+
+# Only these are worth a plan - EXPLAIN of an INSERT or DDL tells us nothing
+EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+
+threshold_ms = float(os.environ.get('SLOW_QUERY_MS', DEFAULT_THRESHOLD_MS))
+log_path = os.environ.get('SLOW_QUERY_LOG')
+recent = deque(maxlen=100)
+_lock = threading.Lock()
+_capture = None
+
+def explain(cursor, dialect, statement, parameters):
+    """Plan of statement as a list of strings, using a fresh cursor on the same DBAPI connection"""
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    plan_cursor = cursor.connection.cursor()
+    try:
+        if dialect == 'postgresql':
+            # A failing EXPLAIN must not abort the request's transaction
+            plan_cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                plan_cursor.execute(prefix + statement, parameters or None)
+                rows = plan_cursor.fetchall()
+            finally:
+                plan_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                plan_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+            return [row[0] for row in rows]
+        plan_cursor.execute(prefix + statement, parameters or ())
+        # SQLite rows are (id, parent, notused, detail)
+        return [row[-1] for row in plan_cursor.fetchall()]
+    finally:
+        plan_cursor.close()
+
+def full_scans(dialect, plan):
+    """Tables the plan reads without an index"""
+    scans = []
+    for line in plan:
+        if dialect == 'sqlite':
+            # "SCAN project" is a full scan; "SCAN project USING (COVERING) INDEX ..." is not
+            match = re.match(r'^SCAN (?:TABLE )?(\w+)(.*)$', line.strip())
+            if match and 'USING' not in match.group(2):
+                scans.append(match.group(1))
+        else:
+            match = re.search(r'Seq Scan on (\w+)', line)
+            if match:
+                scans.append(match.group(1))
+    return scans
+
+def printable(parameters):
+    if isinstance(parameters, dict):
+        return {key: printable(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [printable(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (int, float, bool)):
+        return parameters
+    text = str(parameters)
+    return text if len(text) <= MAX_PARAMETER_LENGTH else text[:MAX_PARAMETER_LENGTH] + '...'
+
+def current_route():
+    if not has_request_context():
+        return None
+    rule = request.url_rule
+    return f"{request.method} {rule.rule if rule is not None else request.path}"
+
+@contextmanager
+def capture(threshold=0):
+    """Collect the records of every statement at or over threshold ms (used by check_query_plans.py)"""
+    global _capture, threshold_ms
+    records, previous = [], (_capture, threshold_ms)
+    _capture, threshold_ms = records, threshold
+    try:
+        yield records
+    finally:
+        _capture, threshold_ms = previous
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'handle_error')
+def discard_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('slow_query_started'):
+        connection.info['slow_query_started'].pop()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_slow_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('slow_query_started')
+    if not started:
+        return
+    duration_ms = (time.perf_counter() - started.pop()) * 1000
+    if threshold_ms < 0 or duration_ms < threshold_ms:
+        return
+
+    dialect = conn.dialect.name
+    record = {
+        'at': datetime.utcnow().isoformat(),
+        'route': current_route(),
+        'duration_ms': round(duration_ms, 2),
+        'sql': statement,
+        'parameters': printable(parameters[0] if executemany and parameters else parameters),
+        'plan': None,
+        'full_scans': [],
+    }
+    if not executemany and EXPLAINABLE.match(statement):
+        try:
+            record['plan'] = explain(cursor, dialect, statement, parameters)
+            record['full_scans'] = full_scans(dialect, record['plan'])
+        except Exception as e:
+            record['plan_error'] = str(e)
+
+    with _lock:
+        recent.append(record)
+        if _capture is not None:
+            _capture.append(record)
+        if log_path:
+            with open(log_path, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+    if _capture is None:
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s | params=%s | plan=%s",
+            duration_ms, record['route'] or 'script', ' '.join(statement.split()),
+            record['parameters'], ' / '.join(record['plan'] or [])
+        )
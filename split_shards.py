@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Split the Shared Database into Per-User Shards
+
+Copies every user's ideas, projects, tasks, game plan steps, step data,
+activities and archived projects out of the shared workflow.db into their own
+shard file (see sharding.py). Rows without a user_id stay where they are.
+
+Rows are streamed in id order and written in chunks with
+INSERT ... ON CONFLICT DO NOTHING, so running the split again (e.g. after new
+data was written to the shared file) only adds what is missing. The user's
+tombstones come along, and each shard's sync sequence is moved up to the
+shared database's, so sync tokens clients already hold remain valid.
+
+Usage:
+    export SQLITE_SHARD_DIR=shards
+    python split_shards.py                        # every user
+    python split_shards.py --user YOUR_USER_ID    # one user
+    python split_shards.py --remove               # also delete copied rows from the shared file
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+DEFAULT_CHUNK_SIZE = 2000
+
+def owned_user_ids():
+    """Every user id that owns at least one idea, project or activity in the shared database"""
+    from app import db, AppIdea, Project, UserActivity, ARCHIVE_TABLES
+
+    archived = ARCHIVE_TABLES[Project]
+    owners = db.union(
+        db.select(AppIdea.user_id), db.select(Project.user_id),
+        db.select(UserActivity.user_id), db.select(archived.c.user_id)
+    ).subquery()
+    return [user_id for user_id in db.session.execute(db.select(owners.c[0])).scalars() if user_id]
+
+def user_row_selects(user_id):
+    """(table, select) pairs covering everything user_id owns, parents first"""
+    from app import (db, SYNC_ENTITIES, ARCHIVE_TABLES, GamePlanStep, IdeaScoringModel, Project, SyncTombstone,
+                     owned_rows_query)
+
+    selects = []
+    for model in SYNC_ENTITIES:
+        query = owned_rows_query(model, user_id).with_entities(*model.__table__.columns)
+        selects.append((model.__table__, query.statement))
+    selects.append((IdeaScoringModel.__table__,
+                    db.select(IdeaScoringModel.__table__).where(IdeaScoringModel.user_id == user_id)))
+    # Deletes made before the split still have to reach clients that are mid-sync
+    selects.append((SyncTombstone.__table__,
+                    db.select(SyncTombstone.__table__).where(SyncTombstone.user_id == user_id)))
+
+    projects = ARCHIVE_TABLES[Project]
+    project_ids = db.select(projects.c.id).where(projects.c.user_id == user_id).scalar_subquery()
+    steps = ARCHIVE_TABLES[GamePlanStep]
+    step_ids = db.select(steps.c.id).where(steps.c.project_id.in_(project_ids)).scalar_subquery()
+    for model, archive_table in ARCHIVE_TABLES.items():
+        if model is Project:
+            criteria = archive_table.c.user_id == user_id
+        elif 'step_id' in archive_table.c:
+            criteria = archive_table.c.step_id.in_(step_ids)
+        else:
+            criteria = archive_table.c.project_id.in_(project_ids)
+        selects.append((archive_table, db.select(archive_table).where(criteria)))
+    return selects
+
+def copy_user(user_id, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Copy one user's rows into their shard; returns rows read per table"""
+    from app import db, SyncSequence, shard_router
+    from duplicates import index_missing
+    from migrate_to_supabase import conflict_insert
+
+    shard_engine = shard_router.get_engine(user_id)
+    # Clients hold tokens up to the shared sequence, which can be far above this user's own rows
+    shared_version = db.session.execute(db.select(db.func.max(SyncSequence.id))).scalar() or 0
+    copied = {}
+    max_version = shared_version
+    for table, statement in user_row_selects(user_id):
+        key = list(table.primary_key.columns)[0]
+        insert = conflict_insert(table, 'sqlite')
+        last_id = 0
+        count = 0
+        while True:
+            # Keyset pagination over the shared file, one shard transaction per chunk
+            chunk_statement = statement.where(key > last_id).order_by(key).limit(chunk_size)
+            rows = [dict(row) for row in db.session.execute(chunk_statement).mappings()]
+            if not rows:
+                break
+            with shard_engine.begin() as shard:
+                shard.execute(insert, rows)
+            last_id = rows[-1][key.name]
+            count += len(rows)
+            max_version = max([max_version] + [row.get('version') or 0 for row in rows])
+            if len(rows) < chunk_size:
+                break
+        copied[table.name] = count
+
+    # The near-duplicate index is derived - rebuild it rather than copy it
+    index_missing(shard_engine, db.metadata)
+
+    # New versions in the shard must sort after every version the user's clients have seen
+    with shard_engine.begin() as shard:
+        current = shard.execute(db.select(db.func.max(SyncSequence.id))).scalar() or 0
+        if current < max_version:
+            shard.execute(SyncSequence.__table__.insert().values(id=max_version, created_at=datetime.utcnow()))
+    return copied
+
+def remove_user_rows(user_id):
+    """Delete a user's rows from the shared database (children go through ON DELETE CASCADE)"""
+    from app import db, AppIdea, IdeaScoringModel, Project, SyncTombstone, UserActivity, ARCHIVE_TABLES
+    from archive import discard_archived_project
+
+    archived = ARCHIVE_TABLES[Project]
+    for project_id in db.session.execute(
+        db.select(archived.c.id).where(archived.c.user_id == user_id)
+    ).scalars().all():
+        discard_archived_project(project_id)
+    for model in (UserActivity, Project, AppIdea, IdeaScoringModel, SyncTombstone):
+        db.session.execute(
+            db.delete(model).where(model.user_id == user_id).execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy each user\'s data from the shared database into their shard')
+    parser.add_argument('--user', help='Only split this user id')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per INSERT')
+    parser.add_argument('--remove', action='store_true', help='Delete copied rows from the shared database')
+    args = parser.parse_args()
+
+    from app import app, db, shard_router
+    if not shard_router.enabled:
+        print("❌ Sharding is not enabled - set SQLITE_SHARD_DIR (and use a SQLite database)")
+        return 1
+
+    started = datetime.now()
+    with app.app_context():
+        user_ids = [args.user] if args.user else owned_user_ids()
+        print(f"🔀 Splitting {len(user_ids):,} users into {shard_router.shard_dir}...")
+        for user_id in user_ids:
+            copied = copy_user(user_id, args.chunk_size)
+            if args.remove:
+                remove_user_rows(user_id)
+            print(f"   ✅ {user_id}: {sum(copied.values()):,} rows -> {shard_router.shard_path(user_id)}")
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"\n✅ Split {len(user_ids):,} users in {elapsed:.1f}s")
+    if not args.remove:
+        print("   The shared database still has their rows - rerun with --remove once you've checked the shards")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Typeahead Suggestions
+
+Backs GET /api/suggest?q=, the ideas board search box. Instead of a LIKE scan
+over full idea rows on every keystroke, each user gets an in-memory prefix
+index over three kinds of labels:
+
+- idea         AppIdea.name
+- project      Project.name
+- competitor   AppIdea.competitor_url (scheme and www. dropped)
+
+Labels are normalised (lowercase, punctuation dropped) into words, and every
+word starts a key: "Invoice Chaser Pro" is stored as "invoice chaser pro",
+"chaser pro" and "pro". Keys live in one sorted list, so a query is a bisect
+to the first key at or after it plus a scan while keys still start with it.
+Responses carry only ids and labels.
+
+Indexes are built the first time a user asks for suggestions, and at most
+SUGGEST_CACHE_SIZE users are kept (least recently used are dropped first).
+They stay current:
+- ORM writes queue the ideas and projects they change (after_flush in app.py)
+  and apply them to the cached index once the transaction commits
+- bulk writes in this process queue changes the same way: imports and
+  claiming legacy data drop the user's index so the next query rebuilds it,
+  archiving a project removes it and restoring it adds it back
+- an index older than SUGGEST_MAX_AGE_SECONDS is rebuilt, which picks up
+  writes made by other processes (the job worker, other web workers)
+
+Usage:
+    python suggest.py inv                    # suggestions for legacy data
+    python suggest.py "invoice ch" --user USER_ID --limit 20
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 50
+CACHE_SIZE = int(os.environ.get('SUGGEST_CACHE_SIZE', 256))
+MAX_AGE_SECONDS = float(os.environ.get('SUGGEST_MAX_AGE_SECONDS', 60))
+MAX_KEY_LENGTH = 64
+MAX_WORDS = 12  # words of a label that start a key
+SCAN_FACTOR = 20  # keys read per requested suggestion before ranking
+
+# Changes flushed in the current transaction, applied by apply_changes on commit
+PENDING_KEY = 'suggest_changes'
+
+WORD = re.compile(r'\w+')
+URL_PREFIX = re.compile(r'^[a-z][a-z0-9+.-]*://(www\.)?|^www\.', re.IGNORECASE)
+
+def words(text):
+    return WORD.findall(text.casefold())[:MAX_WORDS] if text else []
+
+def normalise(text):
+    return ' '.join(words(text))[:MAX_KEY_LENGTH]
+
+def competitor_label(url):
+    return URL_PREFIX.sub('', url.strip()).rstrip('/') if url else None
+
+def keys(text):
+    """(key, word position) for every word of text"""
+    tokens = words(text)
+    return [(' '.join(tokens[position:])[:MAX_KEY_LENGTH], position) for position in range(len(tokens))]
+
+class SuggestIndex:
+    """Sorted (key, position, kind, id) entries for one user's labels"""
+
+    def __init__(self, items):
+        self.labels = {}
+        self.entries = []
+        for kind, item_id, label in items:
+            if label:
+                self.labels[(kind, item_id)] = label
+                self.entries.extend((key, position, kind, item_id) for key, position in keys(label))
+        self.entries.sort()
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _remove(self, kind, item_id):
+        label = self.labels.pop((kind, item_id), None)
+        for key, position in keys(label):
+            entry = (key, position, kind, item_id)
+            index = bisect_left(self.entries, entry)
+            if index < len(self.entries) and self.entries[index] == entry:
+                del self.entries[index]
+
+    def update(self, kind, item_id, label):
+        """Replace an item's label (None removes the item)"""
+        with self.lock:
+            self._remove(kind, item_id)
+            if label:
+                self.labels[(kind, item_id)] = label
+                for key, position in keys(label):
+                    insort(self.entries, (key, position, kind, item_id))
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Up to limit {type, id, label}: labels starting with the query first, then shorter labels"""
+        prefix = normalise(query)
+        if not prefix:
+            return []
+        hits = {}
+        with self.lock:
+            index = bisect_left(self.entries, (prefix,))
+            end = min(len(self.entries), index + limit * SCAN_FACTOR)
+            while index < end and self.entries[index][0].startswith(prefix):
+                _, position, kind, item_id = self.entries[index]
+                if position < hits.get((kind, item_id), MAX_WORDS):
+                    hits[(kind, item_id)] = position
+                index += 1
+            ranked = sorted(hits, key=lambda item: (hits[item], len(self.labels[item]), self.labels[item].casefold()))
+            return [{'type': kind, 'id': item_id, 'label': self.labels[(kind, item_id)]}
+                    for kind, item_id in ranked[:limit]]
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def build_index(session, user_id):
+    """Read a user's idea names, competitor URLs and project names into a new index"""
+    from app import db, AppIdea, Project, owned_by
+    items = []
+    for idea_id, name, url in session.execute(
+        db.select(AppIdea.id, AppIdea.name, AppIdea.competitor_url).where(owned_by(AppIdea.user_id, user_id))
+    ):
+        items.append(('idea', idea_id, name))
+        items.append(('competitor', idea_id, competitor_label(url)))
+    items += [('project', project_id, name) for project_id, name in session.execute(
+        db.select(Project.id, Project.name).where(owned_by(Project.user_id, user_id))
+    )]
+    return SuggestIndex(items)
+
+def get_index(session, user_id):
+    """The user's cached index, built (or rebuilt once it is too old) on demand"""
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is not None and time.monotonic() - index.built_at < MAX_AGE_SECONDS:
+            _indexes.move_to_end(user_id)
+            return index
+    # Build outside the lock - two requests racing to build the same index only waste a query
+    index = build_index(session, user_id)
+    with _indexes_lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+def suggest(session, user_id, query, limit=DEFAULT_LIMIT):
+    if not normalise(query):
+        return []
+    return get_index(session, user_id).search(query, limit)
+
+def invalidate(*user_ids):
+    """Drop cached indexes after writes that bypass the ORM"""
+    with _indexes_lock:
+        for user_id in user_ids:
+            _indexes.pop(user_id, None)
+
+# Keeping indexes current (listeners in app.py)
+
+def record_changes(session):
+    """Queue the labels a flush changed as (user_id, kind, id, label); kind None drops the user's index"""
+    from app import db, AppIdea, Project
+    changes = session.info.setdefault(PENDING_KEY, [])
+
+    def changed(obj, *fields):
+        state = db.inspect(obj)
+        return any(state.attrs[field].history.has_changes() for field in fields)
+
+    def moved_owner(obj):
+        # Rare - rebuild both users' indexes rather than track the move
+        previous = db.inspect(obj).attrs.user_id.history.deleted
+        changes.extend((user_id, None, None, None) for user_id in [obj.user_id, *previous])
+
+    for obj in session.new:
+        if isinstance(obj, AppIdea):
+            changes.append((obj.user_id, 'idea', obj.id, obj.name))
+            changes.append((obj.user_id, 'competitor', obj.id, competitor_label(obj.competitor_url)))
+        elif isinstance(obj, Project):
+            changes.append((obj.user_id, 'project', obj.id, obj.name))
+    for obj in session.dirty:
+        if obj in session.deleted or not isinstance(obj, (AppIdea, Project)):
+            continue
+        if changed(obj, 'user_id'):
+            moved_owner(obj)
+        elif isinstance(obj, AppIdea):
+            if changed(obj, 'name'):
+                changes.append((obj.user_id, 'idea', obj.id, obj.name))
+            if changed(obj, 'competitor_url'):
+                changes.append((obj.user_id, 'competitor', obj.id, competitor_label(obj.competitor_url)))
+        elif changed(obj, 'name'):
+            changes.append((obj.user_id, 'project', obj.id, obj.name))
+    for obj in session.deleted:
+        if isinstance(obj, AppIdea):
+            # ON DELETE CASCADE removes the idea's projects without the ORM seeing them
+            changes.append((obj.user_id, None, None, None))
+        elif isinstance(obj, Project):
+            changes.append((obj.user_id, 'project', obj.id, None))
+
+def queue_change(session, user_id, kind=None, item_id=None, label=None):
+    """Queue a change made outside the ORM, applied on commit (no kind drops the user's index)"""
+    session.info.setdefault(PENDING_KEY, []).append((user_id, kind, item_id, label))
+
+def apply_changes(session):
+    """Apply the queued changes to the cached indexes (users without one are built fresh later)"""
+    for user_id, kind, item_id, label in session.info.pop(PENDING_KEY, []):
+        if kind is None:
+            invalidate(user_id)
+            continue
+        with _indexes_lock:
+            index = _indexes.get(user_id)
+        if index is not None:
+            index.update(kind, item_id, label)
+
+def discard_changes(session, previous_transaction):
+    """Forget changes that were rolled back
+
+    A rolled-back savepoint only loses some of them, so the users it touched
+    get their indexes rebuilt instead.
+    """
+    changes = session.info.get(PENDING_KEY)
+    if not changes:
+        return
+    if previous_transaction.nested:
+        session.info[PENDING_KEY] = [(user_id, None, None, None) for user_id in {change[0] for change in changes}]
+    else:
+        session.info.pop(PENDING_KEY, None)
+
+def main():
+    parser = argparse.ArgumentParser(description='Typeahead suggestions for idea, project and competitor names')
+    parser.add_argument('query')
+    parser.add_argument('--user', help="User id ('anonymous' or omitted for ideas without one)")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    from app import app, db, shard_router
+    user_id = None if args.user in (None, 'anonymous') else args.user
+    with app.app_context(), shard_router.use_shard(user_id):
+        started = time.perf_counter()
+        index = get_index(db.session, user_id)
+        built = time.perf_counter()
+        suggestions = index.search(args.query, args.limit)
+        searched = time.perf_counter()
+    print(f"🔎 {len(index):,} labels indexed in {(built - started) * 1000:.1f} ms, "
+          f"searched in {(searched - built) * 1000:.3f} ms")
+    for suggestion in suggestions:
+        print(f"   {suggestion['type']:<10} {suggestion['id']:>7}  {suggestion['label']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+GDP Trend Engine
+
+Growth evidence for sizing a market, from the market data store
+(market_data.py):
+
+- states and the US: the BEA annual summary as a dense region x measure x year
+  array (real and nominal GDP, personal income, PCE, per-capita figures,
+  price parities, employment), 1998-2024
+- counties: real GDP by county, 2020-2023
+
+For any region and year window it reports the compound annual growth rate
+(CAGR), the volatility of annual growth (standard deviation of the yearly
+log growth rates) and the region's share of the US total. On first use the
+arrays get log values and prefix sums of the yearly log growth (and its
+square) along the year axis, so a window over every region and measure at
+once is a few whole-array subtractions rather than a scan of the years.
+Results are also cached per query.
+
+Usage:
+    python trends.py 48                          # Texas real GDP, last 10 years
+    python trends.py 48 --measure employment --start 2010
+    python trends.py 48453                       # a county (real GDP 2020-2023)
+    python trends.py --rank --measure income     # states by CAGR
+"""
+
+import argparse
+import json
+import sys
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+import market_data
+
+# Short names for the BEA summary lines (market_data stores them as bea.line_code)
+MEASURES = {
+    'gdp': 1,
+    'income': 2,
+    'pce': 3,
+    'nominal_gdp': 4,
+    'nominal_income': 5,
+    'disposable_income': 6,
+    'nominal_pce': 7,
+    'income_per_capita': 8,
+    'pce_per_capita': 9,
+    'nominal_income_per_capita': 10,
+    'disposable_income_per_capita': 11,
+    'nominal_pce_per_capita': 12,
+    'price_parity': 13,
+    'price_deflator': 14,
+    'employment': 15,
+}
+# Totals that add up to the US figure; the others (per capita, prices) have no share of the US
+ADDITIVE_MEASURES = {1, 2, 3, 4, 5, 6, 7, 15}
+DEFAULT_MEASURE = 'gdp'
+DEFAULT_WINDOW_YEARS = 10
+NATION = 0
+QUERY_CACHE_SIZE = 512
+
+class GrowthCube:
+    """values[region, measure, year] with prefix sums of yearly log growth along the last axis"""
+
+    def __init__(self, values, years):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.years = [int(year) for year in years]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.logs = np.where(self.values > 0, np.log(self.values), np.nan)
+        growth = np.diff(self.logs, axis=-1)
+        valid = ~np.isnan(growth)
+        growth = np.where(valid, growth, 0.0)
+        # prefix[..., i] sums growth over years[0]..years[i]; window (a, b) is prefix[b] - prefix[a]
+        zeros = np.zeros(self.values.shape[:-1] + (1,))
+        self.growth_sum = np.concatenate([zeros, np.cumsum(growth, axis=-1)], axis=-1)
+        self.growth_squares = np.concatenate([zeros, np.cumsum(growth ** 2, axis=-1)], axis=-1)
+        self.growth_count = np.concatenate([zeros, np.cumsum(valid, axis=-1)], axis=-1)
+
+    def year_index(self, year):
+        if year not in self.years:
+            raise ValueError(f"Year {year} is outside {self.years[0]}-{self.years[-1]}")
+        return self.years.index(year)
+
+    def window(self, a, b):
+        """(CAGR, volatility) over year indices a..b for every region and measure; NaN where data is missing"""
+        years = b - a
+        complete = (self.growth_count[..., b] - self.growth_count[..., a]) == years
+        with np.errstate(invalid='ignore'):
+            mean = (self.growth_sum[..., b] - self.growth_sum[..., a]) / years
+            cagr = np.where(complete, np.expm1(mean), np.nan)
+            if years < 2:
+                return cagr, np.full(cagr.shape, np.nan)
+            squares = (self.growth_squares[..., b] - self.growth_squares[..., a]) / years
+            variance = np.clip(squares - mean ** 2, 0, None) * years / (years - 1)
+        return cagr, np.where(complete, np.sqrt(variance), np.nan)
+
+class Trends:
+    """The growth cubes for one opened store"""
+
+    def __init__(self, store):
+        self.store = store
+        self.states = GrowthCube(store['bea.values'], store['bea.years'])
+        self.state_fips = [int(geo) // 1000 for geo in store['bea.geo_fips']]
+        self.state_names = [str(name) for name in store['bea.geo_name']]
+        self.line_codes = [int(code) for code in store['bea.line_code']]
+        self.line_names = [str(name) for name in store['bea.line_name']]
+        # Counties have one measure (real GDP); keep the region x measure x year shape
+        self.counties = GrowthCube(store['county_gdp.real_gdp'][:, None, :], store['county_gdp.years'])
+        self.county_fips = np.asarray(store['county_gdp.fips'])
+        self.county_state = np.asarray(store['county_gdp.state_fips'])
+        self.county_names = store['dict.county_gdp_name'][store['county_gdp.name']]
+        state_gdp_fips = [int(fips) for fips in store['state_gdp.fips']]
+        self.county_totals = np.asarray(store['state_gdp.real_gdp'])[state_gdp_fips.index(NATION)]
+
+    def measure(self, measure):
+        """Position of a measure on the measure axis, by short name or BEA line code"""
+        code = MEASURES.get(str(measure))
+        if code is None and str(measure).isdigit():
+            code = int(measure)
+        if code not in self.line_codes:
+            raise ValueError(f"Unknown measure '{measure}' (use {', '.join(MEASURES)} or a BEA line code)")
+        return self.line_codes.index(code)
+
+    def latest_year(self, position):
+        """Last year with data for the measure in every state"""
+        complete = ~np.isnan(self.states.values[:, position, :]).any(axis=0)
+        return self.states.years[int(np.flatnonzero(complete)[-1])]
+
+    def window(self, cube, position, start, end):
+        if start is None:
+            start = max(end - DEFAULT_WINDOW_YEARS, cube.years[0])
+        a, b = cube.year_index(int(start)), cube.year_index(int(end))
+        if a >= b:
+            raise ValueError("start must be before end")
+        return a, b
+
+_trends = None
+_trends_lock = threading.Lock()
+
+def trends():
+    global _trends
+    store = market_data.get_store()
+    if _trends is None or _trends.store is not store:
+        with _trends_lock:
+            if _trends is None or _trends.store is not store:
+                _trends = Trends(store)
+    return _trends
+
+def optional_year(name, value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a year")
+
+def measure_key(value):
+    """A measure as a cache key: short name or line code as a string"""
+    if value in (None, ''):
+        return DEFAULT_MEASURE
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        raise ValueError("measure must be a measure name or a BEA line code")
+    return str(value).strip()
+
+def rounded(value, digits=5):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+def state_growth(measure=DEFAULT_MEASURE, start=None, end=None):
+    """CAGR, volatility and share of the US for every state - the vectorised slice behind trend()"""
+    engine = trends()
+    position = engine.measure(measure)
+    end = optional_year('end', end) or engine.latest_year(position)
+    a, b = engine.window(engine.states, position, optional_year('start', start), end)
+    return _state_growth(engine, position, a, b)
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _state_growth(engine, position, a, b):
+    cagr, volatility = engine.states.window(a, b)
+    values = engine.states.values[:, position, :]
+    nation = engine.state_fips.index(NATION)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = values[:, [a, b]] / values[nation, [a, b]]
+    return {
+        'years': (engine.states.years[a], engine.states.years[b]),
+        'cagr': cagr[:, position],
+        'volatility': volatility[:, position],
+        'share': share,
+        'rank': rank_descending(np.delete(cagr[:, position], nation)),
+    }
+
+def rank_descending(values):
+    """1 for the largest value; NaN values rank last"""
+    order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(1, len(values) + 1)
+    return ranks
+
+def trend(region, measure=DEFAULT_MEASURE, start=None, end=None):
+    """Growth evidence for the US ('US' or 0), a state (2-digit FIPS) or a county (5-digit FIPS)"""
+    region = str(region).strip()
+    if region.upper() in ('US', 'USA'):
+        region = '0'
+    if not region.isdigit():
+        raise ValueError("region must be 'US', a state FIPS code or a county FIPS code")
+    measure = measure_key(measure)
+    start, end = optional_year('start', start), optional_year('end', end)
+    if len(region) == 5 and int(region) % 1000:
+        return _county_trend(int(region), measure, start, end)
+    return _state_trend(int(region) // 1000 if len(region) == 5 else int(region), measure, start, end)
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _state_trend(fips, measure, start, end):
+    engine = trends()
+    if fips not in engine.state_fips:
+        raise ValueError(f"No state with FIPS code {fips:02d}")
+    position = engine.measure(measure)
+    growth = state_growth(measure, start, end)
+    row, nation = engine.state_fips.index(fips), engine.state_fips.index(NATION)
+    first, last = growth['years']
+    a, b = engine.states.year_index(first), engine.states.year_index(last)
+    series = engine.states.values[row, position, a:b + 1]
+    result = {
+        'region': 'US' if fips == NATION else f'{fips:02d}',
+        'region_name': engine.state_names[row],
+        'level': 'nation' if fips == NATION else 'state',
+        'measure': measure if measure in MEASURES else engine.line_names[position],
+        'measure_name': engine.line_names[position],
+        'start': first,
+        'end': last,
+        'series': dict(zip(range(first, last + 1), [rounded(value, 2) for value in series])),
+        'cagr': rounded(growth['cagr'][row]),
+        'volatility': rounded(growth['volatility'][row]),
+        'us_cagr': rounded(growth['cagr'][nation]),
+    }
+    if fips != NATION:
+        result.update({
+            'cagr_rank': int(growth['rank'][row - (row > nation)]),
+            'cagr_rank_of': len(engine.state_fips) - 1,
+        })
+        if engine.line_codes[position] in ADDITIVE_MEASURES:
+            result.update({
+                'share_of_us': rounded(growth['share'][row, 1], 6),
+                'share_of_us_change': rounded(growth['share'][row, 1] - growth['share'][row, 0], 6),
+            })
+    return result
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _county_trend(fips, measure, start, end):
+    engine = trends()
+    if measure not in (DEFAULT_MEASURE, str(MEASURES[DEFAULT_MEASURE])):
+        raise ValueError("Counties only have real GDP ('gdp')")
+    rows = np.flatnonzero(engine.county_fips == fips)
+    if not len(rows):
+        raise ValueError(f"No county GDP for FIPS code {fips:05d} (counties outside metro and micro areas aren't matched)")
+    row = int(rows[0])
+    area = engine.store.county_row(fips)
+    cube = engine.counties
+    a, b = engine.window(cube, 0, start, end or cube.years[-1])
+    cagr, volatility = cube.window(a, b)
+    in_state = engine.county_state == engine.county_state[row]
+    series = cube.values[row, 0, a:b + 1]
+    with np.errstate(invalid='ignore'):
+        state_rank = int((cagr[in_state, 0] > cagr[row, 0]).sum()) + 1
+    return {
+        'region': f'{fips:05d}',
+        'region_name': engine.store.area_name(area) if area is not None else str(engine.county_names[row]),
+        'level': 'county',
+        'measure': DEFAULT_MEASURE,
+        'measure_name': 'Real GDP (thousands of chained 2017 dollars)',
+        'start': cube.years[a],
+        'end': cube.years[b],
+        'series': dict(zip(cube.years[a:b + 1], [rounded(value, 2) for value in series])),
+        'cagr': rounded(cagr[row, 0]),
+        'volatility': rounded(volatility[row, 0]),
+        'us_cagr': rounded(np.expm1((np.log(engine.county_totals[b]) - np.log(engine.county_totals[a])) / (b - a))),
+        'share_of_us': rounded(cube.values[row, 0, b] / engine.county_totals[b], 6),
+        'share_of_us_change': rounded(cube.values[row, 0, b] / engine.county_totals[b]
+                                      - cube.values[row, 0, a] / engine.county_totals[a], 6),
+        'cagr_rank': state_rank,
+        'cagr_rank_of': int(in_state.sum()),
+    }
+
+def evidence(region, measure=DEFAULT_MEASURE, start=None, end=None):
+    """trend() plus a one-line summary to attach to an idea"""
+    result = dict(trend(region, measure, start, end))
+    growth = f"{result['cagr'] * 100:+.1f}%/yr" if result['cagr'] is not None else 'n/a'
+    summary = (f"{result['region_name']} {result['measure_name']}: {growth} {result['start']}-{result['end']}")
+    if result['level'] != 'nation' and result['us_cagr'] is not None:
+        summary += f" (US {result['us_cagr'] * 100:+.1f}%/yr)"
+    if result['volatility'] is not None:
+        summary += f", volatility {result['volatility'] * 100:.1f}%"
+    if result.get('share_of_us') is not None:
+        summary += f", {result['share_of_us'] * 100:.2f}% of the US in {result['end']}"
+    result['summary'] = summary
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='GDP and income growth for the US, a state or a county')
+    parser.add_argument('region', nargs='?', default='US', help="'US', a state FIPS code or a county FIPS code")
+    parser.add_argument('--measure', default=DEFAULT_MEASURE, help=f"One of: {', '.join(MEASURES)}")
+    parser.add_argument('--start', type=int)
+    parser.add_argument('--end', type=int)
+    parser.add_argument('--rank', action='store_true', help='List every state by CAGR')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        if args.rank:
+            engine = trends()
+            growth = state_growth(args.measure, args.start, args.end)
+            position = engine.measure(args.measure)
+            additive = engine.line_codes[position] in ADDITIVE_MEASURES
+            print(f"📈 {engine.line_names[position]}, {growth['years'][0]}-{growth['years'][1]}")
+            for row in np.argsort(rank_descending(growth['cagr'])):
+                share = f"  share {growth['share'][row, 1] * 100:6.2f}%" if additive else ''
+                print(f"   {engine.state_names[row]:<24} {growth['cagr'][row] * 100:+6.2f}%/yr"
+                      f"  volatility {growth['volatility'][row] * 100:5.2f}%{share}")
+            return 0
+        result = evidence(args.region, args.measure, args.start, args.end)
+    except (ValueError, market_data.MarketDataError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(json.dumps(result, indent=2) if args.json else f"📈 {result['summary']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())